@@ -2,15 +2,21 @@
 """
 RAG-GPT: shell_gpt 스타일의 RAG CLI 도구
 """
+import time
+_START_TIME = time.perf_counter()
+
 import sys
 import typer
 from pathlib import Path
 from typing import Optional
 from rich.console import Console
+from rich.table import Table
 
-from .app import RagGPT
 from .config import Config
 
+# RagGPT 와 langchain 등 무거운 모듈은 실제로 필요할 때 import
+_IMPORT_TIME = time.perf_counter() - _START_TIME
+
 console = Console()
 app = typer.Typer(
     help="RAG 기반 문서 질의응답 CLI",
@@ -22,16 +28,24 @@ app = typer.Typer(
 def main(
     prompt: Optional[str] = typer.Argument(None, help="질문 또는 프롬프트"),
     pdf: Optional[Path] = typer.Option(None, "--pdf", "-p", help="PDF 파일 경로"),
+    index: Optional[str] = typer.Option(None, "--index", "-i", help="저장된 인덱스 열기 (!saveindex 로 저장)"),
+    watch: Optional[Path] = typer.Option(None, "--watch", help="폴더 아래 PDF 인덱싱 후 변경된 파일만 다시 반영"),
     chat: Optional[str] = typer.Option(None, "--chat", "-c", help="대화 세션 이름"),
     repl: bool = typer.Option(False, "--repl", "-r", help="대화형 REPL 모드"),
     web: bool = typer.Option(False, "--web", "-w", help="웹 인터페이스 실행"),
-    port: int = typer.Option(7860, "--port", help="웹 서버 포트"),
+    batch: Optional[Path] = typer.Option(None, "--batch", "-b", help="질문 JSONL 파일 일괄 처리"),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="일괄 처리 결과 JSONL (기본: <질문 파일>.answers.jsonl)"),
+    serve: bool = typer.Option(False, "--serve", help="HTTP API 서버 실행"),
+    host: Optional[str] = typer.Option(None, "--host", help="웹/API 서버 주소 (기본: 웹 0.0.0.0, API 127.0.0.1)"),
+    port: int = typer.Option(7860, "--port", help="웹/API 서버 포트"),
     share: bool = typer.Option(False, "--share", help="공개 URL 생성 (ngrok)"),
     model: Optional[str] = typer.Option(None, "--model", "-m", help="사용할 LLM 모델"),
     temperature: Optional[float] = typer.Option(None, "--temperature", "-t", help="Temperature"),
     no_cache: bool = typer.Option(False, "--no-cache", help="캐시 사용 안 함"),
     show_chat: bool = typer.Option(False, "--show-chat", "-s", help="대화 기록 표시"),
     list_chats: bool = typer.Option(False, "--list-chats", "-l", help="모든 대화 목록"),
+    warmup: bool = typer.Option(False, "--warmup", help="시작 시 임베딩 모델 미리 로드"),
+    profile_startup: bool = typer.Option(False, "--profile-startup", help="시작 단계별 소요 시간 표시"),
 ):
     """
     RAG-GPT: 문서 기반 AI 어시스턴트
@@ -45,24 +59,75 @@ def main(
         
         # CLI 모드
         rag-gpt --repl --pdf document.pdf
+        
+        # HTTP API 서버
+        rag-gpt --serve --port 8000 --pdf document.pdf
+        
+        # 일괄 질의 (중단 후 다시 실행하면 이어서 처리)
+        rag-gpt --batch questions.jsonl --pdf document.pdf --out answers.jsonl
+        
+        # 공유 폴더 감시 (추가/수정된 파일만 임베딩, 삭제된 파일은 제거)
+        rag-gpt --repl --watch ~/shared/pdfs
     """
     
     # 설정 초기화
     config = Config()
     
+    if profile_startup:
+        _profile_startup(config, use_cache=not no_cache)
+        return
+    
+    # 감시 폴더는 시작할 때 인덱스를 자기 스냅숏으로 교체하므로 --index 와 함께 쓸 수 없음
+    if index and watch:
+        console.print("[red]오류: --index 와 --watch 는 함께 사용할 수 없습니다[/red]")
+        sys.exit(1)
+    
+    if chat:
+        from .handlers.chat_handler import check_session_name
+        
+        try:
+            check_session_name(chat)
+        except ValueError as e:
+            console.print(f"[red]오류: {e}[/red]")
+            sys.exit(1)
+    
+    # 대화 목록/기록 표시는 모델이나 API 키 없이 처리
+    if list_chats or show_chat:
+        from .handlers.chat_handler import ChatHandler
+        
+        chat_handler = ChatHandler(config)
+        if list_chats:
+            chat_handler.list_sessions()
+        else:
+            chat_handler.show_session(chat)
+        return
+    
     # 모델 설정
     if model:
         config.set("model", model)
     if temperature is not None:
         config.set("temperature", temperature)
+    if warmup:
+        config.data["embedding_warmup"] = True
     
     # RagGPT 인스턴스 생성
+    from .app import RagGPT
+    
     try:
         rag_gpt = RagGPT(config, use_cache=not no_cache)
     except ValueError as e:
         console.print(f"[red]오류: {e}[/red]")
         sys.exit(1)
     
+    # 저장된 인덱스 열기 (--pdf 는 그 위에 추가)
+    if index:
+        rag_gpt.open_index(index)
+    
+    # 감시 폴더 (웹/API/REPL 은 백그라운드에서 계속 감시, 그 외에는 한 번 동기화)
+    if watch:
+        if rag_gpt.watch_directory(watch, keep_watching=web or serve or repl) is None:
+            sys.exit(1)
+    
     # 웹 모드
     if web:
         console.print(f"[cyan]🌐 웹 인터페이스 시작 (포트: {port})[/cyan]")
@@ -71,26 +136,32 @@ def main(
         web_ui = WebInterface(rag_gpt)
         web_ui.launch(
             server_port=port,
-            server_name="0.0.0.0",
+            server_name=host or "0.0.0.0",
             share=share,
             inbrowser=not share  # share 모드가 아닐 때만 브라우저 자동 열기
         )
         return
-        
-    # 대화 목록 표시
-    if list_chats:
-        rag_gpt.list_chats()
-        return
-    
-    # 대화 기록 표시
-    if show_chat:
-        rag_gpt.show_chat(chat)
-        return
     
     # PDF 로드
     if pdf:
         rag_gpt.load_pdf(pdf)
     
+    # 일괄 질의 모드
+    if batch:
+        out_path = out or batch.with_suffix(".answers.jsonl")
+        if rag_gpt.run_batch(batch, out_path) is None:
+            sys.exit(1)
+        return
+    
+    # HTTP API 모드
+    if serve:
+        host = host or "127.0.0.1"
+        console.print(f"[cyan]🛰️ API 서버 시작 (http://{host}:{port})[/cyan]")
+        from .server import APIServer
+        
+        APIServer(rag_gpt).run(host=host, port=port)
+        return
+    
     # REPL 모드
     if repl:
         rag_gpt.start_repl(session_name=chat)
@@ -98,11 +169,52 @@ def main(
     
     # 단일 프롬프트 처리
     if prompt:
-        response = rag_gpt.query(prompt, session_name=chat)
-        console.print(response)
+        for token in rag_gpt.stream_query(prompt, session_name=chat):
+            console.print(token, end="", markup=False, highlight=False, soft_wrap=True)
+        console.print()
     else:
         console.print("[yellow]프롬프트를 입력하거나 --repl 옵션을 사용하세요.[/yellow]")
 
+def _profile_startup(config: Config, use_cache: bool = True):
+    """시작 단계별 소요 시간 측정 (모델 로딩까지 강제로 수행)"""
+    timings = [("CLI 모듈 import", _IMPORT_TIME)]
+    
+    def measure(label, func):
+        start = time.perf_counter()
+        result = func()
+        timings.append((label, time.perf_counter() - start))
+        return result
+    
+    measure("설정 로드", Config)
+    
+    def list_sessions():
+        from .handlers.chat_handler import ChatHandler
+        return ChatHandler(config).session_infos()
+    
+    measure("세션 목록 조회", list_sessions)
+    
+    def create_app():
+        from .app import RagGPT
+        return RagGPT(config, use_cache=use_cache)
+    
+    try:
+        rag_gpt = measure("RagGPT 생성 (지연 로딩)", create_app)
+    except ValueError as e:
+        console.print(f"[red]오류: {e}[/red]")
+        rag_gpt = None
+    
+    if rag_gpt:
+        measure("LLM 클라이언트 생성", lambda: rag_gpt.rag_handler.llm)
+        measure("임베딩 모델 로드", lambda: rag_gpt.rag_handler.embedding)
+    
+    table = Table(title="시작 시간 분석")
+    table.add_column("단계", style="cyan")
+    table.add_column("시간 (ms)", style="yellow", justify="right")
+    for label, seconds in timings:
+        table.add_row(label, f"{seconds * 1000:.1f}")
+    table.add_row("[bold]합계[/bold]", f"[bold]{sum(t for _, t in timings) * 1000:.1f}[/bold]")
+    console.print(table)
+
 if __name__ == "__main__":
     app()
 
@@ -3,19 +3,32 @@
 """
 import os
 import shlex
+import time
 from pathlib import Path
-from typing import Optional, List, Union
+from typing import Iterator, Optional, List, Union
 from rich.console import Console
+from rich.live import Live
 from rich.prompt import Prompt
 from rich.markdown import Markdown
 
 from .handlers.chat_handler import ChatHandler
 from .handlers.rag_handler import RAGHandler
-from .cache import VectorCache
+from .cache import VectorCache, EmbeddingCache, AnswerCache
+from .embeddings import DEFAULT_EMBEDDING_MODEL
 from .config import Config
+from .jobs import JobManager
+from .metrics import configure as configure_metrics, metrics
 
 console = Console()
 
+
+def check_index_name(name: str) -> str:
+    """저장 인덱스 이름 검사 (저장할 때 같은 이름의 디렉토리를 지우므로 경로 구분자, 숨김/상위 디렉토리 이름은 ValueError)"""
+    if not name or name.startswith(".") or any(char in name for char in "/\\\0"):
+        raise ValueError(f"사용할 수 없는 인덱스 이름: {name!r}")
+    return name
+
+
 class RagGPT:
     """메인 애플리케이션 클래스"""
     
@@ -39,11 +52,41 @@ class RagGPT:
                 raise ValueError("GROQ API key not found")
         
         os.environ["GROQ_API_KEY"] = api_key
+        configure_metrics(config.get("metrics_enabled", True))
         
         # 핸들러 초기화
-        self.chat_handler = ChatHandler(config)
-        self.rag_handler = RAGHandler(config)
         self.cache = VectorCache() if use_cache else None
+        self.embedding_cache = EmbeddingCache(
+            max_entries=config.get("embedding_cache_max_entries", 200000)
+        ) if use_cache else None
+        self.answer_cache = AnswerCache(
+            threshold=config.get("answer_cache_threshold", 0.95),
+            ttl=config.get("answer_cache_ttl", 86400),
+            max_entries=config.get("answer_cache_max_entries", 1000),
+            persist=config.get("answer_cache_persist", False),
+        ) if use_cache and config.get("answer_cache", True) else None
+        self.chat_handler = ChatHandler(config)
+        self.rag_handler = RAGHandler(
+            config,
+            cache=self.cache,
+            embedding_cache=self.embedding_cache,
+            answer_cache=self.answer_cache,
+        )
+        self.jobs = JobManager(self.rag_handler, config)
+        self.watcher = None
+        
+        if config.get("embedding_warmup", False):
+            self.warmup()
+    
+    def warmup(self, background: bool = True):
+        """임베딩 모델 미리 로드 후 더미 인코딩 (첫 질의 지연 방지)"""
+        from .embeddings import warmup, warmup_in_background
+        
+        model_name = self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+        device = self.config.get("embedding_device")
+        if background:
+            return warmup_in_background(model_name, device)
+        return warmup(model_name, device)
     
     def load_pdf(self, pdf_path: Union[Path, str]):
         """단일 PDF 로드"""
@@ -70,10 +113,342 @@ class RagGPT:
         for failed in results["failed"]:
             console.print(f"[red]❌ {failed['file']}: {failed['error']}[/red]")
         
-        console.print(f"[cyan]총 {results['total_chunks']}개 청크 로드됨[/cyan]")
+        console.print(
+            f"[cyan]총 {results['total_chunks']}개 청크 로드됨 "
+            f"({results['elapsed']:.2f}초, {results['chunks_per_sec']:.1f} 청크/초)[/cyan]"
+        )
+        if "embedding_cache" in results:
+            cache_stats = results["embedding_cache"]
+            console.print(
+                f"[dim]임베딩 캐시: 적중 {cache_stats['hits']} / 미스 {cache_stats['misses']} "
+                f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']}개 저장됨[/dim]"
+            )
         
         return results
     
+    def start_ingest_job(self, pdf_paths: List[Union[Path, str]]):
+        """백그라운드 수집 작업 시작 (기존 문서는 처리 중에도 질의 가능)"""
+        paths = [Path(p) for p in pdf_paths]
+        missing = [path for path in paths if not path.is_file()]
+        for path in missing:
+            console.print(f"[red]❌ 파일을 찾을 수 없습니다: {path}[/red]")
+        paths = [path for path in paths if path not in missing]
+        if not paths:
+            return None
+        
+        job = self.jobs.submit(paths)
+        console.print(
+            f"[cyan]📥 작업 {job.id}: {len(paths)}개 PDF 백그라운드 로딩 시작 "
+            f"(!jobs 로 진행 상황 확인)[/cyan]"
+        )
+        return job
+    
+    def show_jobs(self):
+        """수집 작업 목록 표 표시"""
+        from rich.table import Table
+        from .jobs import STATUS_LABELS
+        
+        jobs = self.jobs.list()
+        if not jobs:
+            console.print("[yellow]수집 작업이 없습니다.[/yellow]")
+            return
+        table = Table(title="수집 작업")
+        table.add_column("ID", style="cyan")
+        table.add_column("상태")
+        table.add_column("파일", justify="right")
+        table.add_column("페이지", justify="right")
+        table.add_column("청크", justify="right")
+        table.add_column("임베딩", justify="right")
+        table.add_column("진행률", justify="right")
+        table.add_column("시간(초)", justify="right")
+        for job in jobs:
+            state = job.snapshot()
+            color = {"done": "green", "failed": "red", "running": "yellow"}.get(state["status"], "dim")
+            failed = len(state["results"]["failed"]) if state["results"] else 0
+            pages = state["pages"]
+            table.add_row(
+                state["id"],
+                f"[{color}]{STATUS_LABELS[state['status']]}[/{color}]",
+                f"{state['files_done']}/{state['files_total']}" + (f" (실패 {failed})" if failed else ""),
+                f"{pages}/{state['pages_total']}" if state["pages_total"] else str(pages),
+                str(state["chunks"]),
+                str(state["embedded"]),
+                f"{state['progress']:.0%}",
+                f"{state['elapsed']:.1f}",
+            )
+        console.print(table)
+        for job in jobs:
+            if job.error:
+                console.print(f"[red]❌ {job.id}: {job.error}[/red]")
+    
+    def wait_job(self, job_id: Optional[str] = None):
+        """작업이 끝날 때까지 진행 막대 표시 (ID 가 없으면 가장 최근 작업)"""
+        from rich.progress import Progress
+        
+        jobs = self.jobs.list()
+        job = self.jobs.get(job_id) if job_id else (jobs[-1] if jobs else None)
+        if job is None:
+            console.print(f"[red]작업을 찾을 수 없습니다: {job_id}[/red]" if job_id
+                          else "[yellow]수집 작업이 없습니다.[/yellow]")
+            return None
+        
+        with Progress(console=console) as progress:
+            task = progress.add_task(f"📥 작업 {job.id}", total=1.0)
+            while not job.wait(0.2):
+                progress.update(task, completed=job.fraction(), description=f"📥 {job.describe()}")
+            progress.update(task, completed=1.0, description=f"📥 {job.describe()}")
+        
+        if job.results:
+            for failed in job.results["failed"]:
+                console.print(f"[red]❌ {failed['file']}: {failed['error']}[/red]")
+            console.print(
+                f"[cyan]총 {job.results['total_chunks']}개 청크 로드됨 ({job.elapsed():.2f}초)[/cyan]"
+            )
+        elif job.error:
+            console.print(f"[red]❌ 작업 {job.id} 실패: {job.error}[/red]")
+        return job
+    
+    def watch_directory(self, directory: Union[Path, str], keep_watching: bool = False):
+        """폴더 아래 PDF 를 인덱싱하고 변경된 파일만 다시 반영
+
+        저장된 감시 인덱스가 있으면 먼저 열어 바로 질의할 수 있게 합니다.
+        keep_watching 이 True 면 검사를 백그라운드에서 watch_interval 초마다 반복하고,
+        아니면 한 번만 검사한 뒤 끝날 때까지 진행 막대를 표시합니다.
+        """
+        from rich.progress import Progress
+        from .watch import DirectoryWatcher
+        
+        directory = Path(directory)
+        if not directory.is_dir():
+            console.print(f"[red]폴더를 찾을 수 없습니다: {directory}[/red]")
+            return None
+        
+        watcher = DirectoryWatcher(self.rag_handler, directory, self.config, report=self._report_watch)
+        start = time.perf_counter()
+        chunks_count = watcher.open()
+        if chunks_count:
+            console.print(
+                f"[green]📂 감시 폴더 인덱스 열기: {len(watcher.files)}개 파일, {chunks_count}개 청크 "
+                f"({(time.perf_counter() - start) * 1000:.0f}ms)[/green]"
+            )
+        self.watcher = watcher
+        
+        if keep_watching:
+            console.print(f"[cyan]👀 폴더 감시 시작: {watcher.directory}[/cyan]")
+            watcher.start(sync_now=True)
+            return watcher
+        
+        with Progress(console=console) as progress:
+            task = progress.add_task(f"👀 {watcher.directory.name}", total=None)
+            changes = watcher.sync(
+                progress=lambda done, total: progress.update(task, completed=done, total=total)
+            )
+        self._report_watch(changes, always=True)
+        return watcher
+    
+    def _report_watch(self, changes: dict, always: bool = False):
+        """감시 폴더 검사 결과 출력 (바뀐 것이 없으면 생략)"""
+        if "error" in changes:
+            console.print(f"[red]❌ 감시 폴더 검사 실패: {changes['error']}[/red]")
+            return
+        for failed in changes["failed"]:
+            console.print(f"[red]❌ {failed['file']}: {failed['error']}[/red]")
+        if changes["duplicates"] and (always or changes["added"]):
+            console.print(
+                f"[yellow]같은 이름의 파일 {len(changes['duplicates'])}개는 건너뜀: "
+                f"{', '.join(changes['duplicates'][:5])}[/yellow]"
+            )
+        if always or changes["added"] or changes["modified"] or changes["removed"]:
+            restored = f", 캐시에서 복원 {len(changes['restored'])}" if changes["restored"] else ""
+            console.print(
+                f"[cyan]👀 감시 폴더: 파일 {changes['files']}개 - 추가 {len(changes['added'])}, "
+                f"변경 {len(changes['modified'])}, 삭제 {len(changes['removed'])}, "
+                f"그대로 {changes['unchanged']}{restored} ({changes['chunks']}개 청크 임베딩, "
+                f"{changes['elapsed']:.2f}초)[/cyan]"
+            )
+    
+    def unload_pdf(self, name: str):
+        """문서 하나만 제거"""
+        try:
+            removed = self.rag_handler.remove_document(name)
+        except KeyError as e:
+            console.print(f"[red]{e.args[0]}[/red]")
+            return 0
+        console.print(f"[yellow]🗑️ {name}: {removed}개 청크 제거됨[/yellow]")
+        return removed
+
+    def reload_pdf(self, pdf_path: Union[Path, str]):
+        """문서 하나만 다시 로드 (기존 청크 교체)"""
+        pdf_path = Path(pdf_path)
+        console.print(f"[cyan]🔄 PDF 다시 로딩: {pdf_path.name}[/cyan]")
+
+        # 경로가 없으면 처음 로드했던 경로 사용
+        try:
+            chunks_count = self.rag_handler.reload_document(
+                pdf_path.name, pdf_path if pdf_path.exists() else None
+            )
+        except KeyError as e:
+            console.print(f"[red]{e.args[0]}[/red]")
+            return 0
+        console.print(f"[green]✅ 다시 로드 완료: {chunks_count}개 청크[/green]")
+        return chunks_count
+
+    def index_path(self, name: str) -> Path:
+        """저장된 인덱스 디렉토리 (~/.rag_gpt/indexes/<이름>, 이름이 잘못되면 ValueError)"""
+        return self.config.config_dir / "indexes" / check_index_name(name)
+
+    def save_index(self, name: str) -> bool:
+        """현재 인덱스를 이름을 붙여 저장"""
+        try:
+            self.rag_handler.save_index(self.index_path(name))
+        except (ValueError, OSError) as e:
+            console.print(f"[red]인덱스 저장 실패: {e}[/red]")
+            return False
+        console.print(f"[green]💾 인덱스 저장: {name}[/green]")
+        return True
+
+    def open_index(self, name: str) -> int:
+        """저장된 인덱스 열기 (메모리 맵, 현재 문서 교체)
+
+        감시 폴더 문서까지 교체되므로 --watch 중에는 열지 않습니다.
+        """
+        if self.watcher is not None:
+            console.print("[red]감시 폴더(--watch)를 사용하는 중에는 저장된 인덱스를 열 수 없습니다.[/red]")
+            return 0
+        try:
+            path = self.index_path(name)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            return 0
+        if not path.exists():
+            console.print(f"[red]저장된 인덱스가 없습니다: {name}[/red]")
+            return 0
+        start = time.perf_counter()
+        chunks_count = self.rag_handler.open_index(path)
+        console.print(
+            f"[green]📂 인덱스 열기: {name} ({chunks_count}개 청크, "
+            f"{(time.perf_counter() - start) * 1000:.0f}ms)[/green]"
+        )
+        return chunks_count
+
+    def show_memory(self):
+        """청크 저장소 메모리 보고서 표시"""
+        report = self.rag_handler.memory_report()
+        if report is None:
+            console.print("[yellow]메모리에 보관된 청크가 없습니다.[/yellow]")
+            return
+        mb = 1024 * 1024
+        console.print(
+            f"[cyan]청크 {report['chunks']}개: 열 저장소 {report['columnar_bytes'] / mb:.2f}MB, "
+            f"Document 표현 추정 {report['document_bytes'] / mb:.2f}MB "
+            f"({report['ratio']:.1f}배), BM25 인덱스 {report['sparse_bytes'] / mb:.2f}MB[/cyan]"
+        )
+        console.print(
+            f"[cyan]저장소 + BM25 합계 {report['total_bytes'] / mb:.2f}MB "
+            f"(Document 표현이면 {report['document_total_bytes'] / mb:.2f}MB), "
+            f"벡터 {report['vector_bytes'] / mb:.2f}MB (양자화: {report['vector_quantization']})[/cyan]"
+        )
+
+    def show_quantization_report(self, k: int = 10):
+        """float32 flat 대비 int8/PQ 저장 방식 비교표 표시"""
+        from rich.table import Table
+
+        console.print("[dim]양자화 인덱스 구축 및 검색 중...[/dim]")
+        rows = self.rag_handler.quantization_report(k=k)
+        if rows is None:
+            console.print("[yellow]로드된 문서가 없습니다.[/yellow]")
+            return
+        # 말뭉치가 k 보다 작으면 compare 가 줄인 k 를 표시
+        k = rows[0]["k"]
+        table = Table(title=f"벡터 저장 방식 비교 (recall@{k}: float32 flat 기준)")
+        table.add_column("방식", style="cyan")
+        for column in ("메모리(MB)", "디스크(MB)", "평균(ms)", "p95(ms)", f"recall@{k}"):
+            table.add_column(column, justify="right")
+        mb = 1024 * 1024
+        for row in rows:
+            table.add_row(
+                row["variant"], f"{row['memory_bytes'] / mb:.2f}", f"{row['disk_bytes'] / mb:.2f}",
+                f"{row['mean_ms']:.3f}", f"{row['p95_ms']:.3f}", f"{row['recall']:.3f}",
+            )
+        console.print(table)
+
+    def show_context_stats(self):
+        """컨텍스트 구성 통계 (마지막 질의, 누적 절약 토큰) 표시"""
+        last = self.rag_handler.last_context_stats
+        if last is None:
+            console.print("[yellow]아직 질의가 없습니다.[/yellow]")
+            return
+        totals = self.rag_handler.context_totals
+        console.print(
+            f"[cyan]마지막 질의: 후보 {last['candidates']}개 → 청크 {last['selected_chunks']}개 "
+            f"(합침 {last['merged']}), {last['context_tokens']}토큰 "
+            f"(절약 {last['tokens_saved']}, 이전 방식 {last['baseline_tokens']})[/cyan]"
+        )
+        console.print(
+            f"[cyan]누적 {totals['queries']}회: 절약 {totals['tokens_saved']}토큰, "
+            f"질의당 평균 {totals['context_tokens'] / totals['queries']:.0f}토큰[/cyan]"
+        )
+
+    def run_batch(self, questions_path: Path, out_path: Path) -> Optional[dict]:
+        """JSONL 질문 파일 일괄 처리 (결과는 끝나는 순서대로 out_path 에 추가)"""
+        from rich.progress import Progress
+        from .batch import run_batch
+
+        if not self.get_loaded_pdfs():
+            console.print("[red]PDF를 먼저 로드해주세요 (--pdf 또는 --index).[/red]")
+            return None
+
+        with Progress(console=console) as progress:
+            task = progress.add_task("❓ 일괄 질의", total=None)
+            try:
+                stats = run_batch(
+                    self.rag_handler, questions_path, out_path, self.config,
+                    progress=lambda done, total: progress.update(task, completed=done, total=total),
+                )
+            except (ValueError, OSError) as e:
+                console.print(f"[red]일괄 질의 실패: {e}[/red]")
+                return None
+
+        if stats["skipped"]:
+            console.print(f"[dim]이미 답변된 {stats['skipped']}개 질문 건너뜀[/dim]")
+        processed = stats["answered"] + stats["failed"]
+        rate = processed / stats["elapsed"] if stats["elapsed"] else 0.0
+        console.print(
+            f"[green]✅ 답변 {stats['answered']}개, 실패 {stats['failed']}개 "
+            f"({stats['elapsed']:.1f}초, {rate:.2f} 질문/초) → {out_path}[/green]"
+        )
+        return stats
+
+    def show_stats(self):
+        """단계별 소요 시간 표 표시"""
+        from rich.table import Table
+
+        rows = metrics.snapshot()
+        if not rows:
+            state = "" if metrics.enabled else " (metrics_enabled 가 꺼져 있습니다)"
+            console.print(f"[yellow]측정된 단계가 없습니다.{state}[/yellow]")
+            return
+        table = Table(title="단계별 소요 시간")
+        table.add_column("단계", style="cyan")
+        for column in ("횟수", "평균(ms)", "p50(ms)", "p95(ms)", "최대(ms)"):
+            table.add_column(column, justify="right")
+        for row in rows:
+            table.add_row(
+                row["label"], str(row["count"]), f"{row['mean_ms']:.1f}",
+                f"{row['p50_ms']:.1f}", f"{row['p95_ms']:.1f}", f"{row['max_ms']:.1f}",
+            )
+        console.print(table)
+
+    def dump_metrics(self, path: Optional[Path] = None) -> str:
+        """Prometheus 텍스트 형식으로 출력하거나 파일에 저장"""
+        text = metrics.to_prometheus()
+        if path:
+            path.write_text(text, encoding='utf-8')
+            console.print(f"[green]📈 지표 저장: {path}[/green]")
+        else:
+            console.print(text, markup=False, highlight=False)
+        return text
+
     def clear_documents(self):
         """로드된 문서 초기화"""
         self.rag_handler.clear_vectorstore()
@@ -83,24 +458,50 @@ class RagGPT:
         """로드된 PDF 목록 반환"""
         return self.rag_handler.get_loaded_pdfs()
     
-    def query(self, prompt: str, session_name: Optional[str] = None) -> str:
-        """질문 처리"""
+    def query(self, prompt: str, session_name: Optional[str] = None,
+              chat_handler: Optional[ChatHandler] = None) -> str:
+        """질문 처리
+
+        chat_handler 를 지정하면 (웹 연결별 세션 등) 해당 대화 기록을 사용합니다.
+        """
+        chat_handler = chat_handler or self.chat_handler
         if session_name:
-            self.chat_handler.load_session(session_name)
+            chat_handler.load_session(session_name)
         
         response = self.rag_handler.query(
             prompt, 
-            chat_history=self.chat_handler.get_history()
+            chat_history=chat_handler.get_prompt_history(self.rag_handler.summarize_history)
         )
         
-        self.chat_handler.add_message("user", prompt)
-        self.chat_handler.add_message("assistant", response)
+        chat_handler.add_message("user", prompt)
+        chat_handler.add_message("assistant", response)
         
         if session_name:
-            self.chat_handler.save_session(session_name)
+            chat_handler.save_session(session_name)
         
         return response
     
+    def stream_query(self, prompt: str, session_name: Optional[str] = None,
+                     chat_handler: Optional[ChatHandler] = None) -> Iterator[str]:
+        """질문 처리 (스트리밍) - 토큰을 받는 즉시 반환하고, 끝나면 기록 저장"""
+        chat_handler = chat_handler or self.chat_handler
+        if session_name:
+            chat_handler.load_session(session_name)
+        
+        tokens = []
+        for token in self.rag_handler.stream_query(
+            prompt,
+            chat_history=chat_handler.get_prompt_history(self.rag_handler.summarize_history)
+        ):
+            tokens.append(token)
+            yield token
+        
+        chat_handler.add_message("user", prompt)
+        chat_handler.add_message("assistant", "".join(tokens))
+        
+        if session_name:
+            chat_handler.save_session(session_name)
+    
     def start_repl(self, session_name: Optional[str] = None):
         """대화형 REPL 모드"""
         console.print("[bold cyan]🤖 RAG-GPT REPL 모드[/bold cyan]")
@@ -122,10 +523,12 @@ class RagGPT:
                     self._handle_command(prompt[1:])
                     continue
                 
-                response = self.query(prompt, session_name)
-                
                 console.print("\n[bold green]AI:[/bold green]")
-                console.print(Markdown(response))
+                response = ""
+                with Live(Markdown(response), console=console, refresh_per_second=12) as live:
+                    for token in self.stream_query(prompt, session_name):
+                        response += token
+                        live.update(Markdown(response))
                 console.print("\n" + "-"*50 + "\n")
                 
             except (KeyboardInterrupt, EOFError):
@@ -155,12 +558,23 @@ class RagGPT:
         if cmd == "help":
             console.print("""
 [bold cyan]사용 가능한 명령어:[/bold cyan]
-  !pdf "파일명.pdf"                    - 단일 PDF 로드
-  !pdfs "파일1.pdf" "파일2.pdf"        - 여러 PDF 동시 로드
+  !pdf "파일명.pdf"                    - 단일 PDF 백그라운드 로드
+  !pdfs "파일1.pdf" "파일2.pdf"        - 여러 PDF 백그라운드 로드 (로드 중에도 질의 가능)
+  !jobs                                - 수집 작업 진행 상황 표시 (!jobs wait [ID]: 끝날 때까지 대기)
+  !watch                               - 감시 폴더(--watch)를 지금 검사해 변경된 파일 반영
   !list                                - 로드된 PDF 목록 표시
+  !unload "파일명.pdf"                 - 문서 하나만 제거
+  !reload "파일명.pdf"                 - 문서 하나만 다시 로드 (기존 청크 교체)
   !clear                               - 대화 기록 초기화
   !cleardocs                           - 로드된 문서 초기화
+  !saveindex <이름>                    - 현재 인덱스 저장
+  !openindex <이름>                    - 저장된 인덱스 열기 (현재 문서 교체)
   !model <이름>                        - 모델 변경
+  !memory                              - 청크 저장소 메모리 사용량 표시
+  !quant [k]                           - float32/int8/PQ 벡터 저장 방식의 메모리/지연/recall@k 비교
+  !context                             - 컨텍스트 토큰 수와 절약량 표시
+  !stats                               - 단계별 소요 시간 표시 (!stats prom [파일]: Prometheus 형식, !stats reset: 초기화)
+  !cache                               - 답변 캐시 적중률 표시 (!cache clear: 비우기)
   !help                                - 도움말 표시
 
 [yellow]참고: 파일명에 공백이 있으면 따옴표로 감싸세요[/yellow]
@@ -190,10 +604,10 @@ class RagGPT:
                 try:
                     files = shlex.split(args_str)
                     if files:
-                        self.load_pdf(Path(files[0]))
+                        self.start_ingest_job([Path(files[0])])
                 except ValueError as e:
                     # 따옴표 없이 시도
-                    self.load_pdf(Path(args_str.strip()))
+                    self.start_ingest_job([Path(args_str.strip())])
             else:
                 console.print("[red]사용법: !pdf \"파일명.pdf\"[/red]")
                 
@@ -204,13 +618,86 @@ class RagGPT:
                     files = shlex.split(args_str)
                     if files:
                         pdf_paths = [Path(f) for f in files]
-                        self.load_multiple_pdfs(pdf_paths)
+                        self.start_ingest_job(pdf_paths)
                 except ValueError as e:
                     console.print(f"[red]파일명 파싱 오류: {e}[/red]")
                     console.print("[yellow]파일명에 공백이 있으면 따옴표로 감싸세요[/yellow]")
             else:
                 console.print("[red]사용법: !pdfs \"파일1.pdf\" \"파일2.pdf\"[/red]")
                 
+        elif cmd == "jobs":
+            args = args_str.split()
+            if args and args[0].lower() == "wait":
+                self.wait_job(args[1] if len(args) > 1 else None)
+            else:
+                self.show_jobs()
+                
+        elif cmd == "watch":
+            if self.watcher is None:
+                console.print("[yellow]감시 중인 폴더가 없습니다. --watch <폴더> 로 시작하세요.[/yellow]")
+            else:
+                self._report_watch(self.watcher.sync(), always=True)
+                
+        elif cmd in ("unload", "reload"):
+            if args_str:
+                try:
+                    files = shlex.split(args_str)
+                except ValueError:
+                    files = [args_str.strip()]
+                if files:
+                    if cmd == "unload":
+                        self.unload_pdf(Path(files[0]).name)
+                    else:
+                        self.reload_pdf(Path(files[0]))
+            else:
+                console.print(f"[red]사용법: !{cmd} \"파일명.pdf\"[/red]")
+                
+        elif cmd in ("saveindex", "openindex"):
+            name = args_str.strip()
+            if not name:
+                console.print(f"[red]사용법: !{cmd} <이름>[/red]")
+            elif cmd == "saveindex":
+                self.save_index(name)
+            else:
+                self.open_index(name)
+                
+        elif cmd == "context":
+            self.show_context_stats()
+                
+        elif cmd == "stats":
+            args = args_str.split(maxsplit=1)
+            if args and args[0].lower() == "prom":
+                self.dump_metrics(Path(args[1]) if len(args) > 1 else None)
+            elif args and args[0].lower() == "reset":
+                metrics.reset()
+                console.print("[yellow]지표 초기화[/yellow]")
+            else:
+                self.show_stats()
+                
+        elif cmd == "memory":
+            self.show_memory()
+                
+        elif cmd == "quant":
+            k = args_str.strip()
+            if k and not k.isdigit():
+                console.print("[red]사용법: !quant [k][/red]")
+            else:
+                self.show_quantization_report(int(k) if k else 10)
+                
+        elif cmd == "cache":
+            if not self.answer_cache:
+                console.print("[yellow]답변 캐시가 꺼져 있습니다.[/yellow]")
+            elif args_str.strip().lower() == "clear":
+                self.answer_cache.clear()
+                console.print("[yellow]답변 캐시 초기화[/yellow]")
+            else:
+                stats = self.answer_cache.stats()
+                console.print(
+                    f"[cyan]답변 캐시: 적중 {stats['hits']} / 미스 {stats['misses']} "
+                    f"(적중률 {stats['hit_rate']:.1%}), "
+                    f"{stats['entries']}/{stats['max_entries']}개 저장됨[/cyan]"
+                )
+                
         elif cmd == "model":
             if args_str:
                 model_name = args_str.strip()
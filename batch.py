@@ -0,0 +1,167 @@
+"""
+일괄 질의 - JSONL 질문 파일을 문서 한 번 로드로 처리
+
+    rag-gpt --batch questions.jsonl --pdf document.pdf --out answers.jsonl
+
+입력 한 줄: {"id": "q1", "question": "..."}  (id 가 없으면 줄 번호 사용)
+출력 한 줄: {"id", "question", "answer", "sources", "latency_ms", "attempts"}
+           실패 시 {"id", "question", "error"}
+
+질문은 embed_batch_size 단위로 한 번에 임베딩/검색하고, LLM 호출은 batch_concurrency 개까지
+동시에 실행합니다. 결과는 끝나는 순서대로 출력 파일에 바로 추가되므로, 중단 후 다시 실행하면
+이미 답변이 있는 id 는 건너뜁니다.
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Set, Tuple
+
+# 재시도할 예외 (상태 코드가 없는 클라이언트 예외는 이름으로 판단)
+_RETRYABLE_NAMES = {
+    "RateLimitError", "APITimeoutError", "APIConnectionError",
+    "InternalServerError", "TimeoutError", "ConnectionError",
+}
+
+
+def read_questions(path: Path) -> List[Tuple[str, str]]:
+    """질문 파일 읽기 - (id, 질문) 목록"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: JSON 형식 오류 ({e})")
+            question = record.get("question") if isinstance(record, dict) else None
+            if not question:
+                raise ValueError(f"{path}:{line_no}: question 항목이 없습니다")
+            questions.append((str(record.get("id", line_no)), question))
+    return questions
+
+
+def completed_ids(path: Path) -> Set[str]:
+    """출력 파일에서 이미 답변된 id (오류 기록과 중단으로 잘린 마지막 줄은 제외)"""
+    done = set()
+    if not path.exists():
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "error" not in record and "id" in record:
+                done.add(str(record["id"]))
+    return done
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """요청 한도 초과(429), 서버 오류(5xx), 연결/시간 초과면 재시도"""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return type(exc).__name__ in _RETRYABLE_NAMES
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """응답의 Retry-After 헤더 (초)"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(func: Callable, max_retries: int = 5, backoff: float = 1.0,
+                    max_backoff: float = 60.0) -> Tuple[object, int]:
+    """재시도 가능한 오류면 지수 백오프(+지터) 후 다시 호출 - (결과, 시도 횟수) 반환"""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return func(), attempt
+        except Exception as e:
+            if attempt > max_retries or not _is_retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_backoff, backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            time.sleep(delay)
+
+
+def run_batch(handler, questions_path: Path, out_path: Path, config,
+              progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """질문 파일 일괄 처리 후 요약 통계 반환
+
+    progress(완료 수, 전체 수) 는 결과 한 건이 기록될 때마다 호출됩니다.
+    """
+    questions = read_questions(questions_path)
+    done = completed_ids(out_path)
+    pending, seen = [], set(done)
+    for question_id, question in questions:
+        if question_id not in seen:
+            seen.add(question_id)
+            pending.append((question_id, question))
+
+    stats = {"total": len(questions), "skipped": len(questions) - len(pending),
+             "answered": 0, "failed": 0}
+    if not pending:
+        stats["elapsed"] = 0.0
+        return stats
+
+    concurrency = max(1, config.get("batch_concurrency", 4))
+    max_retries = config.get("batch_max_retries", 5)
+    backoff = config.get("batch_backoff", 1.0)
+    window = max(1, config.get("embed_batch_size", 256))
+    # 준비된 질문이 LLM 호출을 기다리며 무한히 쌓이지 않도록 제한
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    write_lock = threading.Lock()
+    start_time = time.perf_counter()
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, 'a', encoding='utf-8') as out:
+
+        def work(question_id: str, prepared: dict):
+            start = time.perf_counter()
+            try:
+                answer, attempts = call_with_retry(
+                    lambda: handler.answer(prepared), max_retries=max_retries, backoff=backoff
+                )
+                record = {
+                    "id": question_id,
+                    "question": prepared["question"],
+                    "answer": answer,
+                    "sources": prepared["sources"],
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "attempts": attempts,
+                }
+            except Exception as e:
+                record = {"id": question_id, "question": prepared["question"], "error": str(e)}
+            try:
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    stats["failed" if "error" in record else "answered"] += 1
+                    if progress:
+                        progress(stats["answered"] + stats["failed"], len(pending))
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for offset in range(0, len(pending), window):
+                part = pending[offset:offset + window]
+                prepared_list = handler.prepare_many([question for _, question in part])
+                for (question_id, _), prepared in zip(part, prepared_list):
+                    slots.acquire()
+                    executor.submit(work, question_id, prepared)
+
+    stats["elapsed"] = time.perf_counter() - start_time
+    return stats
@@ -0,0 +1,8 @@
+"""
+오프라인 벤치마크 (python -m rag_gpt.bench)
+
+합성 말뭉치와 결정적 가짜 임베딩/LLM 으로 네트워크 없이 수집과 질의 성능을 측정합니다.
+"""
+from .runner import compare, run_benchmark
+
+__all__ = ["run_benchmark", "compare"]
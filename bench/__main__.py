@@ -0,0 +1,97 @@
+"""
+벤치마크 CLI
+
+    python -m rag_gpt.bench --docs 50 --out results.json
+    python -m rag_gpt.bench --compare results.json
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .runner import compare, flatten, run_benchmark
+
+# 결과 JSON 은 stdout 으로 내보낼 수 있도록 진행 상황은 stderr 에 출력
+console = Console(stderr=True)
+app = typer.Typer(help="RAG-GPT 오프라인 벤치마크", add_completion=False)
+
+
+@app.command()
+def main(
+    docs: int = typer.Option(20, "--docs", help="문서 수"),
+    pages: int = typer.Option(10, "--pages", help="문서당 페이지 수"),
+    words: int = typer.Option(400, "--words", help="페이지당 단어 수"),
+    corpus_format: str = typer.Option("pdf", "--format", help="말뭉치 형식 (pdf, text)"),
+    korean: bool = typer.Option(False, "--korean", help="텍스트 말뭉치에 한글 단어 포함"),
+    queries: int = typer.Option(200, "--queries", help="질의 수"),
+    concurrency: int = typer.Option(4, "--concurrency", help="동시 질의 스레드 수"),
+    chunk_size: Optional[int] = typer.Option(None, "--chunk-size", help="청크 크기"),
+    chunk_overlap: Optional[int] = typer.Option(None, "--chunk-overlap", help="청크 겹침"),
+    top_k: Optional[int] = typer.Option(None, "--top-k", help="검색 청크 수"),
+    index_type: Optional[str] = typer.Option(None, "--index-type", help="인덱스 종류"),
+    retrieval_mode: Optional[str] = typer.Option(None, "--retrieval-mode", help="hybrid 또는 dense"),
+    quantization: Optional[str] = typer.Option(None, "--quantization", help="벡터 저장 방식 (none, int8, pq)"),
+    rescore_k: Optional[int] = typer.Option(None, "--rescore-k", help="원본 벡터로 다시 정렬할 후보 수"),
+    workers: Optional[int] = typer.Option(None, "--workers", help="수집 프로세스 수 (0 = CPU 수)"),
+    embed_dim: int = typer.Option(384, "--embed-dim", help="가짜 임베딩 차원"),
+    embed_latency_ms: float = typer.Option(0.0, "--embed-latency-ms", help="텍스트당 임베딩 지연 (ms)"),
+    llm_first_token_ms: float = typer.Option(0.0, "--llm-first-token-ms", help="LLM 첫 토큰 지연 (ms)"),
+    llm_token_ms: float = typer.Option(0.0, "--llm-token-ms", help="LLM 토큰당 지연 (ms)"),
+    seed: int = typer.Option(0, "--seed", help="난수 시드"),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="결과 JSON 저장 경로 (없으면 stdout)"),
+    baseline: Optional[Path] = typer.Option(None, "--compare", help="비교할 이전 결과 JSON"),
+):
+    """합성 말뭉치로 수집/검색/질의 성능을 측정하고 JSON 으로 출력"""
+    if corpus_format not in ("pdf", "text"):
+        console.print(f"[red]알 수 없는 형식: {corpus_format}[/red]")
+        raise typer.Exit(1)
+
+    overrides = {
+        key: value for key, value in {
+            "chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "top_k": top_k,
+            "index_type": index_type, "retrieval_mode": retrieval_mode, "ingest_workers": workers,
+            "vector_quantization": quantization, "rescore_k": rescore_k,
+        }.items() if value is not None
+    }
+    results = run_benchmark(
+        n_docs=docs, pages_per_doc=pages, words_per_page=words, corpus_format=corpus_format,
+        korean=korean, n_queries=queries, concurrency=concurrency, embed_dim=embed_dim,
+        embed_latency_ms=embed_latency_ms, llm_first_token_ms=llm_first_token_ms,
+        llm_token_ms=llm_token_ms, seed=seed, overrides=overrides,
+        progress=lambda stage: console.print(f"[dim]⏱️ {stage}...[/dim]"),
+    )
+
+    table = Table(title="벤치마크 결과")
+    table.add_column("항목", style="cyan")
+    table.add_column("값", style="yellow", justify="right")
+    for name, value in flatten(results).items():
+        table.add_row(name, f"{value:.3f}" if isinstance(value, float) else str(value))
+    console.print(table)
+
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        diff = Table(title=f"비교: {previous.get('meta', {}).get('commit')} → {results['meta']['commit']}")
+        diff.add_column("항목", style="cyan")
+        diff.add_column("이전", justify="right")
+        diff.add_column("현재", justify="right")
+        diff.add_column("변화", justify="right")
+        for name, old, new, change in compare(previous, results):
+            color = "white" if abs(change) < 0.05 else "magenta"
+            diff.add_row(name, f"{old:.3f}", f"{new:.3f}", f"[{color}]{change:+.1%}[/{color}]")
+        console.print(diff)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if out:
+        out.write_text(text, encoding='utf-8')
+        console.print(f"[green]결과 저장: {out}[/green]")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,109 @@
+"""
+합성 말뭉치 생성 (PDF 또는 텍스트)
+
+페이지마다 고유한 "사실" 문장(코드 값)을 심어 두고, 그 사실을 묻는 질문을 함께 만들어
+검색 결과에 정답 페이지가 포함되는지 확인할 수 있게 합니다.
+"""
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+_WORDS = (
+    "gene sequencing protein cell assay variant panel tumor sample read depth coverage "
+    "expression pathway mutation receptor kinase antibody plasma clinical cohort "
+    "analysis result method dataset model signal marker therapy response"
+).split()
+
+# PDF 는 기본 글꼴(Latin-1) 만 쓰므로 한글 단어는 텍스트 말뭉치에만 사용
+_KOREAN_WORDS = "유전자 검사 결과 변이 분석 보고서 환자 표본 단백질 세포 발현 치료".split()
+
+
+def _fact(doc: int, page: int) -> Tuple[str, str]:
+    """(페이지에 넣을 문장, 그 문장을 묻는 질문)"""
+    code = f"{doc:03d}{page:03d}"
+    return (f"The reference code for study d{doc}p{page} is RC{code}.",
+            f"What is the reference code for study d{doc}p{page}?")
+
+
+def generate_pages(n_docs: int, pages_per_doc: int, words_per_page: int,
+                   korean: bool = False, seed: int = 0) -> List[List[str]]:
+    """문서별 페이지 텍스트 목록"""
+    rng = random.Random(seed)
+    vocabulary = _WORDS + (_KOREAN_WORDS if korean else [])
+    corpus = []
+    for doc in range(n_docs):
+        pages = []
+        for page in range(pages_per_doc):
+            words = [rng.choice(vocabulary) for _ in range(words_per_page)]
+            # 사실 문장은 페이지 중간에 삽입
+            words.insert(len(words) // 2, _fact(doc, page)[0])
+            pages.append(" ".join(words))
+        corpus.append(pages)
+    return corpus
+
+
+def generate_questions(n_docs: int, pages_per_doc: int, n_questions: int,
+                       seed: int = 0) -> List[Tuple[str, Tuple[int, int]]]:
+    """(질문, 정답 (문서 번호, 페이지 번호)) 목록"""
+    rng = random.Random(seed + 1)
+    questions = []
+    for _ in range(n_questions):
+        doc, page = rng.randrange(n_docs), rng.randrange(pages_per_doc)
+        questions.append((_fact(doc, page)[1], (doc, page)))
+    return questions
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: List[str], line_chars: int = 90):
+    """외부 라이브러리 없이 텍스트 페이지로 이루어진 최소 PDF 작성"""
+    objects: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>", b"",
+                            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_text in pages:
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_id} 0 R")
+        lines, line = [], ""
+        for word in page_text.split():
+            if line and len(line) + len(word) + 1 > line_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+        stream = "BT /F1 9 Tf 36 806 Td 11 TL " + " ".join(
+            f"({_escape(text)}) '" for text in lines
+        ) + " ET"
+        data = stream.encode("latin-1", errors="replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+
+
+def write_pdfs(directory: Path, corpus: List[List[str]]) -> List[Path]:
+    """말뭉치를 doc_<번호>.pdf 파일들로 저장"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for doc, pages in enumerate(corpus):
+        path = directory / f"doc_{doc:04d}.pdf"
+        write_pdf(path, pages)
+        paths.append(path)
+    return paths
@@ -0,0 +1,82 @@
+"""
+네트워크 없이 벤치마크를 돌리기 위한 가짜 임베딩 모델과 LLM
+"""
+import hashlib
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashEmbeddings(Embeddings):
+    """결정적 해시 임베딩
+
+    단어를 해시해 고정 차원에 부호와 함께 더한 뒤 정규화합니다.
+    같은 텍스트는 항상 같은 벡터가 되고, 단어가 겹치는 텍스트끼리는 가까워지므로
+    검색 정확도도 의미 있게 측정할 수 있습니다. latency_ms 로 모델 추론 시간을 흉내냅니다.
+    """
+
+    def __init__(self, dim: int = 384, latency_ms: float = 0.0):
+        self.dim = dim
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD_RE.findall(text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if (digest >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms * len(texts) / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._embed(text)
+
+
+class StubChatModel(BaseChatModel):
+    """ChatGroq 대신 사용하는 고정 응답 LLM
+
+    첫 토큰까지 first_token_ms, 이후 토큰마다 token_ms 를 기다려 API 호출 지연을 흉내냅니다.
+    """
+
+    answer_tokens: int = 40
+    first_token_ms: float = 0.0
+    token_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "rag-gpt-bench-stub"
+
+    def _tokens(self, messages: List) -> List[str]:
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        words = [f"w{i}" for i in range(self.answer_tokens - 1)]
+        return [f"stub({prompt_chars})"] + [f" {word}" for word in words]
+
+    def _generate(self, messages: List, stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep((self.first_token_ms + self.token_ms * len(tokens)) / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List, stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_ms / 1000)
+        for token in self._tokens(messages):
+            if self.token_ms:
+                time.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
@@ -0,0 +1,264 @@
+"""
+벤치마크 실행 - 단계별 수집/검색/질의 성능 측정
+"""
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..config import DEFAULT_CONFIG
+from ..handlers.rag_handler import RAGHandler
+from ..sparse_index import term_counts
+from .corpus import generate_pages, generate_questions, write_pdfs
+from .fakes import HashEmbeddings, StubChatModel
+
+
+class BenchConfig:
+    """벤치마크용 설정 (~/.rag_gpt/config.json 을 읽거나 쓰지 않음)"""
+
+    def __init__(self, overrides: Optional[dict] = None):
+        self.data = {**DEFAULT_CONFIG, **(overrides or {})}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        self.data[key] = value
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """지연 시간(초) 목록의 평균/백분위수 (ms)"""
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def _timed(func: Callable):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _new_handler(config: BenchConfig, embedding: HashEmbeddings, llm: StubChatModel) -> RAGHandler:
+    """캐시 없이 가짜 모델을 사용하는 핸들러"""
+    handler = RAGHandler(config)
+    handler.embedding = embedding
+    handler.llm = llm
+    return handler
+
+
+def _is_hit(docs: List, expected: tuple, text_format: bool) -> bool:
+    doc_index, page = expected
+    source = f"doc_{doc_index:04d}" + ("" if text_format else ".pdf")
+    return any(d.metadata.get("source_file") == source and d.metadata.get("page") == page
+               for d in docs)
+
+
+def run_benchmark(n_docs: int = 20, pages_per_doc: int = 10, words_per_page: int = 400,
+                  corpus_format: str = "pdf", korean: bool = False, n_queries: int = 200,
+                  concurrency: int = 4, embed_dim: int = 384, embed_latency_ms: float = 0.0,
+                  llm_first_token_ms: float = 0.0, llm_token_ms: float = 0.0,
+                  seed: int = 0, overrides: Optional[dict] = None,
+                  progress: Optional[Callable[[str], None]] = None) -> dict:
+    """벤치마크 실행 후 결과 dict 반환
+
+    수집 단계(parse/split/embed/index)는 각각 따로 측정하고, PDF 말뭉치는
+    process_multiple_pdfs 로 병렬 수집 전체 시간도 측정합니다.
+    검색은 _retrieve, 질의는 RAGHandler.query 의 지연 시간과 동시 처리량을 측정합니다.
+    """
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    progress = progress or (lambda message: None)
+    text_format = corpus_format == "text"
+    config = BenchConfig({"answer_cache": False, **(overrides or {})})
+    embedding = HashEmbeddings(dim=embed_dim, latency_ms=embed_latency_ms)
+    llm = StubChatModel(first_token_ms=llm_first_token_ms, token_ms=llm_token_ms)
+
+    corpus = generate_pages(n_docs, pages_per_doc, words_per_page, korean=korean, seed=seed)
+    questions = generate_questions(n_docs, pages_per_doc, n_queries, seed=seed)
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "docs": n_docs, "pages_per_doc": pages_per_doc, "words_per_page": words_per_page,
+                "format": corpus_format, "korean": korean, "queries": n_queries,
+                "concurrency": concurrency, "embed_dim": embed_dim,
+                "embed_latency_ms": embed_latency_ms, "llm_first_token_ms": llm_first_token_ms,
+                "llm_token_ms": llm_token_ms, "seed": seed,
+                "config": {key: config.get(key) for key in (
+                    "chunk_size", "chunk_overlap", "top_k", "retrieval_mode", "index_type",
+                    "embed_batch_size", "ingest_workers", "context_token_budget",
+                    "vector_quantization", "rescore_k",
+                )},
+            },
+        },
+    }
+
+    with tempfile.TemporaryDirectory(prefix="rag_gpt_bench_") as tmp_dir:
+        stages: Dict[str, Any] = {}
+
+        # 1. 파싱
+        if text_format:
+            pages = [
+                Document(page_content=text, metadata={"source_file": f"doc_{doc:04d}", "page": page})
+                for doc, doc_pages in enumerate(corpus) for page, text in enumerate(doc_pages)
+            ]
+        else:
+            progress("PDF 생성")
+            pdf_paths = write_pdfs(Path(tmp_dir) / "pdfs", corpus)
+            progress("파싱")
+            from ..pdf_pages import iter_pages
+
+            def parse():
+                parsed = []
+                for path in pdf_paths:
+                    docs = list(iter_pages(path))
+                    for doc in docs:
+                        doc.metadata["source_file"] = path.name
+                    parsed.extend(docs)
+                return parsed
+
+            pages, elapsed = _timed(parse)
+            stages["parse"] = {"seconds": elapsed, "pages": len(pages),
+                               "pages_per_sec": len(pages) / elapsed}
+
+        # 2. 분할
+        progress("분할")
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=config.get("chunk_size", 500),
+            chunk_overlap=config.get("chunk_overlap", 50),
+            add_start_index=True,
+        )
+        chunks, elapsed = _timed(lambda: splitter.split_documents(pages))
+        stages["split"] = {"seconds": elapsed, "chunks": len(chunks),
+                           "chunks_per_sec": len(chunks) / elapsed}
+
+        # 3. 임베딩
+        progress("임베딩")
+        handler = _new_handler(config, embedding, llm)
+        texts = [chunk.page_content for chunk in chunks]
+        vectors, elapsed = _timed(lambda: handler._embed_texts(texts))
+        stages["embed"] = {"seconds": elapsed, "chunks_per_sec": len(texts) / elapsed}
+
+        # 4. 인덱스 구축 (벡터 + BM25)
+        progress("인덱스 구축")
+        ids = [str(uuid.uuid4()) for _ in texts]
+
+        def build():
+            handler._add_embeddings(texts, vectors, [chunk.metadata for chunk in chunks], ids)
+            handler.sparse_index.add(ids, [term_counts(text) for text in texts])
+
+        _, elapsed = _timed(build)
+        for chunk_id, chunk in zip(ids, chunks):
+            handler.doc_ids.setdefault(chunk.metadata["source_file"], []).append(chunk_id)
+        handler.loaded_pdfs = list(handler.doc_ids)
+        from .. import vector_index
+        stages["index"] = {"seconds": elapsed, "chunks_per_sec": len(texts) / elapsed,
+                           "index_type": vector_index.index_type_of(handler.vectorstore.index),
+                           "vector_bytes": vector_index.vector_bytes(handler.vectorstore.index)}
+
+        # 5. 전체 수집 경로 (병렬 파싱 + 단일 배치 임베딩 + 단일 인덱스 추가)
+        if not text_format:
+            progress("전체 수집")
+            ingest_handler = _new_handler(config, embedding, llm)
+            ingest, elapsed = _timed(lambda: ingest_handler.process_multiple_pdfs(pdf_paths))
+            stages["ingest_end_to_end"] = {
+                "seconds": elapsed, "chunks": ingest["total_chunks"],
+                "chunks_per_sec": ingest["total_chunks"] / elapsed,
+                "failed": len(ingest["failed"]),
+            }
+        results["ingest"] = stages
+
+        # 6. 검색 지연 시간과 정답 페이지 포함률
+        progress("검색")
+        top_k = config.get("top_k", 3)
+        latencies, hits = [], 0
+        for question, expected in questions:
+            (docs, _), elapsed = _timed(lambda: handler._retrieve(question, top_k))
+            latencies.append(elapsed)
+            hits += _is_hit(docs, expected, text_format)
+        results["retrieval"] = {**latency_summary(latencies),
+                                f"hit_rate_at_{top_k}": hits / len(questions) if questions else 0.0}
+
+        # 7. 전체 질의 (컨텍스트 구성 + 프롬프트 + LLM) 순차 지연 시간과 동시 처리량
+        progress("질의")
+        latencies = []
+        for question, _ in questions:
+            _, elapsed = _timed(lambda: handler.query(question))
+            latencies.append(elapsed)
+        query_results = {"sequential": latency_summary(latencies)}
+
+        def timed_query(question):
+            return _timed(lambda: handler.query(question))[1]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            concurrent_latencies, elapsed = _timed(
+                lambda: list(pool.map(timed_query, [question for question, _ in questions]))
+            )
+        query_results["concurrent"] = {
+            **latency_summary(concurrent_latencies),
+            "concurrency": concurrency,
+            "queries_per_sec": len(questions) / elapsed if elapsed else 0.0,
+        }
+        query_results["context_tokens_per_query"] = (
+            handler.context_totals["context_tokens"] / max(1, handler.context_totals["queries"])
+        )
+        results["query"] = query_results
+
+    return results
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """중첩 결과를 "ingest.embed.seconds" 형태의 숫자 항목으로 펼침 (meta 제외)"""
+    flat = {}
+    for key, value in results.items():
+        if not prefix and key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> List[tuple]:
+    """두 결과의 공통 숫자 항목 비교 - (항목, 이전 값, 현재 값, 변화율) 목록"""
+    old, new = flatten(baseline), flatten(current)
+    rows = []
+    for name in sorted(old.keys() & new.keys()):
+        change = (new[name] - old[name]) / old[name] if old[name] else 0.0
+        rows.append((name, old[name], new[name], change))
+    return rows
@@ -2,44 +2,404 @@
 벡터스토어 캐시 관리
 """
 from pathlib import Path
-import pickle
 import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 class VectorCache:
-    """벡터스토어 캐시"""
-    
+    """벡터스토어 캐시 (파일 내용 + 청킹/임베딩 파라미터 기반 키)"""
+
     def __init__(self):
         self.cache_dir = Path.home() / ".rag_gpt" / "vectors"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-    
-    def _get_cache_path(self, pdf_path: Path) -> Path:
-        """캐시 파일 경로 생성"""
-        # PDF 파일의 해시값으로 고유 이름 생성
-        hash_obj = hashlib.md5(str(pdf_path).encode())
-        cache_name = f"{pdf_path.stem}_{hash_obj.hexdigest()[:8]}.pkl"
-        return self.cache_dir / cache_name
-    
-    def exists(self, pdf_path: Path) -> bool:
-        """캐시 존재 여부 확인"""
-        return self._get_cache_path(pdf_path).exists()
-    
-    def save(self, pdf_path: Path, vectorstore):
-        """벡터스토어 저장"""
-        cache_path = self._get_cache_path(pdf_path)
-        vectorstore.save_local(str(cache_path))
-    
-    def load(self, pdf_path: Path):
-        """벡터스토어 로드"""
+
+    @staticmethod
+    def file_digest(pdf_path: Path) -> str:
+        """PDF 파일 내용의 SHA-256 해시"""
+        hash_obj = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                hash_obj.update(block)
+        return hash_obj.hexdigest()
+
+    def make_key(self, pdf_path: Path, chunk_size: int, chunk_overlap: int,
+                 model_name: str, digest: Optional[str] = None) -> str:
+        """캐시 키 생성
+
+        경로가 아닌 파일 내용으로 키를 만들기 때문에 Gradio 임시 업로드나
+        같은 경로에서 수정된 파일도 올바르게 구분됩니다.
+        이미 계산한 file_digest 를 digest 로 주면 파일을 다시 읽지 않습니다.
+        """
+        raw = f"{digest or self.file_digest(pdf_path)}|{chunk_size}|{chunk_overlap}|{model_name}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _get_cache_path(self, key: str) -> Path:
+        """캐시 디렉토리 경로 생성"""
+        return self.cache_dir / key
+
+    def exists(self, key: str) -> bool:
+        """캐시 존재 여부 확인 (이전 pickle 형식 캐시는 무시하고 다시 생성)"""
+        from . import store
+        return store.exists(self._get_cache_path(key))
+
+    def save(self, key: str, vectorstore):
+        """벡터스토어 저장 (pickle 없는 네이티브 형식, 임시 디렉토리에 쓴 뒤 교체)"""
+        from . import store
+        store.save_store(self._get_cache_path(key), vectorstore)
+
+    def load(self, key: str, embedding=None):
+        """벡터스토어를 메모리 맵으로 열기 (embedding 을 생략하면 공유 레지스트리의 기본 모델 사용)"""
+        from . import store
+        from .embeddings import get_embedding
+
+        embedding = embedding or get_embedding()
+        return store.open_store(self._get_cache_path(key), embedding)
+
+    def save_embeddings(self, key: str, texts: List[str], vectors: List,
+                        metadatas: List[dict], embedding):
+        """청크 텍스트/벡터/메타데이터를 벡터스토어 형식으로 저장"""
         from langchain_community.vectorstores import FAISS
-        from langchain_huggingface import HuggingFaceEmbeddings
-        
-        cache_path = self._get_cache_path(pdf_path)
-        embedding = HuggingFaceEmbeddings(
-            model_name="intfloat/multilingual-e5-small"
+
+        vectorstore = FAISS.from_embeddings(
+            list(zip(texts, vectors)), embedding, metadatas=metadatas
         )
-        return FAISS.load_local(
-            str(cache_path), 
-            embedding,
-            allow_dangerous_deserialization=True
+        self.save(key, vectorstore)
+
+    def load_embeddings(self, key: str, embedding) -> Tuple[List[str], List, List[dict]]:
+        """저장된 청크 텍스트/벡터/메타데이터 반환 (인덱스 순서)"""
+        vectorstore = self.load(key, embedding)
+        vectors = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+        chunks = list(vectorstore.docstore.iter_chunks())
+        return ([text for _, text, _ in chunks], vectors,
+                [metadata for _, _, metadata in chunks])
+
+    def save_sparse(self, key: str, counts: List[Dict[str, int]]):
+        """청크별 BM25 토큰 빈도를 벡터 옆에 저장 (청크 순서와 동일)"""
+        cache_path = self._get_cache_path(key)
+        if not cache_path.exists():
+            return
+        with open(cache_path / "sparse.json", 'w', encoding='utf-8') as f:
+            json.dump(counts, f, ensure_ascii=False)
+
+    def load_sparse(self, key: str) -> Optional[List[Dict[str, int]]]:
+        """저장된 청크별 토큰 빈도 (없으면 None)"""
+        sparse_file = self._get_cache_path(key) / "sparse.json"
+        if not sparse_file.exists():
+            return None
+        try:
+            with open(sparse_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class EmbeddingCache:
+    """청크 단위 임베딩 캐시
+
+    (모델, 청크 텍스트) 해시를 키로 float32 벡터를 메모리 맵 파일에 저장합니다.
+    index.json 에 키별 슬롯 위치와 최근 사용 시점을 기록하고,
+    max_entries 를 넘으면 가장 오래 사용되지 않은 항목부터 슬롯을 재사용합니다.
+    index.json 은 put_many 마다가 아니라 flush() 때 한 번 씁니다 (수집 한 번에 한 번).
+    """
+
+    def __init__(self, max_entries: int = 200000, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or Path.home() / ".rag_gpt" / "embeddings"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "index.json"
+        self.vectors_file = self.cache_dir / "vectors.f32"
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._dirty = False
+        self._load_index()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """(모델, 텍스트) 해시 키"""
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+    def _load_index(self):
+        """슬롯 인덱스 로드"""
+        self.dim = None
+        self.capacity = 0
+        self.clock = 0
+        self.entries: Dict[str, List[int]] = {}
+        self.free_slots: List[int] = []
+
+        if not self.index_file.exists() or not self.vectors_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        self.dim = data["dim"]
+        self.capacity = data["capacity"]
+        self.clock = data["clock"]
+        self.entries = data["entries"]
+        used = {slot for slot, _ in self.entries.values()}
+        self.free_slots = [slot for slot in range(self.capacity) if slot not in used]
+        self._open_vectors()
+
+    def _open_vectors(self):
+        """벡터 파일을 메모리 맵으로 열기"""
+        import numpy as np
+
+        self._vectors = np.memmap(
+            self.vectors_file, dtype=np.float32, mode="r+",
+            shape=(self.capacity, self.dim)
+        )
+
+    def _grow(self, needed: int, protected: set):
+        """빈 슬롯이 부족하면 파일 확장 (최대 max_entries), 그래도 부족하면 LRU 제거"""
+        shortage = needed - len(self.free_slots)
+        if shortage <= 0:
+            return
+
+        new_capacity = min(self.max_entries, max(self.capacity * 2, self.capacity + shortage, 1024))
+        if new_capacity > self.capacity:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            with open(self.vectors_file, 'ab') as f:
+                f.truncate(new_capacity * self.dim * 4)
+            self.free_slots.extend(range(self.capacity, new_capacity))
+            self.capacity = new_capacity
+            self._open_vectors()
+
+        shortage = needed - len(self.free_slots)
+        if shortage > 0:
+            candidates = [item for item in self.entries.items() if item[0] not in protected]
+            victims = sorted(candidates, key=lambda item: item[1][1])[:shortage]
+            for key, (slot, _) in victims:
+                del self.entries[key]
+                self.free_slots.append(slot)
+            # 디스크의 인덱스가 재사용할 슬롯을 가리키지 않도록 덮어쓰기 전에 기록
+            self._write_index()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List:
+        """캐시된 벡터 목록 반환 (미스는 None)"""
+        with self._lock:
+            results = []
+            for text in texts:
+                entry = self.entries.get(self.make_key(model_name, text))
+                if entry is None or self._vectors is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self.clock += 1
+                entry[1] = self.clock
+                results.append(self._vectors[entry[0]].tolist())
+            return results
+
+    def put_many(self, model_name: str, texts: List[str], vectors: List):
+        """벡터 저장 (인덱스 기록은 flush 때)"""
+        import numpy as np
+
+        if not texts:
+            return
+        with self._lock:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            if matrix.shape[1] != self.dim:
+                return
+
+            # 한 번에 담을 수 있는 최대 개수를 넘는 앞부분은 저장하지 않음
+            texts = texts[-self.max_entries:]
+            matrix = matrix[-self.max_entries:]
+            keys = [self.make_key(model_name, text) for text in texts]
+            new_count = len({key for key in keys if key not in self.entries})
+            self._grow(new_count, set(keys))
+
+            for key, vector in zip(keys, matrix):
+                self.clock += 1
+                entry = self.entries.get(key)
+                if entry is None:
+                    entry = [self.free_slots.pop(), 0]
+                    self.entries[key] = entry
+                entry[1] = self.clock
+                self._vectors[entry[0]] = vector
+            self._dirty = True
+
+    def flush(self):
+        """put_many 이후 바뀐 내용이 있으면 벡터 파일 동기화 및 인덱스 저장"""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def _write_index(self):
+        """벡터 파일 동기화 및 인덱스 원자적 저장"""
+        if self._vectors is not None:
+            self._vectors.flush()
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "dim": self.dim,
+                "capacity": self.capacity,
+                "clock": self.clock,
+                "entries": self.entries,
+            }, f)
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def stats(self) -> dict:
+        """적중/미스 카운터 및 크기"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+        }
+
+
+class AnswerCache:
+    """질문 의미 기반 답변 캐시
+
+    검색된 청크 id 집합, 모델, temperature, 답변 언어, 대화 기록 해시가 모두 같고
+    정규화된 질문 임베딩의 코사인 유사도가 threshold 이상이면 적중으로 봅니다.
+    TTL 이 지난 항목은 버리고, max_entries 를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 86400, max_entries: int = 1000,
+                 persist: bool = False, cache_file: Optional[Path] = None):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.persist = persist
+        self.cache_file = cache_file or Path.home() / ".rag_gpt" / "answers.json"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 항목 id -> {"context_key", "vector", "answer", "question", "created"} (LRU 순서)
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        if self.persist:
+            self._load()
+
+    @staticmethod
+    def make_context_key(chunk_ids: List[str], model: str, temperature: float,
+                         answer_language: str, chat_history: List) -> str:
+        """질문 임베딩 외의 정확히 일치해야 하는 조건들의 해시"""
+        history_digest = hashlib.sha256(json.dumps(
+            [[type(msg).__name__, msg.content] for msg in chat_history],
+            ensure_ascii=False
+        ).encode("utf-8")).hexdigest()
+        raw = json.dumps(
+            [sorted(chunk_ids), model, temperature, answer_language, history_digest],
+            ensure_ascii=False
         )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(vector):
+        import numpy as np
+
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return self.ttl > 0 and now - entry["created"] > self.ttl
+
+    def lookup(self, question_vector, context_key: str) -> Optional[str]:
+        """캐시된 답변 반환 (없으면 None)"""
+        import numpy as np
+
+        query = self._normalize(question_vector)
+        now = time.time()
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, entry in list(self.entries.items()):
+                if self._expired(entry, now):
+                    del self.entries[entry_id]
+                    continue
+                if entry["context_key"] != context_key:
+                    continue
+                score = float(np.dot(query, entry["vector"]))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(best_id)
+            return self.entries[best_id]["answer"]
+
+    def put(self, question_vector, context_key: str, answer: str, question: str = ""):
+        """답변 저장"""
+        with self._lock:
+            entry_id = hashlib.sha256(f"{context_key}\0{question}".encode("utf-8")).hexdigest()
+            self.entries[entry_id] = {
+                "context_key": context_key,
+                "vector": self._normalize(question_vector),
+                "answer": answer,
+                "question": question,
+                "created": time.time(),
+            }
+            self.entries.move_to_end(entry_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.persist:
+                self._save()
+
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self.persist:
+                self._save()
+
+    def _load(self):
+        """디스크에서 캐시 로드"""
+        import numpy as np
+
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for entry_id, entry in data.get("entries", []):
+            entry["vector"] = np.asarray(entry["vector"], dtype=np.float32)
+            if not self._expired(entry, now):
+                self.entries[entry_id] = entry
+
+    def _save(self):
+        """디스크에 캐시 저장 (임시 파일에 쓴 뒤 교체)"""
+        data = {
+            "entries": [
+                [entry_id, dict(entry, vector=entry["vector"].tolist())]
+                for entry_id, entry in self.entries.items()
+            ]
+        }
+        tmp_file = self.cache_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
 
+    def stats(self) -> dict:
+        """적중률 통계"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,226 @@
+"""
+열 기반(columnar) 청크 저장소
+
+청크마다 Document 객체와 메타데이터 dict 를 두는 대신, 텍스트는 하나의 UTF-8 바이트
+버퍼에 이어 붙이고 위치/길이 배열로 찾습니다. 청크마다 다른 page, start_index 는 정수 배열에 두고,
+source_file 과 나머지 메타데이터는 중복이 많으므로 번호로 intern 합니다.
+Document 는 검색 결과로 반환할 때만 만듭니다.
+"""
+import json
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+# 삭제된 행 표시 (source 번호)
+_DELETED = 0xFFFFFFFF
+# 이 비율 이상이 삭제된 행이면 버퍼를 압축
+_COMPACT_RATIO = 0.5
+
+
+def _column_value(value) -> int:
+    """정수 열에 저장할 값 (0 이상의 int 가 아니면 -1 로 두고 나머지 메타데이터에 보관)"""
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 2 ** 31:
+        return value
+    return -1
+
+
+class _Interner:
+    """문자열 <-> 번호 변환표"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = len(self.values)
+            self.values.append(value)
+            self.ids[value] = index
+        return index
+
+    def nbytes(self) -> int:
+        return (sum(sys.getsizeof(value) for value in self.values)
+                + sys.getsizeof(self.values) + sys.getsizeof(self.ids))
+
+
+class ChunkStore(Docstore, AddableMixin):
+    """FAISS 래퍼에서 InMemoryDocstore 대신 사용하는 청크 저장소
+
+    행마다 텍스트 위치/길이, source_file 번호, 페이지, 페이지 내 시작 위치, 나머지 메타데이터 번호를
+    배열에 저장합니다.
+    """
+
+    def __init__(self):
+        self._text = bytearray()
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._sources = array("I")
+        self._pages = array("i")
+        self._starts = array("i")
+        self._metas = array("I")
+        self._source_names = _Interner()
+        # 열로 저장하는 키를 제외한 메타데이터 (JSON 문자열로 intern)
+        self._meta_values = _Interner()
+        self._meta_cache: Dict[int, dict] = {}
+        self._chunk_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._rows
+
+    def _append(self, chunk_id: str, text: str, metadata: dict):
+        encoded = text.encode("utf-8")
+        page = _column_value(metadata.get("page"))
+        start = _column_value(metadata.get("start_index"))
+        # 열에 저장한 값은 intern 할 JSON 에서 제외 (청크마다 달라 중복 제거가 안 되므로)
+        columns = {"page": page, "start_index": start}
+        rest = {key: value for key, value in metadata.items()
+                if key != "source_file" and columns.get(key, -1) < 0}
+
+        self._offsets.append(len(self._text))
+        self._lengths.append(len(encoded))
+        self._text.extend(encoded)
+        self._sources.append(self._source_names.intern(metadata.get("source_file", "Unknown")))
+        self._pages.append(page)
+        self._starts.append(start)
+        self._metas.append(self._meta_values.intern(
+            json.dumps(rest, ensure_ascii=False, sort_keys=True)
+        ))
+        self._rows[chunk_id] = len(self._chunk_ids)
+        self._chunk_ids.append(chunk_id)
+
+    def add(self, texts: Dict[str, object]):
+        """청크 추가 (langchain Document 를 받아 열 배열로 변환)"""
+        for chunk_id, doc in texts.items():
+            if chunk_id in self._rows:
+                raise ValueError(f"Tried to add ids that already exist: {chunk_id}")
+            self._append(chunk_id, doc.page_content, doc.metadata)
+
+    def delete(self, ids: List[str]):
+        """청크 삭제 (행은 표시만 하고 일정 비율이 넘으면 압축)"""
+        for chunk_id in ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is None:
+                raise ValueError(f"ID {chunk_id} not found.")
+            self._sources[row] = _DELETED
+            self._chunk_ids[row] = None
+            self._deleted += 1
+        if self._deleted > _COMPACT_RATIO * len(self._chunk_ids):
+            self._compact()
+
+    def _compact(self):
+        """삭제된 행과 텍스트를 제거하고 배열을 다시 구성"""
+        rows = [(chunk_id, self._text_at(row), self._metadata_at(row))
+                for chunk_id, row in sorted(self._rows.items(), key=lambda item: item[1])]
+        self.__init__()
+        for chunk_id, text, metadata in rows:
+            self._append(chunk_id, text, metadata)
+
+    def _text_at(self, row: int) -> str:
+        start = self._offsets[row]
+        return self._text[start:start + self._lengths[row]].decode("utf-8")
+
+    def _metadata_at(self, row: int) -> dict:
+        # 같은 번호의 메타데이터는 한 번만 파싱하고 값 객체를 공유
+        meta_id = self._metas[row]
+        shared = self._meta_cache.get(meta_id)
+        if shared is None:
+            shared = self._meta_cache[meta_id] = json.loads(self._meta_values.values[meta_id])
+        metadata = dict(shared)
+        metadata["source_file"] = self._source_names.values[self._sources[row]]
+        if self._pages[row] >= 0:
+            metadata["page"] = self._pages[row]
+        if self._starts[row] >= 0:
+            metadata["start_index"] = self._starts[row]
+        return metadata
+
+    def search(self, search: str) -> Union[str, object]:
+        """청크 id 로 Document 생성 (없으면 안내 문자열, InMemoryDocstore 와 동일)"""
+        from langchain_core.documents import Document
+
+        row = self._rows.get(search)
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=self._text_at(row),
+                        metadata=self._metadata_at(row))
+
+    def source_of(self, chunk_id: str) -> Optional[str]:
+        """청크의 source_file (Document 를 만들지 않음)"""
+        row = self._rows.get(chunk_id)
+        return None if row is None else self._source_names.values[self._sources[row]]
+
+    def ids_by_source(self) -> Dict[str, List[str]]:
+        """source_file 별 청크 id (추가 순서)"""
+        result: Dict[str, List[str]] = {}
+        for row, chunk_id in enumerate(self._chunk_ids):
+            if chunk_id is not None:
+                result.setdefault(self._source_names.values[self._sources[row]], []).append(chunk_id)
+        return result
+
+    def iter_chunks(self) -> Iterable[Tuple[str, str, dict]]:
+        """(id, text, metadata) 를 추가 순서대로 반환"""
+        for row, chunk_id in enumerate(self._chunk_ids):
+            if chunk_id is not None:
+                yield chunk_id, self._text_at(row), self._metadata_at(row)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """구성 요소별 메모리 사용량 (바이트)"""
+        arrays = (self._offsets, self._lengths, self._sources, self._pages, self._starts, self._metas)
+        usage = {
+            "text": sys.getsizeof(self._text),
+            "arrays": sum(sys.getsizeof(values) for values in arrays),
+            "interned": self._source_names.nbytes() + self._meta_values.nbytes(),
+            "ids": (sys.getsizeof(self._chunk_ids) + sys.getsizeof(self._rows)
+                    + sum(sys.getsizeof(chunk_id) for chunk_id in self._rows)),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+
+def _deep_size(obj, seen: set) -> int:
+    """객체와 참조하는 dict/list/str 등의 대략적인 전체 크기"""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(key, seen) + _deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_size(obj.__dict__, seen)
+    return size
+
+
+def memory_report(store: ChunkStore, sample: int = 2000) -> Dict[str, float]:
+    """열 저장소와 Document/InMemoryDocstore 표현의 메모리 비교
+
+    Document 표현은 sample 개 청크를 실제로 만들어 측정한 뒤 전체 청크 수로 환산합니다.
+    """
+    columnar = store.memory_usage()["total"]
+    n_chunks = len(store)
+    if not n_chunks:
+        return {"chunks": 0, "columnar_bytes": columnar, "document_bytes": 0, "ratio": 0.0}
+
+    seen: set = set()
+    docs = {}
+    for chunk_id, _, _ in store.iter_chunks():
+        if len(docs) >= sample:
+            break
+        docs[chunk_id] = store.search(chunk_id)
+    # InMemoryDocstore 의 id -> Document dict 포함
+    document_bytes = sys.getsizeof(docs) + sum(_deep_size(doc, seen) for doc in docs.values())
+    estimated = document_bytes * n_chunks / len(docs)
+    return {
+        "chunks": n_chunks,
+        "columnar_bytes": columnar,
+        "document_bytes": estimated,
+        "ratio": estimated / columnar if columnar else 0.0,
+    }
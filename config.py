@@ -5,6 +5,57 @@ import json
 from pathlib import Path
 from typing import Any
 
+# 처음 실행 시 config.json 으로 저장되는 기본 설정
+DEFAULT_CONFIG = {
+    "api_key": "",
+    "model": "llama-3.3-70b-versatile",
+    "temperature": 0.3,
+    "chunk_size": 500,
+    "chunk_overlap": 50,
+    "top_k": 3,
+    "embedding_model": "intfloat/multilingual-e5-small",
+    "embedding_device": None,
+    "embedding_warmup": False,
+    "ingest_workers": 0,
+    "ingest_job_workers": 1,
+    "pdf_page_window": 32,
+    "pdf_stream_min_pages": 200,
+    "pdf_parallel_min_pages": 500,
+    "embed_batch_size": 256,
+    "embedding_cache_max_entries": 200000,
+    "retrieval_mode": "hybrid",
+    "hybrid_fetch_k": 20,
+    "context_fetch_k": 0,
+    "context_token_budget": 1500,
+    "mmr_lambda": 0.7,
+    "index_type": "auto",
+    "nprobe": 8,
+    "ef_search": 64,
+    "web_concurrency": 16,
+    "web_queue_size": 64,
+    "answer_cache": True,
+    "answer_cache_threshold": 0.95,
+    "answer_cache_ttl": 86400,
+    "answer_cache_max_entries": 1000,
+    "answer_cache_persist": False,
+    "history_token_budget": 2000,
+    "history_keep_turns": 4,
+    "history_summary_tokens": 300,
+    "session_fsync_every": 8,
+    "metrics_enabled": True,
+    "batch_concurrency": 4,
+    "batch_max_retries": 5,
+    "batch_backoff": 1.0,
+    "serve_shutdown_timeout": 30,
+    "serve_ingest_root": "",
+    "serve_max_sessions": 256,
+    "serve_session_ttl": 1800,
+    "vector_quantization": "none",
+    "rescore_k": 0,
+    "watch_interval": 10
+}
+
+
 class Config:
     """설정 관리 클래스"""
     
@@ -19,6 +70,7 @@ class Config:
         self.config_dir.mkdir(exist_ok=True)
         (self.config_dir / "sessions").mkdir(exist_ok=True)
         (self.config_dir / "vectors").mkdir(exist_ok=True)
+        (self.config_dir / "embeddings").mkdir(exist_ok=True)
     
     def load(self):
         """설정 로드"""
@@ -26,14 +78,7 @@ class Config:
             with open(self.config_file, 'r') as f:
                 self.data = json.load(f)
         else:
-            self.data = {
-                "api_key": "",
-                "model": "llama-3.3-70b-versatile",
-                "temperature": 0.3,
-                "chunk_size": 500,
-                "chunk_overlap": 50,
-                "top_k": 3
-            }
+            self.data = dict(DEFAULT_CONFIG)
             self.save()
     
     def save(self):
@@ -0,0 +1,197 @@
+"""
+컨텍스트 구성 단계 - 검색 결과를 프롬프트에 넣기 전에 정리
+
+1. 같은 파일/페이지에서 겹치거나 이어지는 청크를 하나로 합침
+2. MMR(Maximal Marginal Relevance) 로 관련성이 높으면서 서로 다른 단위를 고름
+3. 토큰 예산 안에 [출처: ...] 라벨과 함께 담음
+"""
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .tokens import estimate_tokens
+
+# 겹침을 텍스트로 찾을 때 확인할 최소 길이 (우연한 일치 방지)
+_MIN_TEXT_OVERLAP = 20
+
+
+def format_chunk(source: str, text: str) -> str:
+    """출처 라벨이 붙은 컨텍스트 조각"""
+    return f"[출처: {source}]\n{text}"
+
+
+def _text_overlap(left: str, right: str, max_overlap: int) -> int:
+    """left 의 끝과 right 의 시작이 겹치는 길이 (없으면 0)"""
+    for size in range(min(len(left), len(right), max_overlap), _MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_pair(left: dict, right: dict, max_overlap: int) -> Optional[str]:
+    """같은 페이지의 두 단위가 겹치거나 맞닿으면 합친 텍스트, 아니면 None
+
+    분할 시 기록한 start_index 가 있으면 위치로, 없으면(이전 캐시) 텍스트 겹침으로 판단합니다.
+    """
+    if left["start"] is not None and right["start"] is not None:
+        left_end = left["start"] + len(left["text"])
+        if right["start"] > left_end + 1:
+            return None
+        if right["start"] + len(right["text"]) <= left_end:
+            return left["text"]
+        return left["text"] + right["text"][max(0, left_end - right["start"]):]
+
+    overlap = _text_overlap(left["text"], right["text"], max_overlap)
+    if not overlap:
+        return None
+    return left["text"] + right["text"][overlap:]
+
+
+def merge_adjacent(units: List[dict], max_overlap: int) -> List[dict]:
+    """같은 source_file/page 의 겹치거나 이어지는 단위를 합침
+
+    합친 단위의 관련도는 구성 청크 중 가장 높은 값, 위치는 가장 앞 청크를 따릅니다.
+    """
+    groups: Dict[Tuple, List[dict]] = {}
+    for unit in units:
+        groups.setdefault((unit["source"], unit["page"]), []).append(unit)
+
+    merged = []
+    for group in groups.values():
+        group.sort(key=lambda unit: (unit["start"] is None, unit["start"] or 0))
+        current = dict(group[0])
+        for unit in group[1:]:
+            text = _merge_pair(current, unit, max_overlap)
+            if text is None:
+                merged.append(current)
+                current = dict(unit)
+                continue
+            current = {
+                **current,
+                "text": text,
+                "ids": current["ids"] + unit["ids"],
+                "relevance": max(current["relevance"], unit["relevance"]),
+                "terms": _add_terms(current["terms"], unit["terms"]),
+            }
+        merged.append(current)
+    return merged
+
+
+def _add_terms(left: Dict[str, int], right: Dict[str, int]) -> Dict[str, int]:
+    total = dict(left)
+    for term, count in right.items():
+        total[term] = total.get(term, 0) + count
+    return total
+
+
+def _cosine(left: Dict[str, int], right: Dict[str, int]) -> float:
+    if not left or not right:
+        return 0.0
+    if len(left) > len(right):
+        left, right = right, left
+    dot = sum(count * right.get(term, 0) for term, count in left.items())
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(c * c for c in left.values()) * sum(c * c for c in right.values()))
+    return dot / norm
+
+
+def mmr_order(units: List[dict], lambda_mult: float) -> List[dict]:
+    """MMR 순서로 정렬 - 관련도와 이미 고른 단위와의 유사도(토큰 빈도 코사인)를 절충"""
+    remaining = list(units)
+    selected: List[dict] = []
+    while remaining:
+        def score(unit):
+            redundancy = max((_cosine(unit["terms"], other["terms"]) for other in selected),
+                             default=0.0)
+            return lambda_mult * unit["relevance"] - (1 - lambda_mult) * redundancy
+
+        best = max(remaining, key=score)
+        remaining.remove(best)
+        selected.append(best)
+    return selected
+
+
+def pack(units: List[dict], max_units: int, token_budget: int) -> List[dict]:
+    """MMR 순서대로 예산(0이면 무제한) 안에 들어가는 단위를 최대 max_units 개 담음
+
+    들어가지 않는 단위는 건너뛰고 다음 단위를 시도합니다. 첫 단위가 예산보다 크면 잘라서 담습니다.
+    """
+    packed = []
+    used = 0
+    for unit in units:
+        if len(packed) >= max_units:
+            break
+        cost = estimate_tokens(format_chunk(unit["source"], unit["text"])) + 2
+        if token_budget and used + cost > token_budget:
+            if packed:
+                continue
+            unit = {**unit, "text": _truncate(unit["text"], token_budget - 20)}
+            cost = token_budget
+        packed.append(unit)
+        used += cost
+    return packed
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """추정 토큰 수가 max_tokens 이하가 되도록 뒤를 자름"""
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max(1, max_tokens):
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def build_context(docs: List, config,
+                  term_counts: Callable[[str, str], Dict[str, int]]) -> Tuple[str, List[str], List[dict], dict]:
+    """검색 결과(관련도 순 Document) 로 컨텍스트 구성
+
+    term_counts(청크 id, 텍스트) 는 MMR 유사도에 쓰는 토큰 빈도를 반환합니다.
+    (컨텍스트 문자열, 포함된 청크 id, 포함된 출처, 통계) 를 반환합니다.
+    출처는 컨텍스트에 실제로 들어간 {"file", "page"} 를 담긴 순서대로 중복 없이 나열합니다. 통계에서
+    - raw_tokens: 포함된 청크를 합치지 않고 각각 라벨을 붙여 이어 붙였을 때의 토큰 수
+    - tokens_saved: raw_tokens 대비 줄어든 토큰 수 (겹침 제거 + 라벨 공유)
+    - baseline_tokens: 이전 방식(상위 top_k 청크를 그대로 연결)의 토큰 수
+    """
+    top_k = config.get("top_k", 3)
+    units = []
+    for rank, doc in enumerate(docs):
+        units.append({
+            "ids": [doc.id],
+            "source": doc.metadata.get("source_file", "Unknown"),
+            "page": doc.metadata.get("page"),
+            "start": doc.metadata.get("start_index"),
+            "text": doc.page_content,
+            "relevance": 1.0 - rank / len(docs),
+            "terms": term_counts(doc.id, doc.page_content),
+        })
+
+    baseline = "\n\n".join(format_chunk(unit["source"], unit["text"]) for unit in units[:top_k])
+    merged = merge_adjacent(units, max_overlap=2 * config.get("chunk_overlap", 50))
+    ordered = mmr_order(merged, config.get("mmr_lambda", 0.7))
+    packed = pack(ordered, top_k, config.get("context_token_budget", 1500))
+
+    context = "\n\n".join(format_chunk(unit["source"], unit["text"]) for unit in packed)
+    chunk_ids = [chunk_id for unit in packed for chunk_id in unit["ids"]]
+    sources = []
+    for unit in packed:
+        source = {"file": unit["source"], "page": unit["page"]}
+        if source not in sources:
+            sources.append(source)
+    by_id = {unit["ids"][0]: unit for unit in units}
+    raw_tokens = estimate_tokens("\n\n".join(
+        format_chunk(by_id[chunk_id]["source"], by_id[chunk_id]["text"]) for chunk_id in chunk_ids
+    ))
+    context_tokens = estimate_tokens(context)
+    stats = {
+        "candidates": len(units),
+        "merged": len(units) - len(merged),
+        "selected_chunks": len(chunk_ids),
+        "baseline_tokens": estimate_tokens(baseline),
+        "raw_tokens": raw_tokens,
+        "context_tokens": context_tokens,
+        "tokens_saved": max(0, raw_tokens - context_tokens),
+    }
+    return context, chunk_ids, sources, stats
@@ -0,0 +1,50 @@
+"""
+프로세스 전역 임베딩 모델 레지스트리
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_EMBEDDING_MODEL = "intfloat/multilingual-e5-small"
+
+# (모델 이름, 장치) -> 임베딩 인스턴스
+_models: Dict[Tuple[str, Optional[str]], object] = {}
+_lock = threading.Lock()
+
+
+def get_embedding(model_name: str = DEFAULT_EMBEDDING_MODEL, device: Optional[str] = None):
+    """임베딩 모델 반환 - 같은 (모델, 장치)는 프로세스에서 한 번만 로드"""
+    key = (model_name, device)
+    embedding = _models.get(key)
+    if embedding is not None:
+        return embedding
+
+    with _lock:
+        embedding = _models.get(key)
+        if embedding is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+
+            model_kwargs = {"device": device} if device else {}
+            embedding = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+            _models[key] = embedding
+    return embedding
+
+
+def warmup(model_name: str = DEFAULT_EMBEDDING_MODEL, device: Optional[str] = None) -> float:
+    """모델 로드 후 더미 인코딩 실행 - 소요 시간(초) 반환"""
+    start = time.perf_counter()
+    get_embedding(model_name, device).embed_query("warmup")
+    return time.perf_counter() - start
+
+
+def warmup_in_background(model_name: str = DEFAULT_EMBEDDING_MODEL,
+                         device: Optional[str] = None) -> threading.Thread:
+    """백그라운드 스레드에서 워밍업 (첫 질의는 로드가 끝날 때까지 같은 인스턴스를 기다림)"""
+    thread = threading.Thread(target=warmup, args=(model_name, device), daemon=True)
+    thread.start()
+    return thread
+
+
+def loaded_models() -> list:
+    """로드된 (모델, 장치) 목록"""
+    return list(_models)
@@ -2,15 +2,43 @@
 대화 처리 핸들러
 """
 import json
+import os
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
-from langchain_core.messages import HumanMessage, AIMessage
+
+from ..tokens import estimate_message_tokens
+
+# langchain 메시지 클래스는 필요한 메서드 안에서 import 합니다 (세션 목록 조회를 가볍게 유지)
 
 console = Console()
 
+# 웹 모드에서 여러 연결이 같은 매니페스트를 갱신하므로 직렬화
+_manifest_lock = threading.Lock()
+
+# 세션 폴더의 manifest.json / manifest.tmp 와 겹치므로 세션 이름으로 쓸 수 없음
+RESERVED_SESSION_NAMES = {"manifest"}
+
+
+def _session_name_error(name: str) -> Optional[str]:
+    if not name or name.startswith(".") or any(char in name for char in "/\\\0"):
+        return f"사용할 수 없는 세션 이름: {name!r}"
+    if name.casefold() in RESERVED_SESSION_NAMES:
+        return f"'{name}' 은(는) 예약된 이름이라 세션 이름으로 쓸 수 없습니다"
+    return None
+
+
+def check_session_name(name: str) -> str:
+    """세션 이름 검사 (파일 이름으로 쓰므로 경로 구분자, 숨김 파일, 예약된 이름은 ValueError)"""
+    error = _session_name_error(name)
+    if error:
+        raise ValueError(error)
+    return name
+
+
 class ChatHandler:
     """대화 처리 핸들러"""
     
@@ -19,9 +47,21 @@ class ChatHandler:
         self.sessions_dir = Path.home() / ".rag_gpt" / "sessions"
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
         self.current_history = []
+        # 오래된 대화의 누적 요약과 요약에 포함된 앞쪽 메시지 수
+        self.summary = ""
+        self.summarized_count = 0
+        self.manifest_file = self.sessions_dir / "manifest.json"
+        # 마지막으로 저장/로드한 세션 상태 (이어서 저장할 때 추가 기록 여부 판단)
+        self._session_name: Optional[str] = None
+        self._file_size = 0
+        self._saved_count = 0
+        self._saved_summary = ("", 0)
+        self._unsynced = 0
     
     def add_message(self, role: str, content: str):
         """메시지 추가"""
+        from langchain_core.messages import HumanMessage, AIMessage
+
         if role == "user":
             self.current_history.append(HumanMessage(content=content))
         elif role == "assistant":
@@ -31,44 +71,248 @@ class ChatHandler:
         """현재 대화 기록 반환"""
         return self.current_history
     
+    def get_prompt_history(self, summarize: Optional[Callable[[str, List], str]] = None) -> List:
+        """프롬프트에 넣을 대화 기록 (history_token_budget 토큰 이하)
+
+        최근 history_keep_turns 턴은 그대로 두고, 예산을 넘으면 그 이전 메시지를
+        summarize(이전 요약, 새로 접을 메시지) 로 누적 요약에 접어 넣습니다.
+        요약은 세션과 함께 저장되므로 같은 메시지를 다시 요약하지 않습니다.
+        그래도 예산을 넘으면 가장 오래된 최근 메시지부터 뺍니다 (마지막 턴은 유지).
+        """
+        from langchain_core.messages import SystemMessage
+
+        budget = self.config.get("history_token_budget", 2000)
+        keep = self.config.get("history_keep_turns", 4) * 2
+
+        def with_summary(messages: List) -> List:
+            if not self.summary:
+                return list(messages)
+            return [SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}")] + list(messages)
+
+        history = with_summary(self.current_history[self.summarized_count:])
+        if not budget or estimate_message_tokens(history) <= budget:
+            return history
+
+        fold_end = max(self.summarized_count, len(self.current_history) - keep)
+        to_fold = self.current_history[self.summarized_count:fold_end]
+        if to_fold and summarize:
+            try:
+                self.summary = summarize(self.summary, to_fold)
+                self.summarized_count = fold_end
+            except Exception:
+                # 요약 실패 시 아래에서 오래된 메시지를 빼는 것으로 대체
+                pass
+
+        recent = self.current_history[fold_end:]
+        history = with_summary(recent)
+        while len(recent) > 2 and estimate_message_tokens(history) > budget:
+            recent = recent[2:]
+            history = with_summary(recent)
+        return history
+    
     def clear_history(self):
-        """대화 기록 초기화"""
+        """대화 기록 초기화 (다음 저장 시 세션 파일을 새로 씀)"""
         self.current_history = []
+        self.summary = ""
+        self.summarized_count = 0
+        self._session_name = None
     
+    # ---- 세션 저장소 ----
+    # 세션은 메시지 한 줄씩 추가 기록하는 JSONL 파일(<이름>.jsonl)로 저장하고,
+    # 목록 표시에 필요한 정보(날짜, 메시지 수)는 manifest.json 에 따로 둡니다.
+    # 요약이 바뀌면 {"summary": ..., "messages": ...} 줄을 추가하며 마지막 줄이 유효합니다.
+
+    def _session_file(self, name: str) -> Path:
+        return self.sessions_dir / f"{check_session_name(name)}.jsonl"
+
+    def _read_manifest(self) -> dict:
+        """세션별 메타데이터 (이름 -> {timestamp, messages})"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_manifest(self, updates: dict):
+        """매니페스트 항목 갱신 (임시 파일에 쓴 뒤 교체)"""
+        with _manifest_lock:
+            manifest = self._read_manifest()
+            manifest.update(updates)
+            tmp_file = self.manifest_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_file, self.manifest_file)
+
+    def _migrate_legacy(self, names: Optional[List[str]] = None):
+        """이전 형식(<이름>.json) 세션을 JSONL 로 변환하고 원본은 .json.bak 으로 보관"""
+        if names is None:
+            # manifest.json 등 세션 이름으로 쓸 수 없는 파일은 변환하지 않음
+            legacy_files = [path for path in self.sessions_dir.glob("*.json")
+                            if _session_name_error(path.stem) is None]
+        else:
+            legacy_files = [self._session_file(name).with_suffix(".json") for name in names]
+
+        updates = {}
+        for legacy_file in legacy_files:
+            if not legacy_file.exists():
+                continue
+            name = legacy_file.stem
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not self._session_file(name).exists():
+                records = [{"role": msg["role"], "content": msg["content"]}
+                           for msg in data.get("messages", [])]
+                summary = data.get("summary") or {}
+                if summary.get("text"):
+                    records.append({"summary": summary["text"], "messages": summary.get("messages", 0)})
+                self._write_records(self._session_file(name), records)
+                updates[name] = {"timestamp": data.get("timestamp", ""),
+                                 "messages": len(data.get("messages", []))}
+            os.replace(legacy_file, legacy_file.with_suffix(".json.bak"))
+        if updates:
+            self._update_manifest(updates)
+
+    @staticmethod
+    def _write_records(path: Path, records: List[dict]):
+        """세션 파일 전체를 새로 쓰기 (임시 파일 + fsync + 교체)"""
+        tmp_file = path.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+    @staticmethod
+    def _read_records(path: Path) -> Tuple[List[dict], dict]:
+        """(메시지 목록, 마지막 요약) 읽기 - 중간에 잘린 마지막 줄은 무시"""
+        messages, summary = [], {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "summary" in record:
+                    summary = record
+                else:
+                    messages.append(record)
+        return messages, summary
+
+    def _message_record(self, msg) -> dict:
+        from langchain_core.messages import HumanMessage
+
+        return {"role": "human" if isinstance(msg, HumanMessage) else "ai", "content": msg.content}
+
     def save_session(self, name: str):
-        """세션 저장"""
-        session_file = self.sessions_dir / f"{name}.json"
-        data = {
-            "name": name,
-            "timestamp": datetime.now().isoformat(),
-            "messages": [
-                {
-                    "role": "human" if isinstance(msg, HumanMessage) else "ai",
-                    "content": msg.content
-                }
-                for msg in self.current_history
-            ]
-        }
-        with open(session_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """세션 저장
+
+        같은 세션을 이어서 저장하면 새 메시지만 파일 끝에 추가하고,
+        session_fsync_every 개 메시지마다 한 번 fsync 합니다.
+        다른 세션이었거나 기록이 초기화된 경우에는 파일 전체를 새로 씁니다.
+        """
+        self._migrate_legacy([name])
+        session_file = self._session_file(name)
+        summary_state = (self.summary, self.summarized_count)
+
+        appendable = (
+            name == self._session_name
+            and session_file.exists()
+            and session_file.stat().st_size == self._file_size
+            and self._saved_count <= len(self.current_history)
+        )
+        if appendable:
+            records = [self._message_record(msg) for msg in self.current_history[self._saved_count:]]
+            if summary_state != self._saved_summary:
+                records.append({"summary": self.summary, "messages": self.summarized_count})
+            if records:
+                with open(session_file, 'a', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    self._unsynced += len(records)
+                    if self._unsynced >= self.config.get("session_fsync_every", 8):
+                        os.fsync(f.fileno())
+                        self._unsynced = 0
+        else:
+            records = [self._message_record(msg) for msg in self.current_history]
+            if self.summary:
+                records.append({"summary": self.summary, "messages": self.summarized_count})
+            self._write_records(session_file, records)
+            self._unsynced = 0
+
+        self._session_name = name
+        self._file_size = session_file.stat().st_size
+        self._saved_count = len(self.current_history)
+        self._saved_summary = summary_state
+        self._update_manifest({name: {"timestamp": datetime.now().isoformat(),
+                                      "messages": len(self.current_history)}})
+
+    def flush(self):
+        """아직 fsync 하지 않은 추가 기록을 디스크에 반영"""
+        if self._unsynced and self._session_name:
+            with open(self._session_file(self._session_name), 'a', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+            self._unsynced = 0
     
     def load_session(self, name: str):
-        """세션 로드"""
-        session_file = self.sessions_dir / f"{name}.json"
-        if session_file.exists():
-            with open(session_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            self.current_history = []
-            for msg in data.get("messages", []):
-                if msg["role"] == "human":
-                    self.current_history.append(HumanMessage(content=msg["content"]))
-                else:
-                    self.current_history.append(AIMessage(content=msg["content"]))
+        """세션 로드 (이 핸들러가 마지막으로 저장한 상태 그대로면 다시 읽지 않음)"""
+        from langchain_core.messages import HumanMessage, AIMessage
+
+        self._migrate_legacy([name])
+        session_file = self._session_file(name)
+        if not session_file.exists():
+            return
+        if name == self._session_name and session_file.stat().st_size == self._file_size:
+            return
+
+        self.flush()
+        messages, summary = self._read_records(session_file)
+        self.current_history = []
+        for msg in messages:
+            if msg["role"] == "human":
+                self.current_history.append(HumanMessage(content=msg["content"]))
+            else:
+                self.current_history.append(AIMessage(content=msg["content"]))
+        
+        self.summary = summary.get("summary", "")
+        self.summarized_count = min(summary.get("messages", 0), len(self.current_history))
+        self._session_name = name
+        self._file_size = session_file.stat().st_size
+        self._saved_count = len(self.current_history)
+        self._saved_summary = (self.summary, self.summarized_count)
+
+    def session_infos(self) -> List[dict]:
+        """저장된 세션 목록 (name, timestamp, messages) - 매니페스트만 읽음
+
+        매니페스트에 없는 세션 파일(외부에서 복사한 파일 등)은 한 번 읽어 등록합니다.
+        """
+        self._migrate_legacy()
+        manifest = self._read_manifest()
+        missing = {}
+        for session_file in self.sessions_dir.glob("*.jsonl"):
+            name = session_file.stem
+            if name not in manifest and _session_name_error(name) is None:
+                messages, _ = self._read_records(session_file)
+                missing[name] = {
+                    "timestamp": datetime.fromtimestamp(session_file.stat().st_mtime).isoformat(),
+                    "messages": len(messages),
+                }
+        if missing:
+            self._update_manifest(missing)
+            manifest.update(missing)
+        # 이전 버전이 매니페스트를 세션으로 잘못 등록한 항목 등은 제외
+        return [
+            {"name": name, **info} for name, info in manifest.items()
+            if _session_name_error(name) is None and self._session_file(name).exists()
+        ]
     
     def list_sessions(self):
         """모든 세션 목록 표시"""
-        sessions = list(self.sessions_dir.glob("*.json"))
+        sessions = self.session_infos()
         
         if not sessions:
             console.print("[yellow]저장된 세션이 없습니다.[/yellow]")
@@ -79,14 +323,11 @@ class ChatHandler:
         table.add_column("날짜", style="green")
         table.add_column("메시지 수", style="yellow")
         
-        for session_file in sessions:
-            with open(session_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+        for info in sessions:
             table.add_row(
-                data["name"],
-                data.get("timestamp", "Unknown")[:10],
-                str(len(data.get("messages", [])))
+                info["name"],
+                info.get("timestamp", "Unknown")[:10] or "Unknown",
+                str(info.get("messages", 0))
             )
         
         console.print(table)
@@ -97,18 +338,19 @@ class ChatHandler:
             console.print("[yellow]세션 이름을 지정하세요.[/yellow]")
             return
         
-        session_file = self.sessions_dir / f"{name}.json"
+        self._migrate_legacy([name])
+        session_file = self._session_file(name)
         if not session_file.exists():
             console.print(f"[red]세션 '{name}'을 찾을 수 없습니다.[/red]")
             return
         
-        with open(session_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        messages, _ = self._read_records(session_file)
+        timestamp = self._read_manifest().get(name, {}).get("timestamp") or "Unknown"
         
         console.print(f"\n[bold cyan]세션: {name}[/bold cyan]")
-        console.print(f"[dim]날짜: {data.get('timestamp', 'Unknown')[:10]}[/dim]\n")
+        console.print(f"[dim]날짜: {timestamp[:10]}[/dim]\n")
         
-        for msg in data.get("messages", []):
+        for msg in messages:
             if msg["role"] == "human":
                 console.print(f"[bold yellow]User:[/bold yellow] {msg['content']}")
             else:
@@ -117,6 +359,8 @@ class ChatHandler:
     
     def show_history(self):
         """현재 대화 기록 표시"""
+        from langchain_core.messages import HumanMessage
+
         if not self.current_history:
             console.print("[yellow]대화 기록이 없습니다.[/yellow]")
             return
@@ -1,47 +1,139 @@
 """
 RAG 핸들러 - 메타데이터, 프롬프트 및 언어 자동 선택
 """
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
 from operator import itemgetter
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
+# langchain / FAISS / Groq 등 무거운 모듈은 처음 사용할 때 import 합니다.
+# (--list-chats 같은 명령이 모델 로딩 없이 바로 실행되도록)
+from ..cache import AnswerCache
+from ..context_builder import build_context
+from ..embeddings import DEFAULT_EMBEDDING_MODEL, get_embedding
+from ..metrics import metrics
+from ..sparse_index import BM25Index, reciprocal_rank_fusion, term_counts
+
+
+def split_pdf(pdf_path: Path, chunk_size: int, chunk_overlap: int) -> List:
+    """PDF 로드 및 청크 분할
+
+    프로세스 풀 워커에서도 호출할 수 있도록 모듈 수준 함수로 둡니다.
+    """
+    return split_pdf_timed(pdf_path, chunk_size, chunk_overlap)[0]
+
+
+def split_pdf_timed(pdf_path: Path, chunk_size: int, chunk_overlap: int) -> Tuple[List, float, float]:
+    """split_pdf 와 같지만 (청크, 로드 시간, 분할 시간) 을 반환
+
+    워커 프로세스에서 잰 시간을 부모 프로세스의 지표에 기록하기 위해 사용합니다.
+    페이지를 하나씩 읽어 바로 분할하므로 전체 페이지 텍스트를 한꺼번에 들고 있지 않습니다.
+    """
+    from ..pdf_pages import split_page_range
+
+    chunks, load_time, split_time, _ = split_page_range(pdf_path, 0, None, chunk_size, chunk_overlap)
+    return chunks, load_time, split_time
 
 
 class RAGHandler:
     """RAG 처리 핸들러"""
 
-    def __init__(self, config):
+    def __init__(self, config, cache=None, embedding_cache=None, answer_cache=None):
         self.config = config
+        self.cache = cache
+        self.embedding_cache = embedding_cache
+        self.answer_cache = answer_cache
         self.vectorstore = None
         self.retriever = None
         self.loaded_pdfs: List[str] = []
-        self.embedding = None
-        self.setup_llm()
-        self.setup_embedding()
+        # 문서 이름별 청크 id 와 원본 경로 (부분 제거/교체용)
+        self.doc_ids: Dict[str, List[str]] = {}
+        self.doc_paths: Dict[str, Path] = {}
+        # 밀집 검색과 함께 사용하는 BM25 희소 인덱스
+        self.sparse_index = self._new_sparse_index()
+        # 컨텍스트 구성 통계 (마지막 질의, 누적)
+        self.last_context_stats: Optional[dict] = None
+        self.context_totals = {"queries": 0, "raw_tokens": 0, "context_tokens": 0,
+                               "tokens_saved": 0, "baseline_tokens": 0}
+        # 여러 사용자가 동시에 질의할 때 인덱스 변경과 검색을 직렬화
+        self._lock = threading.RLock()
+        # 임베딩 모델과 LLM 클라이언트는 처음 사용할 때 생성
+        self._model_lock = threading.Lock()
+        self._embedding = None
+        self._llm = None
+        self._prompt = None
+
+    @property
+    def embedding(self):
+        """임베딩 모델 (첫 사용 시 로드)"""
+        if self._embedding is None:
+            with self._model_lock:
+                if self._embedding is None:
+                    self.setup_embedding()
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, value):
+        self._embedding = value
+
+    @property
+    def llm(self):
+        """LLM 클라이언트 (첫 사용 시 생성)"""
+        if self._llm is None:
+            with self._model_lock:
+                if self._llm is None:
+                    self._llm = self._create_llm()
+        return self._llm
+
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+
+    @property
+    def prompt(self):
+        """프롬프트 템플릿 (첫 사용 시 생성)"""
+        if self._prompt is None:
+            self._prompt = self._create_prompt()
+        return self._prompt
+
+    def _new_sparse_index(self) -> BM25Index:
+        """설정값(bm25_k1, bm25_b)으로 빈 BM25 인덱스 생성"""
+        return BM25Index(k1=self.config.get("bm25_k1", 1.5), b=self.config.get("bm25_b", 0.75))
 
     def setup_embedding(self):
-        """임베딩 모델 설정"""
-        self.embedding = HuggingFaceEmbeddings(
-            model_name="intfloat/multilingual-e5-small"
+        """임베딩 모델 설정 (프로세스 전역 레지스트리에서 공유 인스턴스 사용)"""
+        self._embedding = get_embedding(
+            self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+            self.config.get("embedding_device"),
         )
 
     def setup_llm(self):
-        """LLM 설정"""
-        self.llm = ChatGroq(
+        """LLM 설정 - 바뀐 model/temperature 로 다음 질의 때 클라이언트를 다시 생성"""
+        self._llm = None
+
+    def _create_llm(self):
+        """Groq LLM 클라이언트 생성"""
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(
             model=self.config.get("model"),
             temperature=self.config.get("temperature", 0.3),
         )
 
+    def _create_prompt(self):
+        """프롬프트 템플릿 생성"""
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
         # 언어를 코드에서 결정해서 answer_language로 넘김
         # answer_language 값은 "Korean" 또는 "English"로 넘기겠습니다.
-        self.prompt = ChatPromptTemplate.from_messages(
+        return ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
@@ -67,6 +159,24 @@ Content rules:
             ]
         )
 
+    def summarize_history(self, summary: str, messages: List) -> str:
+        """이전 요약에 새 대화 메시지를 접어 넣은 누적 요약 생성"""
+        from langchain_core.messages import HumanMessage
+
+        lines = [
+            f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}"
+            for msg in messages
+        ]
+        request = (
+            "Update the running summary of a conversation between a user and a "
+            "document-grounded assistant. Keep facts, names, numbers and open questions "
+            "that later turns may refer to. Write it in the language of the conversation, "
+            f"in at most {self.config.get('history_summary_tokens', 300)} tokens.\n\n"
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            "New messages:\n" + "\n".join(lines) + "\n\nUpdated summary:"
+        )
+        return self.llm.invoke(request).content.strip()
+
     # ---- 언어 감지 함수 추가 ----
     def _detect_language(self, text: str) -> str:
         """
@@ -87,79 +197,680 @@ Content rules:
         # 기본값: 한국어
         return "Korean"
 
-    def process_pdf(self, pdf_path: Path) -> int:
-        """단일 PDF 처리"""
-        loader = PyPDFLoader(str(pdf_path))
-        docs = loader.load()
+    def _split_pdf(self, pdf_path: Path) -> List:
+        """현재 설정으로 PDF 분할 (로드/분할 시간 기록)"""
+        return self._record_split(split_pdf_timed(
+            pdf_path,
+            self.config.get("chunk_size", 500),
+            self.config.get("chunk_overlap", 50),
+        ))
 
-        splitter = RecursiveCharacterTextSplitter(
+    @staticmethod
+    def _record_split(result: Tuple[List, float, float]) -> List:
+        chunks, load_time, split_time = result
+        metrics.observe("pdf_load", load_time)
+        metrics.observe("split", split_time)
+        return chunks
+
+    def _cache_key(self, pdf_path: Path, digest: Optional[str] = None) -> str:
+        """현재 청킹/임베딩 설정 기준 캐시 키 (digest 는 미리 계산한 파일 해시)"""
+        return self.cache.make_key(
+            pdf_path,
             chunk_size=self.config.get("chunk_size", 500),
             chunk_overlap=self.config.get("chunk_overlap", 50),
+            model_name=self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+            digest=digest,
         )
-        chunks = splitter.split_documents(docs)
 
-        # 메타데이터 추가
-        for chunk in chunks:
-            chunk.metadata["source_file"] = pdf_path.name
+    def _embed_texts(self, texts: List[str],
+                     progress: Optional[Callable[[str, int], None]] = None) -> List[List[float]]:
+        """고정 크기 배치로 텍스트 임베딩 (embed_batch_size)
 
-        if self.vectorstore is None:
-            self.vectorstore = FAISS.from_documents(chunks, self.embedding)
+        청크 임베딩 캐시가 있으면 미스된 텍스트만 모델로 보냅니다.
+        progress("embedded", 개수) 로 배치마다 진행량을 알립니다.
+        """
+        model_name = self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+        if self.embedding_cache:
+            vectors = self.embedding_cache.get_many(model_name, texts)
         else:
-            new_vectorstore = FAISS.from_documents(chunks, self.embedding)
-            self.vectorstore.merge_from(new_vectorstore)
+            vectors = [None] * len(texts)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        missing_texts = [texts[i] for i in missing]
+        if progress:
+            progress("embedded", len(texts) - len(missing))
+        batch_size = max(1, self.config.get("embed_batch_size", 256))
+        new_vectors = []
+        for start in range(0, len(missing_texts), batch_size):
+            batch = missing_texts[start:start + batch_size]
+            with metrics.span("embed"):
+                new_vectors.extend(self.embedding.embed_documents(batch))
+            if progress:
+                progress("embedded", len(batch))
+
+        for i, vector in zip(missing, new_vectors):
+            vectors[i] = vector
+        if self.embedding_cache and missing_texts:
+            try:
+                self.embedding_cache.put_many(model_name, missing_texts, new_vectors)
+            except OSError:
+                pass
+        return vectors
+
+    def _new_vectorstore(self, dim: int):
+        """빈 flat 벡터스토어 (청크는 Document 대신 열 기반 저장소에 보관, 검색 결과만 Document 로 생성)"""
+        import faiss
+        from langchain_community.vectorstores import FAISS
+        from ..chunk_store import ChunkStore
+
+        return FAISS(
+            embedding_function=self.embedding,
+            index=faiss.IndexFlatL2(dim),
+            docstore=ChunkStore(),
+            index_to_docstore_id={},
+        )
+
+    def _add_embeddings(self, texts: List[str], vectors: List, metadatas: List[dict],
+                        ids: List[str]):
+        """임베딩을 벡터스토어에 한 번에 추가하고 리트리버 갱신"""
+        from .. import vector_index
+
+        if self.vectorstore is None:
+            self.vectorstore = self._new_vectorstore(len(vectors[0]))
+
+        # 벡터 수에 맞는 인덱스 종류로 전환 (auto 모드의 임계값 통과 시 재구축)
+        with metrics.span("index_add"):
+            exact = self._exact_vectors()
+            vector_index.prepare_for_add(self.vectorstore, vectors, self.config)
+            self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            if exact is not None:
+                exact.add(ids, vectors)
+        self._build_retriever()
 
+    def _exact_vectors(self):
+        """재점수용 원본 벡터 파일 (양자화와 rescore_k 를 켠 경우에만, 없으면 현재 벡터로 생성)"""
+        from .. import vector_index
+        from ..quantization import ExactVectors
+
+        if self.config.get("vector_quantization", "none") == "none" or not self.config.get("rescore_k", 0):
+            return None
+        exact = getattr(self.vectorstore, "exact_vectors", None)
+        if exact is None:
+            exact = ExactVectors(self.vectorstore.index.d)
+            if self.vectorstore.index.ntotal:
+                exact.add(vector_index.ordered_ids(self.vectorstore),
+                          vector_index.reconstruct_all(self.vectorstore.index))
+            self.vectorstore.exact_vectors = exact
+        return exact
+
+    def _build_retriever(self):
+        """top_k 기준 리트리버 생성"""
         self.retriever = self.vectorstore.as_retriever(
             search_kwargs={"k": self.config.get("top_k", 3)}
         )
 
-        if pdf_path.name not in self.loaded_pdfs:
-            self.loaded_pdfs.append(pdf_path.name)
+    def _delete_ids(self, ids: List[str]):
+        """벡터와 문서 저장소에서 청크 삭제"""
+        from .. import vector_index
+
+        if ids and self.vectorstore is not None:
+            vector_index.remove_vectors(self.vectorstore, ids)
+            self.sparse_index.remove(ids)
 
-        return len(chunks)
+    def _ingest_workers(self, pending: int) -> int:
+        """병렬 파싱에 사용할 워커 수 (ingest_workers: 0이면 CPU 수)"""
+        workers = self.config.get("ingest_workers", 0) or os.cpu_count() or 1
+        return max(1, min(workers, pending))
+
+    def _split_pending(self, pending: List[Tuple[Path, Optional[str]]]) -> Iterator:
+        """캐시 미스 파일 분할 - (경로, 캐시 키, 청크 또는 예외)를 완료 순서대로 반환"""
+        workers = self._ingest_workers(len(pending))
+        if workers == 1:
+            for pdf_path, cache_key in pending:
+                try:
+                    yield pdf_path, cache_key, self._split_pdf(pdf_path)
+                except Exception as e:
+                    yield pdf_path, cache_key, e
+            return
+
+        chunk_size = self.config.get("chunk_size", 500)
+        chunk_overlap = self.config.get("chunk_overlap", 50)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(split_pdf_timed, pdf_path, chunk_size, chunk_overlap): (pdf_path, cache_key)
+                for pdf_path, cache_key in pending
+            }
+            for future in as_completed(futures):
+                pdf_path, cache_key = futures[future]
+                try:
+                    yield pdf_path, cache_key, self._record_split(future.result())
+                except Exception as e:
+                    yield pdf_path, cache_key, e
 
-    def process_multiple_pdfs(self, pdf_paths: List[Path]) -> dict:
-        """다중 PDF 처리"""
+    def _load_entries(self, pdf_paths: List[Path], outcomes: Dict,
+                      progress: Optional[Callable[[str, int], None]] = None,
+                      digests: Optional[Dict[Path, str]] = None) -> Iterator[dict]:
+        """캐시 적중 파일을 먼저, 캐시 미스 파일은 분할이 끝나는 순서대로 반환
+
+        캐시 미스 항목의 vectors 는 None 이며, 실패한 파일은 outcomes 에 예외로 기록합니다.
+        페이지가 pdf_stream_min_pages 이상이면서 pdf_page_window 보다 많은 파일만 마지막에
+        창 단위로 읽으면서 바로 임베딩하고 (streamed 항목), 그동안의 진행량은 progress 로 알립니다.
+        나머지 파일은 프로세스 풀에서 통째로 분할합니다.
+        digests 에 있는 파일은 그 SHA-256 으로 캐시 키를 만듭니다.
+        """
+        from ..pdf_pages import page_count
+
+        window = max(1, self.config.get("pdf_page_window", 32))
+        stream_min = max(window + 1, self.config.get("pdf_stream_min_pages", 200))
+        pending, large = [], []
+        for pdf_path in pdf_paths:
+            try:
+                digest = digests.get(pdf_path) if digests else None
+                cache_key = self._cache_key(pdf_path, digest) if self.cache else None
+                if cache_key and self.cache.exists(cache_key):
+                    texts, vectors, metadatas = self.cache.load_embeddings(cache_key, self.embedding)
+                    yield {"path": pdf_path, "cache_key": cache_key, "texts": texts,
+                           "vectors": list(vectors), "metadatas": metadatas,
+                           "sparse": self.cache.load_sparse(cache_key), "cached": True}
+                    continue
+                pages = page_count(pdf_path)
+                if pages >= stream_min:
+                    large.append((pdf_path, cache_key, pages))
+                else:
+                    pending.append((pdf_path, cache_key))
+            except Exception as e:
+                outcomes[pdf_path] = e
+
+        for pdf_path, cache_key, chunks in self._split_pending(pending):
+            if isinstance(chunks, Exception):
+                outcomes[pdf_path] = chunks
+                continue
+            yield {"path": pdf_path, "cache_key": cache_key,
+                   "texts": [chunk.page_content for chunk in chunks],
+                   "vectors": None,
+                   "metadatas": [chunk.metadata for chunk in chunks],
+                   "sparse": None}
+
+        for pdf_path, cache_key, pages in large:
+            try:
+                yield self._stream_entry(pdf_path, cache_key, pages, progress)
+            except Exception as e:
+                outcomes[pdf_path] = e
+
+    def _stream_entry(self, pdf_path: Path, cache_key: Optional[str], total_pages: int,
+                      progress: Optional[Callable[[str, int], None]] = None) -> dict:
+        """큰 PDF 를 pdf_page_window 페이지씩 읽으면서 embed_batch_size 청크마다 임베딩
+
+        추출 중인 페이지는 창 크기만큼만 메모리에 두고, 추출과 임베딩은 겹쳐 실행합니다.
+        임베딩한 배치는 바로 스테이징 벡터스토어(float32 flat 인덱스 + 열 기반 청크 저장소)에 넣으므로
+        문서 전체의 텍스트/벡터 목록을 들고 있지 않습니다.
+        페이지 수가 pdf_parallel_min_pages 이상이면 페이지 범위를 ingest_workers 개 프로세스에 나눕니다.
+        """
+        from ..pdf_pages import iter_chunk_windows, prefetch
+
+        window = max(1, self.config.get("pdf_page_window", 32))
+        min_pages = self.config.get("pdf_parallel_min_pages", 500)
+        workers = 1
+        if min_pages and total_pages >= min_pages:
+            workers = self._ingest_workers(-(-total_pages // window))
+        windows = iter_chunk_windows(
+            pdf_path, self.config.get("chunk_size", 500), self.config.get("chunk_overlap", 50),
+            window=window, workers=workers, total_pages=total_pages,
+        )
+        if workers == 1:
+            windows = prefetch(windows)
+
+        batch_size = max(1, self.config.get("embed_batch_size", 256))
+        texts, metadatas = [], []
+        ids, sparse = [], []
+        staging = None
+        load_time = split_time = embed_time = 0.0
+
+        def embed_pending():
+            nonlocal embed_time, staging
+            start = time.perf_counter()
+            vectors = self._embed_texts(texts, progress=progress)
+            embed_time += time.perf_counter() - start
+            if staging is None:
+                staging = self._new_vectorstore(len(vectors[0]))
+            batch_ids = [str(uuid.uuid4()) for _ in texts]
+            staging.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=batch_ids)
+            ids.extend(batch_ids)
+            sparse.extend(term_counts(text) for text in texts)
+            texts.clear()
+            metadatas.clear()
+
+        for chunks, window_load, window_split, pages in windows:
+            load_time += window_load
+            split_time += window_split
+            texts.extend(chunk.page_content for chunk in chunks)
+            metadatas.extend(chunk.metadata for chunk in chunks)
+            if progress:
+                progress("pages", pages)
+                progress("chunks", len(chunks))
+            if len(texts) >= batch_size:
+                embed_pending()
+        if texts:
+            embed_pending()
+        metrics.observe("pdf_load", load_time)
+        metrics.observe("split", split_time)
+
+        entry = {"path": pdf_path, "cache_key": cache_key, "staging": staging, "ids": ids,
+                 "sparse": sparse, "streamed": True, "embed_time": embed_time}
+        self._save_cache(entry)
+        return entry
+
+    @staticmethod
+    def _chunk_count(entry: dict) -> int:
+        """항목의 청크 수 (streamed 항목은 스테이징 저장소에 넣은 청크 수)"""
+        return len(entry["ids"]) if entry.get("streamed") else len(entry["texts"])
+
+    def _save_cache(self, entry: dict):
+        """임베딩된 문서를 벡터 캐시에 저장 (실패해도 문서 로드는 계속)"""
+        if not entry["cache_key"]:
+            return
+        try:
+            if entry.get("streamed"):
+                # 스테이징 저장소를 그대로 기록 (청크 저장소에서 행 단위로 읽어 씀)
+                if entry["staging"] is None:
+                    return
+                self.cache.save(entry["cache_key"], entry["staging"])
+            else:
+                self.cache.save_embeddings(entry["cache_key"], entry["texts"],
+                                           entry["vectors"], entry["metadatas"],
+                                           self.embedding)
+            self.cache.save_sparse(entry["cache_key"], entry["sparse"])
+        except OSError:
+            pass
+
+    def _embed_entries(self, entries: List[dict], outcomes: Dict,
+                       progress: Optional[Callable[[str, int], None]] = None) -> Tuple[List[dict], int]:
+        """캐시 미스 청크 전체를 한 번의 임베딩 패스로 처리 - (임베딩된 항목, 새로 임베딩한 청크 수)"""
+        to_embed = [entry for entry in entries if not entry.get("streamed") and entry["vectors"] is None]
+        texts = [text for entry in to_embed for text in entry["texts"]]
+        if progress:
+            progress("embedded", sum(len(entry["texts"]) for entry in entries if entry.get("cached")))
+        if not texts:
+            return entries, 0
+
+        try:
+            vectors = self._embed_texts(texts, progress=progress)
+        except Exception as e:
+            for entry in to_embed:
+                outcomes[entry["path"]] = e
+            return [entry for entry in entries if entry not in to_embed], 0
+
+        offset = 0
+        for entry in to_embed:
+            entry["vectors"] = vectors[offset:offset + len(entry["texts"])]
+            offset += len(entry["texts"])
+            entry["sparse"] = [term_counts(text) for text in entry["texts"]]
+            self._save_cache(entry)
+        return entries, len(texts)
+
+    def _publish(self, entries: List[dict]) -> int:
+        """임베딩된 문서를 인덱스에 추가하고 검색 대상으로 공개 - 추가한 청크 수 반환
+
+        같은 이름의 문서는 마지막 것만 인덱싱하고, 이미 로드된 문서는 기존 청크를 교체합니다.
+        잠금 안에서 한 번에 바꾸므로 검색은 교체 전 또는 후의 문서만 봅니다.
+        streamed 항목은 스테이징 저장소에서 embed_batch_size 개씩 옮겨 담습니다.
+        """
+        latest = {entry["path"].name: entry for entry in entries}
+        indexed = list(latest.values())
+        batched = [entry for entry in indexed if not entry.get("streamed")]
+        for entry in batched:
+            entry["ids"] = [str(uuid.uuid4()) for _ in entry["texts"]]
+            if entry["sparse"] is None:
+                entry["sparse"] = [term_counts(text) for text in entry["texts"]]
+                if entry["cache_key"]:
+                    try:
+                        self.cache.save_sparse(entry["cache_key"], entry["sparse"])
+                    except OSError:
+                        pass
+
+        # 인덱스 변경은 검색과 겹치지 않도록 잠금 안에서 수행
+        with self._lock:
+            self._delete_ids([
+                chunk_id for entry in indexed
+                for chunk_id in self.doc_ids.get(entry["path"].name, [])
+            ])
+            all_texts = [text for entry in batched for text in entry["texts"]]
+            if all_texts:
+                self._add_embeddings(
+                    all_texts,
+                    [vector for entry in batched for vector in entry["vectors"]],
+                    [metadata for entry in batched for metadata in entry["metadatas"]],
+                    [chunk_id for entry in batched for chunk_id in entry["ids"]],
+                )
+            added = len(all_texts)
+            for entry in indexed:
+                if entry.get("streamed") and entry["staging"] is not None:
+                    added += self._add_staged(entry["staging"])
+
+            for entry in indexed:
+                name = entry["path"].name
+                self.sparse_index.add(entry["ids"], entry["sparse"])
+                self.doc_ids[name] = entry["ids"]
+                self.doc_paths[name] = entry["path"]
+                if name not in self.loaded_pdfs:
+                    self.loaded_pdfs.append(name)
+        return added
+
+    def _add_staged(self, staging) -> int:
+        """스테이징 벡터스토어의 청크를 embed_batch_size 개씩 인덱스에 추가 - 추가한 청크 수 반환"""
+        batch_size = max(1, self.config.get("embed_batch_size", 256))
+        chunks = staging.docstore.iter_chunks()
+        total = staging.index.ntotal
+        for start in range(0, total, batch_size):
+            rows = list(islice(chunks, batch_size))
+            self._add_embeddings(
+                [text for _, text, _ in rows],
+                staging.index.reconstruct_n(start, len(rows)),
+                [metadata for _, _, metadata in rows],
+                [chunk_id for chunk_id, _, _ in rows],
+            )
+        return total
+
+    def _ingest(self, pdf_paths: List[Path], progress: Optional[Callable[[str, int], None]] = None,
+                publish_each: bool = False, digests: Optional[Dict[Path, str]] = None
+                ) -> Tuple[Dict[Path, Union[int, Exception]], dict]:
+        """PDF 수집 → 단일 배치 임베딩 → 단일 인덱스 추가
+
+        publish_each 가 True 면 문서마다 임베딩 후 바로 공개합니다 (백그라운드 작업용).
+        progress(종류, 개수) 는 pages/chunks/embedded/files 진행량을 알립니다.
+        파일별 결과(청크 수 또는 예외)와 처리량 통계를 반환합니다.
+        """
+        start_time = time.perf_counter()
+        outcomes: Dict[Path, Union[int, Exception]] = {}
+        embed_time = 0.0
+        embedded_chunks = 0
+        indexed_chunks = 0
+
+        def loaded(entry: dict):
+            nonlocal embed_time, embedded_chunks
+            if entry.get("streamed"):
+                # 창 단위로 읽으며 이미 임베딩하고 진행량도 알린 항목
+                embed_time += entry["embed_time"]
+                embedded_chunks += self._chunk_count(entry)
+            elif progress:
+                progress("pages", len({m.get("page") for m in entry["metadatas"]}))
+                progress("chunks", len(entry["texts"]))
+
+        def embed(entries: List[dict]) -> List[dict]:
+            nonlocal embed_time, embedded_chunks
+            embed_start = time.perf_counter()
+            entries, count = self._embed_entries(entries, outcomes, progress)
+            if count:
+                embed_time += time.perf_counter() - embed_start
+                embedded_chunks += count
+            return entries
+
+        def published(entries: List[dict]):
+            for entry in entries:
+                outcomes[entry["path"]] = self._chunk_count(entry)
+                if progress:
+                    progress("files", 1)
+
+        try:
+            if publish_each:
+                for entry in self._load_entries(pdf_paths, outcomes, progress, digests):
+                    loaded(entry)
+                    entries = embed([entry])
+                    try:
+                        indexed_chunks += self._publish(entries)
+                    except Exception as e:
+                        # 한 문서의 실패가 이미 공개된 문서나 남은 문서에 영향을 주지 않도록 기록만 함
+                        for failed in entries:
+                            outcomes[failed["path"]] = e
+                        continue
+                    published(entries)
+            else:
+                entries = []
+                for entry in self._load_entries(pdf_paths, outcomes, progress, digests):
+                    loaded(entry)
+                    entries.append(entry)
+                # 분할이 끝난 순서와 무관하게 입력 순서로 인덱싱 (같은 이름은 입력에서 마지막 파일)
+                order = {pdf_path: i for i, pdf_path in enumerate(pdf_paths)}
+                entries.sort(key=lambda entry: order[entry["path"]])
+                entries = embed(entries)
+                indexed_chunks = self._publish(entries)
+                published(entries)
+        finally:
+            # 청크 임베딩 캐시 인덱스는 수집 한 번에 한 번만 기록
+            if self.embedding_cache:
+                try:
+                    self.embedding_cache.flush()
+                except OSError:
+                    pass
+        if progress:
+            progress("files", sum(isinstance(outcome, Exception) for outcome in outcomes.values()))
+
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            "elapsed": elapsed,
+            "embedded_chunks": embedded_chunks,
+            "chunks_per_sec": indexed_chunks / elapsed if elapsed > 0 else 0.0,
+            "embed_chunks_per_sec": embedded_chunks / embed_time if embed_time > 0 else 0.0,
+        }
+        if self.embedding_cache:
+            stats["embedding_cache"] = self.embedding_cache.stats()
+        return outcomes, stats
+
+    def process_pdf(self, pdf_path: Path) -> int:
+        """단일 PDF 처리
+
+        캐시에 같은 내용/설정의 벡터가 있으면 파싱과 임베딩을 건너뜁니다.
+        """
+        outcomes, _ = self._ingest([pdf_path])
+        outcome = outcomes[pdf_path]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def process_multiple_pdfs(self, pdf_paths: List[Path],
+                              progress: Optional[Callable[[str, int], None]] = None,
+                              publish_each: bool = False,
+                              digests: Optional[Dict[Path, str]] = None) -> dict:
+        """다중 PDF 처리
+
+        캐시 미스 파일의 파싱/분할은 프로세스 풀에서 병렬로 수행하고,
+        모든 파일의 청크를 모아 배치 임베딩한 뒤 인덱스에 한 번에 추가합니다.
+        publish_each 가 True 면 문서마다 끝나는 대로 검색 대상에 추가합니다.
+        digests 로 미리 계산한 {경로: 파일 SHA-256} 을 주면 캐시 키를 만들 때 다시 해시하지 않습니다.
+        """
         results = {
             "success": [],
             "failed": [],
             "total_chunks": 0,
         }
+        outcomes, stats = self._ingest(pdf_paths, progress=progress, publish_each=publish_each,
+                                       digests=digests)
 
+        # 입력 순서대로 결과 정리
         for pdf_path in pdf_paths:
-            try:
-                chunks_count = self.process_pdf(pdf_path)
-                results["success"].append(
+            outcome = outcomes[pdf_path]
+            if isinstance(outcome, Exception):
+                results["failed"].append(
                     {
                         "file": pdf_path.name,
-                        "chunks": chunks_count,
+                        "error": str(outcome),
                     }
                 )
-                results["total_chunks"] += chunks_count
-            except Exception as e:
-                results["failed"].append(
+            else:
+                results["success"].append(
                     {
                         "file": pdf_path.name,
-                        "error": str(e),
+                        "chunks": outcome,
                     }
                 )
+                results["total_chunks"] += outcome
 
+        results.update(stats)
         return results
 
+    def remove_document(self, name: str) -> int:
+        """문서 하나의 청크만 인덱스에서 제거하고 제거된 청크 수 반환"""
+        if name not in self.doc_ids:
+            raise KeyError(f"로드되지 않은 문서입니다: {name}")
+        return self.remove_documents([name])
+
+    def remove_documents(self, names: List[str]) -> int:
+        """여러 문서의 청크를 한 번의 삭제로 제거하고 제거된 청크 수 반환 (로드되지 않은 이름은 무시)"""
+        with self._lock:
+            ids = []
+            for name in dict.fromkeys(names):
+                if name not in self.doc_ids:
+                    continue
+                ids.extend(self.doc_ids.pop(name))
+                self.doc_paths.pop(name, None)
+                self.loaded_pdfs.remove(name)
+
+            if not self.loaded_pdfs:
+                self.clear_vectorstore()
+            else:
+                self._delete_ids(ids)
+        return len(ids)
+
+    def reload_document(self, name: str, pdf_path: Optional[Path] = None) -> int:
+        """문서 다시 로드 (기존 청크를 새 청크로 교체)"""
+        pdf_path = Path(pdf_path) if pdf_path else self.doc_paths.get(name)
+        if pdf_path is None:
+            raise KeyError(f"로드되지 않은 문서입니다: {name}")
+        return self.process_pdf(pdf_path)
+
     def clear_vectorstore(self):
-        self.vectorstore = None
-        self.retriever = None
-        self.loaded_pdfs = []
+        with self._lock:
+            self.vectorstore = None
+            self.retriever = None
+            self.loaded_pdfs = []
+            self.doc_ids = {}
+            self.doc_paths = {}
+            self.sparse_index = self._new_sparse_index()
 
     def get_loaded_pdfs(self) -> List[str]:
-        return self.loaded_pdfs
+        # 백그라운드 수집 중에도 안전하게 순회할 수 있도록 복사본 반환
+        return list(self.loaded_pdfs)
 
-    def query(self, question: str, chat_history: List = None) -> str:
-        """질문 처리"""
-        if not self.retriever:
-            return "⚠️ PDF를 먼저 로드해주세요."
+    def memory_report(self) -> Optional[dict]:
+        """청크 저장소 메모리 사용량과 Document 표현 대비 비교 (메모리 저장소가 아니면 None)
+
+        BM25 인덱스는 두 표현 모두에 따로 필요하므로 sparse_bytes 로 함께 보고하고,
+        total_bytes / document_total_bytes 는 청크 보관에 드는 메모리 전체(저장소 + BM25)를 비교합니다.
+        """
+        from .. import vector_index
+        from ..chunk_store import ChunkStore, memory_report
 
-        chat_history = chat_history or []
+        with self._lock:
+            if self.vectorstore is None:
+                return None
+            docstore = self.vectorstore.docstore
+            if not isinstance(docstore, ChunkStore):
+                # 열린 인덱스는 청크를 디스크에서 읽고 추가분만 메모리에 보관
+                docstore = getattr(docstore, "_added", None)
+            if docstore is None:
+                return None
+            report = memory_report(docstore)
+            report["sparse_bytes"] = self.sparse_index.memory_usage()["total"]
+            report["total_bytes"] = report["columnar_bytes"] + report["sparse_bytes"]
+            report["document_total_bytes"] = report["document_bytes"] + report["sparse_bytes"]
+            report["vector_bytes"] = vector_index.vector_bytes(self.vectorstore.index)
+            report["vector_quantization"] = vector_index.quantization_of(self.vectorstore.index)
+            return report
 
+    def quantization_report(self, k: int = 10, n_queries: int = 200) -> Optional[List[dict]]:
+        """로드된 말뭉치로 float32/int8/PQ 저장 방식의 메모리, 검색 지연, recall@k 비교"""
+        from .. import quantization, vector_index
+
+        with self._lock:
+            if self.vectorstore is None or not self.vectorstore.index.ntotal:
+                return None
+            vectors = vector_index.existing_vectors(self.vectorstore)
+        return quantization.compare(
+            vectors, self.config, k=k, n_queries=n_queries,
+            rescore_k=self.config.get("rescore_k", 0) or 50,
+        )
+
+    def _retrieve(self, question: str, k: Optional[int] = None) -> Tuple[List, List[float]]:
+        """질문 임베딩 후 상위 k개(기본 top_k) 청크 검색 - (문서, 질문 벡터) 반환
+
+        질문 벡터는 답변 캐시 조회에도 재사용합니다.
+        """
+        with metrics.span("query_embed"):
+            question_vector = self.embedding.embed_query(question)
+        return self._retrieve_many([question], [question_vector], k)[0], question_vector
+
+    def embed_questions(self, questions: List[str]) -> List[List[float]]:
+        """여러 질문을 embed_batch_size 배치로 한 번에 임베딩 (일괄 질의용)"""
+        batch_size = max(1, self.config.get("embed_batch_size", 256))
+        vectors = []
+        for start in range(0, len(questions), batch_size):
+            with metrics.span("query_embed"):
+                vectors.extend(self.embedding.embed_documents(questions[start:start + batch_size]))
+        return vectors
+
+    def _retrieve_many(self, questions: List[str], question_vectors: List,
+                       k: Optional[int] = None) -> List[List]:
+        """임베딩된 질문들의 상위 k개 청크 검색 - 밀집 검색은 FAISS 한 번 호출로 처리"""
+        top_k = k or self.config.get("top_k", 3)
+        with self._lock, metrics.span("search"):
+            if self.vectorstore is None:
+                return [[] for _ in questions]
+            if self.config.get("retrieval_mode", "hybrid") != "hybrid":
+                results = self._dense_search(question_vectors, top_k)
+            else:
+                # 밀집/희소 후보를 각각 hybrid_fetch_k 개씩 가져와 RRF 로 융합
+                fetch_k = max(top_k, self.config.get("hybrid_fetch_k", 20))
+                results = []
+                for question, dense_ids in zip(questions, self._dense_search(question_vectors, fetch_k)):
+                    sparse_ids = [chunk_id for chunk_id, _ in self.sparse_index.search(question, fetch_k)]
+                    fused = reciprocal_rank_fusion(
+                        [dense_ids, sparse_ids], k=self.config.get("rrf_k", 60)
+                    )[:top_k]
+                    results.append([chunk_id for chunk_id, _ in fused])
+
+            # Document 는 최종 결과에 대해서만 생성
+            docstore = self.vectorstore.docstore
+            return [[docstore.search(chunk_id) for chunk_id in chunk_ids] for chunk_ids in results]
+
+    def _record_context_stats(self, stats: dict):
+        """마지막 질의와 누적 컨텍스트 통계 갱신"""
+        with self._lock:
+            self.last_context_stats = stats
+            totals = self.context_totals
+            totals["queries"] += 1
+            for key in ("raw_tokens", "context_tokens", "tokens_saved", "baseline_tokens"):
+                totals[key] += stats[key]
+
+    def _dense_search(self, question_vectors: List, k: int) -> List[List[str]]:
+        """FAISS 인덱스에서 직접 질문별 상위 k개 청크 id 검색 (Document 생성 없음)
+
+        원본 벡터 파일이 있고 rescore_k 가 k 보다 크면 rescore_k 개 후보를 원본 벡터로 다시 정렬합니다.
+        """
+        import numpy as np
+        from .. import vector_index
+        from ..quantization import rescore
+
+        query = np.asarray(question_vectors, dtype=np.float32)
+        exact = getattr(self.vectorstore, "exact_vectors", None)
+        rescore_k = self.config.get("rescore_k", 0) if exact is not None else 0
+        positions = vector_index.search(self.vectorstore, query, max(k, rescore_k))
+        id_map = self.vectorstore.index_to_docstore_id
+        results = [[id_map[int(pos)] for pos in row if pos != -1] for row in positions]
+        if rescore_k > k:
+            results = [rescore(exact, q, ids, k) for q, ids in zip(query, results)]
+        return results
+
+    def _fetch_k(self) -> int:
+        """컨텍스트 구성용 후보 수 (context_fetch_k, 0이면 top_k 의 3배)"""
+        top_k = self.config.get("top_k", 3)
+        return max(top_k, self.config.get("context_fetch_k", 0) or 3 * top_k)
+
+    def prepare(self, question: str, chat_history: List,
+                retrieved: Optional[Tuple[List, List[float]]] = None) -> dict:
+        """검색 및 프롬프트 입력 준비
+
+        retrieved 에 미리 검색한 (문서, 질문 벡터)를 주면 검색을 건너뜁니다.
+        """
         # 로드된 파일 목록 문자열 생성
         file_list_str = ", ".join(self.loaded_pdfs) if self.loaded_pdfs else "없음"
         file_count = len(self.loaded_pdfs)
@@ -168,42 +879,294 @@ Content rules:
         # 질문 언어 감지
         answer_language = self._detect_language(question)
 
-        # 문서 검색
-        docs = self.retriever.invoke(question)
+        # 후보를 넉넉히 검색한 뒤 합치기/MMR/토큰 예산으로 컨텍스트 구성
+        docs, question_vector = retrieved or self._retrieve(question, self._fetch_k())
+        with metrics.span("context"):
+            context, chunk_ids, sources, context_stats = build_context(
+                docs, self.config,
+                lambda chunk_id, text: self.sparse_index.counts(chunk_id) or term_counts(text),
+            )
+        self._record_context_stats(context_stats)
+
+        cache_key = None
+        if self.answer_cache:
+            # id 가 없는 청크가 섞이면 컨텍스트 내용 해시로 대신 구분
+            if not all(chunk_ids):
+                chunk_ids = [hashlib.sha256(context.encode("utf-8")).hexdigest()]
+            cache_key = AnswerCache.make_context_key(
+                chunk_ids,
+                self.config.get("model"),
+                self.config.get("temperature", 0.3),
+                answer_language,
+                chat_history,
+            )
+
+        return {
+            "question": question,
+            "chat_history": chat_history,
+            "context": context,
+            "file_info": file_info,
+            "answer_language": answer_language,
+            "question_vector": question_vector,
+            "cache_key": cache_key,
+            "context_stats": context_stats,
+            # 후보 전체가 아니라 컨텍스트에 실제로 담긴 청크의 출처
+            "sources": sources,
+        }
 
-        # 출처 포함 컨텍스트
-        context_parts = []
-        for doc in docs:
-            source = doc.metadata.get("source_file", "Unknown")
-            context_parts.append(f"[출처: {source}]\n{doc.page_content}")
+    def prepare_many(self, questions: List[str]) -> List[dict]:
+        """여러 질문을 한 번에 임베딩/검색해 프롬프트 입력 준비 (대화 기록 없음)"""
+        vectors = self.embed_questions(questions)
+        docs_list = self._retrieve_many(questions, vectors, self._fetch_k())
+        return [
+            self.prepare(question, [], retrieved=(docs, vector))
+            for question, docs, vector in zip(questions, docs_list, vectors)
+        ]
 
-        context = "\n\n".join(context_parts)
+    def _build_chain(self, prepared: dict):
+        """프롬프트 체인 구성 (file_list, answer_language 변수 추가)
 
-        # 체인 실행 (file_list, answer_language 변수 추가)
-        chain = (
+        LLM 은 첫 토큰/전체 시간을 따로 재기 위해 query/stream_query 에서 호출합니다.
+        """
+        return (
             {
-                "context": lambda x: context,
+                "context": lambda x: prepared["context"],
                 "question": itemgetter("question"),
                 "chat_history": itemgetter("chat_history"),
-                "file_list": lambda x: file_info,
-                "answer_language": lambda x: answer_language,
+                "file_list": lambda x: prepared["file_info"],
+                "answer_language": lambda x: prepared["answer_language"],
             }
             | self.prompt
-            | self.llm
-            | StrOutputParser()
         )
 
-        response = chain.invoke(
-            {
-                "question": question,
-                "chat_history": chat_history,
-            }
-        )
+    def _render_prompt(self, prepared: dict):
+        """프롬프트 렌더링"""
+        with metrics.span("prompt_render"):
+            return self._build_chain(prepared).invoke(
+                {
+                    "question": prepared["question"],
+                    "chat_history": prepared["chat_history"],
+                }
+            )
+
+    def _cached_answer(self, prepared: dict) -> Optional[str]:
+        """답변 캐시 조회"""
+        if not prepared["cache_key"]:
+            return None
+        return self.answer_cache.lookup(prepared["question_vector"], prepared["cache_key"])
 
+    def _store_answer(self, prepared: dict, answer: str):
+        """답변 캐시 저장"""
+        if prepared["cache_key"] and answer:
+            self.answer_cache.put(
+                prepared["question_vector"], prepared["cache_key"], answer, prepared["question"]
+            )
+
+    def answer(self, prepared: dict) -> str:
+        """준비된 입력으로 답변 생성 (답변 캐시 사용)"""
+        cached = self._cached_answer(prepared)
+        if cached is not None:
+            return cached
+
+        prompt_value = self._render_prompt(prepared)
+        with metrics.span("llm_total"):
+            response = self.llm.invoke(prompt_value).content
+        self._store_answer(prepared, response)
         return response
 
-    def load_vectorstore(self, vectorstore):
-        self.vectorstore = vectorstore
-        self.retriever = self.vectorstore.as_retriever(
-            search_kwargs={"k": self.config.get("top_k", 3)}
+    def query(self, question: str, chat_history: List = None) -> str:
+        """질문 처리"""
+        if not self.retriever:
+            return "⚠️ PDF를 먼저 로드해주세요."
+
+        with metrics.span("query_total"):
+            return self.answer(self.prepare(question, chat_history or []))
+
+    def stream_query(self, question: str, chat_history: List = None) -> Iterator[str]:
+        """질문 처리 - 생성되는 토큰을 도착 순서대로 반환"""
+        if not self.retriever:
+            yield "⚠️ PDF를 먼저 로드해주세요."
+            return
+
+        start = time.perf_counter()
+        yield from self.stream_answer(self.prepare(question, chat_history or []))
+        metrics.observe("query_total", time.perf_counter() - start)
+
+    def stream_answer(self, prepared: dict) -> Iterator[str]:
+        """준비된 입력으로 답변 생성 - 토큰을 도착 순서대로 반환"""
+        cached = self._cached_answer(prepared)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt_value = self._render_prompt(prepared)
+        tokens = []
+        llm_start = time.perf_counter()
+        for chunk in self.llm.stream(prompt_value):
+            if not tokens:
+                metrics.observe("llm_first_token", time.perf_counter() - llm_start)
+            tokens.append(chunk.content)
+            yield chunk.content
+        metrics.observe("llm_total", time.perf_counter() - llm_start)
+        self._store_answer(prepared, "".join(tokens))
+
+    async def aanswer(self, prepared: dict) -> str:
+        """answer 의 비동기 버전 (LLM 클라이언트의 비동기 연결 풀 사용)"""
+        cached = self._cached_answer(prepared)
+        if cached is not None:
+            return cached
+
+        prompt_value = self._render_prompt(prepared)
+        llm_start = time.perf_counter()
+        response = (await self.llm.ainvoke(prompt_value)).content
+        metrics.observe("llm_total", time.perf_counter() - llm_start)
+        self._store_answer(prepared, response)
+        return response
+
+    async def astream_answer(self, prepared: dict) -> AsyncIterator[str]:
+        """stream_answer 의 비동기 버전"""
+        cached = self._cached_answer(prepared)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt_value = self._render_prompt(prepared)
+        tokens = []
+        llm_start = time.perf_counter()
+        async for chunk in self.llm.astream(prompt_value):
+            if not tokens:
+                metrics.observe("llm_first_token", time.perf_counter() - llm_start)
+            tokens.append(chunk.content)
+            yield chunk.content
+        metrics.observe("llm_total", time.perf_counter() - llm_start)
+        self._store_answer(prepared, "".join(tokens))
+
+    def _subset_vectorstore(self, names: List[str]):
+        """지정한 문서의 청크만 담은 새 벡터스토어 (잠금 안에서 호출)
+
+        원본 벡터 파일이 있으면 그 벡터로, 없으면 인덱스에서 복원한 벡터로
+        현재 설정에 맞는 인덱스를 만듭니다 (IVF-PQ 는 근사값). 청크 순서는 인덱스 순서를 따릅니다.
+        """
+        import faiss
+        from langchain_community.vectorstores import FAISS
+        from .. import vector_index
+        from ..chunk_store import ChunkStore
+
+        keep = {chunk_id for name in names for chunk_id in self.doc_ids.get(name, [])}
+        ordered = [chunk_id for _, chunk_id in sorted(self.vectorstore.index_to_docstore_id.items())]
+        positions = [pos for pos, chunk_id in enumerate(ordered) if chunk_id in keep]
+        ids = [ordered[pos] for pos in positions]
+        exact = getattr(self.vectorstore, "exact_vectors", None)
+        if exact is not None:
+            vectors = exact.get(ids)
+        else:
+            vector_index.ensure_writable(self.vectorstore)
+            vectors = vector_index.reconstruct_all(self.vectorstore.index)[positions]
+
+        docstore = self.vectorstore.docstore
+        if hasattr(docstore, "iter_chunks"):
+            chunks = {chunk_id: (text, metadata)
+                      for chunk_id, text, metadata in docstore.iter_chunks() if chunk_id in keep}
+        else:
+            chunks = {chunk_id: (doc.page_content, doc.metadata)
+                      for chunk_id in ids for doc in (docstore.search(chunk_id),)}
+
+        subset = FAISS(
+            embedding_function=self.vectorstore.embedding_function,
+            index=faiss.IndexFlatL2(self.vectorstore.index.d),
+            docstore=ChunkStore(),
+            index_to_docstore_id={},
         )
+        vector_index.prepare_for_add(subset, vectors, self.config)
+        subset.add_embeddings([(chunks[chunk_id][0], vector) for chunk_id, vector in zip(ids, vectors)],
+                              metadatas=[chunks[chunk_id][1] for chunk_id in ids], ids=ids)
+        if exact is not None:
+            # 저장할 때 ids 순서로 읽기만 하므로 원본 벡터 파일을 그대로 공유
+            subset.exact_vectors = exact
+        return subset
+
+    def save_index(self, path: Path, names: Optional[List[str]] = None, extra: Optional[dict] = None):
+        """현재 인덱스를 pickle 없는 네이티브 형식으로 저장
+
+        names 를 주면 그 중 로드된 문서의 청크만 저장하고, extra 는 meta.json 에 함께 기록합니다.
+        """
+        from .. import store
+
+        with self._lock:
+            if self.vectorstore is None:
+                raise ValueError("로드된 문서가 없습니다")
+            loaded = self.get_loaded_pdfs()
+            if names is not None:
+                wanted = set(names)
+                names = [name for name in loaded if name in wanted]
+            else:
+                names = loaded
+            if not names:
+                raise ValueError("저장할 문서가 없습니다")
+            vectorstore = self.vectorstore
+            if len(names) < len(loaded):
+                vectorstore = self._subset_vectorstore(names)
+            store.save_store(Path(path), vectorstore, extra={
+                "doc_paths": {name: str(self.doc_paths[name]) for name in names if name in self.doc_paths},
+                **(extra or {}),
+            })
+            sparse = [
+                self.sparse_index.counts(chunk_id) or {}
+                for _, chunk_id in sorted(vectorstore.index_to_docstore_id.items())
+            ]
+            with open(Path(path) / "sparse.json", 'w', encoding='utf-8') as f:
+                json.dump(sparse, f, ensure_ascii=False)
+
+    def open_index(self, path: Path) -> int:
+        """저장된 인덱스를 메모리 맵으로 열어 현재 인덱스를 교체하고 청크 수 반환"""
+        from .. import store
+
+        path = Path(path)
+        vectorstore = store.open_store(path, self.embedding)
+        meta = store.read_meta(path)
+        sparse = None
+        sparse_file = path / "sparse.json"
+        if sparse_file.exists():
+            with open(sparse_file, 'r', encoding='utf-8') as f:
+                sparse = json.load(f)
+
+        with self._lock:
+            self.load_vectorstore(vectorstore, sparse)
+            self.doc_paths = {
+                name: Path(p) for name, p in meta.get("doc_paths", {}).items()
+                if name in self.doc_ids
+            }
+        return vectorstore.index.ntotal
+
+    def load_vectorstore(self, vectorstore, sparse: Optional[List[Dict[str, int]]] = None):
+        """벡터스토어 교체 후 문서별 청크 id 와 BM25 인덱스 복원
+
+        sparse 는 인덱스 순서의 청크별 토큰 빈도이며, 없으면 청크 텍스트에서 다시 계산합니다.
+        """
+        from .. import vector_index
+
+        self.vectorstore = vectorstore
+        if self.vectorstore.index.ntotal:
+            vector_index.prepare_for_add(self.vectorstore, [], self.config)
+        self._build_retriever()
+
+        # 메타데이터의 source_file 기준으로 문서별 청크 id 복원
+        self.doc_ids = {}
+        self.doc_paths = {}
+        self.sparse_index = self._new_sparse_index()
+        docstore = self.vectorstore.docstore
+        native = hasattr(docstore, "ids_by_source")
+        if native:
+            # 네이티브 저장소는 텍스트를 읽지 않고 id 만 조회
+            self.doc_ids = docstore.ids_by_source()
+        for pos, chunk_id in sorted(self.vectorstore.index_to_docstore_id.items()):
+            if native and sparse is not None:
+                counts = sparse[pos]
+            else:
+                doc = docstore.search(chunk_id)
+                counts = term_counts(doc.page_content)
+                if not native:
+                    name = doc.metadata.get("source_file", "Unknown")
+                    self.doc_ids.setdefault(name, []).append(chunk_id)
+            self.sparse_index.add([chunk_id], [counts])
+        self.loaded_pdfs = list(self.doc_ids)
@@ -0,0 +1,179 @@
+"""
+백그라운드 문서 수집 작업
+
+    job = jobs.submit([Path("a.pdf"), Path("b.pdf")])
+    jobs.get(job.id).snapshot()
+
+작업은 별도 스레드에서 실행되고, 문서 하나의 임베딩이 끝날 때마다 바로 검색 대상에
+추가됩니다 (RAGHandler 잠금 안에서 한 번에 교체). 그동안 이미 로드된 문서로 질의할 수 있습니다.
+진행량은 페이지/청크/임베딩/파일 수로 기록합니다.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from .pdf_pages import page_count
+
+# 목록에 남겨 둘 끝난 작업 수
+MAX_FINISHED_JOBS = 50
+
+STATUS_LABELS = {
+    "queued": "대기",
+    "running": "처리 중",
+    "done": "완료",
+    "failed": "실패",
+}
+
+
+def count_pages(pdf_path: Path) -> int:
+    """PDF 페이지 수 (진행률 계산용, 읽을 수 없으면 0)"""
+    try:
+        return page_count(pdf_path)
+    except Exception:
+        return 0
+
+
+class IngestJob:
+    """수집 작업 하나의 상태와 진행량"""
+
+    def __init__(self, paths: List[Path]):
+        self.id = uuid.uuid4().hex[:8]
+        self.paths = paths
+        self.status = "queued"
+        self.pages = 0
+        self.pages_total = 0
+        self.chunks = 0
+        self.embedded = 0
+        self.files_done = 0
+        self.files_total = len(paths)
+        self.results: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def advance(self, kind: str, n: int):
+        """RAGHandler 진행 콜백 - kind: pages, chunks, embedded, files"""
+        if not n:
+            return
+        with self._lock:
+            if kind == "files":
+                self.files_done += n
+            else:
+                setattr(self, kind, getattr(self, kind) + n)
+
+    def fraction(self) -> float:
+        """대략적인 진행률 (0~1) - 파싱 30%, 임베딩 70% 비중
+
+        전체 청크 수는 처리 전에 알 수 없으므로 파싱된 페이지 비율로 추정합니다.
+        """
+        if self._done.is_set():
+            return 1.0
+        if self.pages_total:
+            parsed = min(1.0, self.pages / self.pages_total)
+        else:
+            parsed = self.files_done / self.files_total if self.files_total else 0.0
+        embedded = self.embedded / self.chunks if self.chunks else 0.0
+        return min(0.99, parsed * (0.3 + 0.7 * min(1.0, embedded)))
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def describe(self) -> str:
+        """진행 상황 한 줄 요약"""
+        pages = f"{self.pages}/{self.pages_total}" if self.pages_total else str(self.pages)
+        return (
+            f"{STATUS_LABELS[self.status]} - 파일 {self.files_done}/{self.files_total}, "
+            f"페이지 {pages}, 청크 {self.chunks}, 임베딩 {self.embedded}"
+        )
+
+    def snapshot(self) -> dict:
+        """JSON 으로 내보낼 수 있는 상태"""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "files": [path.name for path in self.paths],
+                "files_done": self.files_done,
+                "files_total": self.files_total,
+                "pages": self.pages,
+                "pages_total": self.pages_total,
+                "chunks": self.chunks,
+                "embedded": self.embedded,
+                "progress": self.fraction(),
+                "elapsed": self.elapsed(),
+                "results": self.results,
+                "error": self.error,
+            }
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """작업이 끝날 때까지 대기 - 끝났으면 True"""
+        return self._done.wait(timeout)
+
+
+class JobManager:
+    """수집 작업 실행기 (ingest_job_workers 개 작업을 동시에 실행)"""
+
+    def __init__(self, rag_handler, config):
+        self.rag_handler = rag_handler
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, config.get("ingest_job_workers", 1)),
+            thread_name_prefix="rag-ingest",
+        )
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, paths: List[Path]) -> IngestJob:
+        """수집 작업 등록 후 바로 반환"""
+        job = IngestJob([Path(path) for path in paths])
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: IngestJob):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            job.pages_total = sum(count_pages(path) for path in job.paths)
+            job.results = self.rag_handler.process_multiple_pdfs(
+                job.paths, progress=job.advance, publish_each=True
+            )
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            job._done.set()
+
+    def _trim(self):
+        """오래된 끝난 작업부터 목록에서 제거"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        """등록 순서대로 작업 목록"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active(self) -> List[IngestJob]:
+        """대기 중이거나 처리 중인 작업"""
+        return [job for job in self.list() if job.finished is None]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
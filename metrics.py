@@ -0,0 +1,172 @@
+"""
+단계별 소요 시간 측정 및 집계
+
+    from .metrics import metrics
+    with metrics.span("search"):
+        ...
+
+측정값은 단계별 히스토그램(Prometheus 와 같은 누적 버킷)으로 모읍니다.
+비활성화하면 span() 이 아무 일도 하지 않는 공유 객체를 반환하므로 비용이 거의 없습니다.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# 버킷 상한(초) - 임베딩 한 건(ms 미만)부터 긴 LLM 응답(수십 초)까지
+BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# 표시 순서와 설명
+STAGES = {
+    "pdf_load": "PDF 로드",
+    "split": "청크 분할",
+    "embed": "임베딩",
+    "index_add": "인덱스 추가",
+    "query_embed": "질문 임베딩",
+    "search": "검색",
+    "context": "컨텍스트 구성",
+    "prompt_render": "프롬프트 렌더링",
+    "llm_first_token": "LLM 첫 토큰",
+    "llm_total": "LLM 전체",
+    "query_total": "질의 전체",
+}
+
+
+class Histogram:
+    """고정 버킷 히스토그램"""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """버킷 안에서 선형 보간한 분위수 (마지막 버킷은 최댓값 사용)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+
+class _NoopSpan:
+    """비활성화 상태에서 반환하는 빈 span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, registry: "Metrics", name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """프로세스 전역 단계별 히스토그램 모음 (스레드 안전)"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """with 블록의 소요 시간을 name 단계로 기록"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """소요 시간(초) 직접 기록 (다른 프로세스에서 잰 값 등)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def _ordered(self) -> List[Tuple[str, Histogram]]:
+        names = [name for name in STAGES if name in self._histograms]
+        names += sorted(name for name in self._histograms if name not in STAGES)
+        return [(name, self._histograms[name]) for name in names]
+
+    def snapshot(self) -> List[dict]:
+        """단계별 요약 (횟수, 평균/p50/p95/최대 ms)"""
+        with self._lock:
+            return [
+                {
+                    "stage": name,
+                    "label": STAGES.get(name, name),
+                    "count": histogram.count,
+                    "mean_ms": histogram.total / histogram.count * 1000 if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.5) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "max_ms": histogram.max * 1000,
+                    "total_s": histogram.total,
+                }
+                for name, histogram in self._ordered()
+            ]
+
+    def to_prometheus(self, prefix: str = "rag_gpt") -> str:
+        """Prometheus 텍스트 형식 출력"""
+        metric = f"{prefix}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in each RAG pipeline stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, histogram in self._ordered():
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.total}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def configure(enabled: Optional[bool]):
+    """설정값(metrics_enabled)으로 측정 켜기/끄기"""
+    if enabled is not None:
+        metrics.enabled = bool(enabled)
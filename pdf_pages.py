@@ -0,0 +1,222 @@
+"""
+페이지 단위 PDF 추출 - 큰 문서를 창(window) 단위로 나눠 읽기
+
+    for chunks, load_time, split_time, pages in iter_chunk_windows(path, 500, 50, window=32):
+        ...
+
+PDF 전체 페이지를 한꺼번에 Document 로 만들지 않고, window 페이지씩 읽어 바로 청크로 분할합니다.
+PdfReader 에는 경로 대신 열린 파일을 넘겨 파일 전체를 메모리로 읽지 않게 하고,
+창이 끝날 때마다 pypdf 가 캐시한 객체를 비워 추출 중인 데이터가 창 크기에 묶이도록 합니다.
+페이지가 많은 문서는 페이지 범위를 여러 프로세스에 나눠 처리할 수 있습니다 (결과는 페이지 순서대로 반환).
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# 창 하나의 결과: (청크, 추출 시간, 분할 시간, 페이지 수)
+Window = Tuple[List, float, float, int]
+
+
+@contextmanager
+def open_pdf(pdf_path: Path):
+    """파일을 연 채로 PdfReader 생성 (페이지는 읽을 때마다 파일에서 가져옴)"""
+    from pypdf import PdfReader
+
+    with open(pdf_path, 'rb') as f:
+        yield PdfReader(f)
+
+
+def page_count(pdf_path: Path) -> int:
+    """PDF 페이지 수 (본문은 읽지 않음)"""
+    with open_pdf(pdf_path) as reader:
+        return len(reader.pages)
+
+
+def _release(reader):
+    """pypdf 가 읽어 둔 객체 캐시 비우기 (필요하면 파일에서 다시 읽음)"""
+    cache = getattr(reader, "resolved_objects", None)
+    if isinstance(cache, dict):
+        cache.clear()
+
+
+def iter_pages(pdf_path: Path, start: int = 0, stop: Optional[int] = None,
+               reader=None) -> Iterator:
+    """start 부터 stop 전까지 페이지를 하나씩 Document 로 반환
+
+    메타데이터는 PyPDFLoader 와 같은 source, total_pages, page(0부터), page_label 입니다.
+    reader 를 넘기면 이미 열린 PdfReader 를 사용합니다.
+    """
+    from langchain_core.documents import Document
+
+    if reader is None:
+        with open_pdf(pdf_path) as opened:
+            yield from iter_pages(pdf_path, start, stop, reader=opened)
+        return
+
+    total = len(reader.pages)
+    stop = total if stop is None else min(stop, total)
+    for page_number in range(start, stop):
+        text = reader.pages[page_number].extract_text().strip()
+        yield Document(page_content=text, metadata={
+            "source": str(pdf_path),
+            "total_pages": total,
+            "page": page_number,
+            "page_label": _page_label(reader, page_number),
+        })
+
+
+def _page_label(reader, page_number: int) -> str:
+    # reader.page_labels 는 호출할 때마다 전체 페이지의 레이블을 계산하므로 한 페이지만 계산
+    try:
+        from pypdf._page_labels import index2label
+    except ImportError:
+        return reader.page_labels[page_number]
+    return index2label(reader, page_number)
+
+
+def _splitter(chunk_size: int, chunk_overlap: int):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    # start_index 는 컨텍스트 구성 시 이어지는 청크를 합치는 데 사용
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True,
+    )
+
+
+def split_page_range(pdf_path: Path, start: int, stop: Optional[int],
+                     chunk_size: int, chunk_overlap: int, reader=None) -> Window:
+    """페이지 범위를 읽어 청크로 분할 - (청크, 추출 시간, 분할 시간, 페이지 수)
+
+    페이지마다 바로 분할하므로 범위 전체의 페이지 텍스트를 한꺼번에 들고 있지 않습니다.
+    """
+    if reader is None:
+        with open_pdf(pdf_path) as opened:
+            return split_page_range(pdf_path, start, stop, chunk_size, chunk_overlap, reader=opened)
+
+    splitter = _splitter(chunk_size, chunk_overlap)
+    chunks = []
+    load_time = split_time = 0.0
+    pages = 0
+    iterator = iter_pages(pdf_path, start, stop, reader=reader)
+    while True:
+        load_start = time.perf_counter()
+        page = next(iterator, None)
+        load_time += time.perf_counter() - load_start
+        if page is None:
+            break
+        pages += 1
+        split_start = time.perf_counter()
+        page_chunks = splitter.split_documents([page])
+        for chunk in page_chunks:
+            chunk.metadata["source_file"] = Path(pdf_path).name
+        chunks.extend(page_chunks)
+        split_time += time.perf_counter() - split_start
+    _release(reader)
+    return chunks, load_time, split_time, pages
+
+
+# 워커 프로세스마다 마지막으로 연 PDF 하나를 열어 둠 (범위마다 페이지 트리를 다시 읽지 않도록)
+_worker_pdf = {}
+
+
+def _split_range_in_worker(pdf_path: Path, start: int, stop: int,
+                           chunk_size: int, chunk_overlap: int) -> Window:
+    """프로세스 풀 작업 - 같은 파일의 다음 범위는 열어 둔 PdfReader 재사용"""
+    from pypdf import PdfReader
+
+    stat = os.stat(pdf_path)
+    key = (str(pdf_path), stat.st_size, stat.st_mtime_ns)
+    if _worker_pdf.get("key") != key:
+        if "file" in _worker_pdf:
+            _worker_pdf["file"].close()
+        f = open(pdf_path, 'rb')
+        _worker_pdf.update(key=key, file=f, reader=PdfReader(f))
+    return split_page_range(pdf_path, start, stop, chunk_size, chunk_overlap,
+                            reader=_worker_pdf["reader"])
+
+
+def iter_chunk_windows(pdf_path: Path, chunk_size: int, chunk_overlap: int, window: int = 32,
+                       workers: int = 1, total_pages: Optional[int] = None) -> Iterator[Window]:
+    """window 페이지씩 분할한 결과를 페이지 순서대로 반환
+
+    workers 가 2 이상이면 페이지 범위를 프로세스 풀에 나눠 맡기되, 소비가 늦어도
+    workers + 1 개 범위까지만 미리 처리해 메모리 사용량을 창 크기에 묶어 둡니다.
+    """
+    window = max(1, window)
+    if total_pages is None:
+        total_pages = page_count(pdf_path)
+    ranges = [(start, min(start + window, total_pages)) for start in range(0, total_pages, window)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        with open_pdf(pdf_path) as reader:
+            for start, stop in ranges:
+                yield split_page_range(pdf_path, start, stop, chunk_size, chunk_overlap, reader=reader)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for start, stop in ranges:
+            in_flight.append(executor.submit(
+                _split_range_in_worker, pdf_path, start, stop, chunk_size, chunk_overlap
+            ))
+            if len(in_flight) > workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def prefetch(items: Iterable, depth: int = 2) -> Iterator:
+    """백그라운드 스레드에서 최대 depth 개까지 미리 읽어 두는 반복자
+
+    PDF 추출(파이썬 코드)과 임베딩(모델 연산)이 겹쳐 실행되도록 사용합니다.
+    소비하는 쪽이 중간에 멈추면 읽기 스레드도 멈춥니다.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+
+    thread = threading.Thread(target=produce, name="rag-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
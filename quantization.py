@@ -0,0 +1,196 @@
+"""
+양자화 인덱스용 원본 벡터 파일과 재점수, 양자화 비교 보고서
+
+int8/PQ 인덱스는 메모리에 코드만 두고, 원본 float32 벡터는 디스크 파일에 보관합니다.
+rescore_k 가 0보다 크면 양자화 인덱스에서 rescore_k 개 후보를 찾은 뒤
+후보의 원본 벡터만 파일에서 읽어 정확한 거리로 다시 정렬합니다.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ExactVectors:
+    """청크 id 별 원본 float32 벡터를 디스크 파일에 보관
+
+    행은 추가 순서대로 파일 끝에 쓰고, 삭제된 행은 비워 둡니다.
+    저장된 인덱스의 파일(exact.f32)을 열었을 때는 읽기 전용으로 쓰다가
+    처음 변경할 때 임시 파일로 복사합니다 (저장본은 바뀌지 않음).
+    """
+
+    def __init__(self, dim: int, path: Optional[Path] = None, rows: Optional[Dict[str, int]] = None):
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self._rows: Dict[str, int] = dict(rows or {})
+        self._lock = threading.Lock()
+        self._finalizer = None
+        if path is None:
+            self._open_temp()
+            self.read_only = False
+        else:
+            self.path = str(path)
+            self._file = open(self.path, 'rb')
+            self.read_only = True
+        self._n_rows = os.fstat(self._file.fileno()).st_size // self.row_bytes
+
+    def _open_temp(self, source: Optional[str] = None):
+        # /tmp 는 메모리 기반(tmpfs)일 수 있으므로 홈 디렉터리 아래에 둠
+        directory = Path.home() / ".rag_gpt" / "exact"
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="vectors_", suffix=".f32", dir=directory)
+        os.close(fd)
+        if source:
+            shutil.copyfile(source, path)
+        self.path = path
+        self._file = open(path, 'r+b')
+        # 프로세스 종료나 벡터스토어 교체 시 임시 파일 삭제
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    @classmethod
+    def open(cls, path: Path, ids: List[str], dim: int) -> "ExactVectors":
+        """save() 로 쓴 파일 열기 - ids 는 파일 행 순서의 청크 id"""
+        return cls(dim, path=path, rows={chunk_id: i for i, chunk_id in enumerate(ids)})
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _make_writable(self):
+        if self.read_only:
+            self._file.close()
+            self._open_temp(source=self.path)
+            self.read_only = False
+
+    def add(self, ids: List[str], vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            self._make_writable()
+            self._file.seek(self._n_rows * self.row_bytes)
+            self._file.write(vectors.tobytes())
+            self._file.flush()
+            for i, chunk_id in enumerate(ids):
+                self._rows[chunk_id] = self._n_rows + i
+            self._n_rows += len(ids)
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for chunk_id in ids:
+                self._rows.pop(chunk_id, None)
+
+    def get(self, ids: List[str]) -> np.ndarray:
+        """청크 id 순서대로 원본 벡터 읽기 (행마다 pread 한 번)"""
+        fd = self._file.fileno()
+        out = np.empty((len(ids), self.dim), dtype=np.float32)
+        for i, chunk_id in enumerate(ids):
+            data = os.pread(fd, self.row_bytes, self._rows[chunk_id] * self.row_bytes)
+            out[i] = np.frombuffer(data, dtype=np.float32)
+        return out
+
+    def save(self, path: Path, ids: List[str]):
+        """ids 순서(인덱스 위치 순서)로 새 파일에 저장"""
+        batch = 4096
+        with open(path, 'wb') as f:
+            for start in range(0, len(ids), batch):
+                f.write(self.get(ids[start:start + batch]).tobytes())
+
+    def close(self):
+        self._file.close()
+        if self._finalizer:
+            self._finalizer()
+
+
+def rescore(exact: ExactVectors, query: np.ndarray, ids: List[str], k: int) -> List[str]:
+    """후보 id 를 원본 벡터와의 L2 거리로 다시 정렬해 상위 k개 반환"""
+    if not ids:
+        return ids
+    vectors = exact.get(ids)
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    return [ids[i] for i in np.argsort(distances, kind="stable")[:k]]
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size if truth.size else 0.0
+
+
+def compare(vectors: np.ndarray, config, k: int = 10, n_queries: int = 200,
+            rescore_k: int = 50, seed: int = 0) -> List[dict]:
+    """현재 말뭉치 벡터로 저장 방식별 메모리/검색 지연/recall@k 비교
+
+    질의는 말뭉치 벡터 중 n_queries 개를 골라 약간의 잡음을 더해 만들고,
+    정답은 float32 flat 인덱스의 상위 k개입니다. 재점수 항목의 지연 시간에는
+    디스크(원본 벡터 파일)에서 후보를 읽는 시간이 포함됩니다.
+    말뭉치가 k개보다 작으면 k 를 말뭉치 크기로 줄이며, 각 행의 k 에 실제로 사용한 값을 담습니다.
+    """
+    from . import vector_index
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, size=min(n_queries, n), replace=False)
+    noise = rng.normal(scale=float(vectors.std()) * 0.1, size=(len(sample), dim))
+    queries = (vectors[sample] + noise).astype(np.float32)
+    k = min(k, n)
+
+    exact_index = vector_index.build_index("flat", dim, vectors, config)
+    exact_index.add(vectors)
+    _, truth = exact_index.search(queries, k)
+
+    ids = [str(i) for i in range(n)]
+    exact_file = ExactVectors(dim)
+    exact_file.add(ids, vectors)
+
+    variants = [("float32 (flat)", "none", False)]
+    for quantization in ("int8", "pq"):
+        if quantization == "pq" and (dim % config.get("pq_m", 16) or n < 2 ** config.get("pq_nbits", 8)):
+            continue
+        variants.append((f"{quantization}", quantization, False))
+        if rescore_k:
+            variants.append((f"{quantization} + 재점수({rescore_k})", quantization, True))
+
+    rows = []
+    built = {}
+    try:
+        for label, quantization, use_rescore in variants:
+            if quantization not in built:
+                index = vector_index.build_index("flat", dim, vectors, config, quantization=quantization)
+                index.add(vectors)
+                built[quantization] = index
+            index = built[quantization]
+
+            latencies, found = [], []
+            for query in queries:
+                start = time.perf_counter()
+                _, positions = index.search(query[None, :], max(k, rescore_k) if use_rescore else k)
+                row = [str(pos) for pos in positions[0] if pos != -1]
+                if use_rescore:
+                    row = rescore(exact_file, query, row, k)
+                latencies.append(time.perf_counter() - start)
+                found.append([int(pos) for pos in row])
+
+            values = np.asarray(latencies) * 1000
+            rows.append({
+                "variant": label,
+                "memory_bytes": vector_index.vector_bytes(index),
+                "disk_bytes": n * dim * 4 if use_rescore else 0,
+                "mean_ms": float(values.mean()),
+                "p95_ms": float(np.percentile(values, 95)),
+                "k": k,
+                "recall": _recall(found, truth),
+            })
+    finally:
+        exact_file.close()
+    return rows
@@ -0,0 +1,363 @@
+"""
+HTTP API 서버 (--serve) - FastAPI/uvicorn
+
+    rag-gpt --serve --port 8000 --pdf document.pdf
+
+    GET    /health              상태 (문서/청크 수, 처리 중/대기 요청 수)
+    GET    /metrics             단계별 소요 시간 (Prometheus 텍스트 형식)
+    GET    /documents           로드된 문서 목록
+    POST   /ingest              {"paths": ["a.pdf", ...], "background": false} serve_ingest_root 아래 PDF 로드
+    GET    /jobs                백그라운드 수집 작업 목록
+    GET    /jobs/{id}           작업 진행 상황 (페이지/청크/임베딩 수)
+    DELETE /documents/{name}    문서 하나 제거
+    POST   /query               {"question": "...", "session": "이름"(선택)}
+    POST   /query/stream        같은 입력, server-sent events 로 토큰 스트리밍
+    GET    /sessions            세션 목록
+    GET    /sessions/{name}     세션 메시지
+
+검색/컨텍스트 구성 같은 동기 작업은 스레드 풀에서, LLM 호출은 비동기 클라이언트(ainvoke/astream)로
+실행하므로 모든 요청이 한 LLM 클라이언트의 연결 풀을 공유합니다.
+동시 처리 수(web_concurrency)를 넘는 요청은 대기열(web_queue_size)에서 기다리고,
+대기열도 가득 차면 바로 503 으로 거절합니다.
+
+/ingest 는 서버의 파일을 읽으므로 serve_ingest_root 를 설정해야 켜지고, 그 폴더 아래 경로만 허용합니다.
+세션별 대화 핸들러는 최근 사용한 serve_max_sessions 개까지만 메모리에 두고,
+serve_session_ttl 초 동안 쓰이지 않은 핸들러는 정리합니다 (대화 기록은 세션 파일에 남음).
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from .handlers.chat_handler import ChatHandler, check_session_name
+from .metrics import metrics
+
+class IngestRequest(BaseModel):
+    paths: List[str]
+    background: bool = False
+
+
+class QueryRequest(BaseModel):
+    question: str
+    session: Optional[str] = None
+
+
+class RequestGate:
+    """동시 처리 수와 대기열 길이 제한 (이벤트 루프 안에서 생성)"""
+
+    def __init__(self, concurrency: int, queue_size: int):
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.queue_size = queue_size
+        self.waiting = 0
+        self.active = 0
+        self.closed = False
+
+    def check(self):
+        """종료 중이거나 대기열이 가득 차면 503"""
+        if self.closed:
+            raise HTTPException(503, "서버를 종료하는 중입니다", headers={"Retry-After": "5"})
+        if self._semaphore.locked() and self.waiting >= self.queue_size:
+            raise HTTPException(503, "대기 중인 요청이 너무 많습니다", headers={"Retry-After": "1"})
+
+    async def acquire(self):
+        """처리 슬롯 획득 (빈 슬롯이 없으면 대기열에서 기다림)"""
+        self.check()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self._idle.clear()
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+        if not self.active:
+            self._idle.set()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def drain(self, timeout: float):
+        """새 요청을 거절하고 처리 중인 요청이 끝날 때까지 대기 (최대 timeout 초)"""
+        self.closed = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class _SessionSlot:
+    """메모리에 둔 세션 하나 - 대화 핸들러, 요청 순서를 지키는 잠금, 사용 중인 요청 수"""
+
+    def __init__(self, chat: ChatHandler):
+        self.chat = chat
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.last_used = time.monotonic()
+
+
+class APIServer:
+    """RagGPT 인스턴스를 공유하는 HTTP API"""
+
+    def __init__(self, rag_gpt_instance):
+        self.rag = rag_gpt_instance
+        self.config = rag_gpt_instance.config
+        self.gate: Optional[RequestGate] = None
+        # 세션 이름 -> 슬롯 (최근 사용 순, 이벤트 루프 안에서만 변경)
+        self._sessions: "OrderedDict[str, _SessionSlot]" = OrderedDict()
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        concurrency = self.config.get("web_concurrency", 16)
+        self.gate = RequestGate(concurrency, self.config.get("web_queue_size", 64))
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rag-api")
+        asyncio.get_running_loop().set_default_executor(executor)
+        try:
+            yield
+        finally:
+            # uvicorn 이 연결을 닫은 뒤에도 남은 작업이 있으면 마저 끝내고 세션을 디스크에 반영
+            await self.gate.drain(self.config.get("serve_shutdown_timeout", 30))
+            for slot in self._sessions.values():
+                slot.chat.flush()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    async def _run(func, *args):
+        """동기 함수를 스레드 풀에서 실행"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _ingest_paths(self, paths: List[str]) -> List[Path]:
+        """/ingest 경로를 serve_ingest_root 기준으로 확인 (설정이 없으면 403)
+
+        상대 경로는 그 폴더 기준이고, 심볼릭 링크를 따라간 실제 경로도 폴더 안에 있어야 합니다.
+        """
+        root = self.config.get("serve_ingest_root", "")
+        if not root:
+            raise HTTPException(403, "서버 경로 수집이 꺼져 있습니다 (serve_ingest_root 설정 필요)")
+        root = Path(root).expanduser().resolve()
+        resolved = []
+        for path in paths:
+            target = (root / Path(path).expanduser()).resolve()
+            try:
+                target.relative_to(root)
+            except ValueError:
+                raise HTTPException(403, f"serve_ingest_root 밖의 경로입니다: {path}")
+            resolved.append(target)
+        return resolved
+
+    def _check_ready(self):
+        if not self.rag.rag_handler.retriever:
+            raise HTTPException(400, "PDF를 먼저 로드해주세요")
+
+    @staticmethod
+    def _check_session_name(name: str):
+        try:
+            check_session_name(name)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+    def _evict_sessions(self) -> List[ChatHandler]:
+        """사용 중이 아닌 세션 중 serve_session_ttl 초 넘게 쓰지 않았거나
+        serve_max_sessions 개를 넘는 오래된 것부터 메모리에서 내리고 그 핸들러 반환"""
+        ttl = self.config.get("serve_session_ttl", 1800)
+        limit = max(1, self.config.get("serve_max_sessions", 256))
+        now = time.monotonic()
+        idle = [name for name, slot in self._sessions.items() if not slot.users]
+        excess = len(self._sessions) - limit
+        evicted = []
+        for name in idle:
+            if excess > 0 or (ttl and now - self._sessions[name].last_used > ttl):
+                evicted.append(self._sessions.pop(name).chat)
+                excess -= 1
+        return evicted
+
+    @asynccontextmanager
+    async def _session(self, name: Optional[str], keep: bool = True):
+        """세션 대화 핸들러 (세션 이름이 없으면 None - 기록 없이 질의)
+
+        keep 이 False 면 메모리에 없는 세션을 등록하지 않고 한 번만 읽습니다 (조회용).
+        """
+        if not name:
+            yield None
+            return
+        self._check_session_name(name)
+        slot = self._sessions.get(name)
+        if slot is None:
+            slot = _SessionSlot(ChatHandler(self.config))
+            if keep:
+                self._sessions[name] = slot
+        else:
+            self._sessions.move_to_end(name)
+        slot.users += 1
+        try:
+            async with slot.lock:
+                await self._run(slot.chat.load_session, name)
+                yield slot.chat
+        finally:
+            slot.users -= 1
+            slot.last_used = time.monotonic()
+            for chat in self._evict_sessions():
+                await self._run(chat.flush)
+
+    async def _prepare(self, question: str, chat: Optional[ChatHandler]) -> dict:
+        handler = self.rag.rag_handler
+        history = []
+        if chat is not None:
+            history = await self._run(chat.get_prompt_history, handler.summarize_history)
+        return await self._run(handler.prepare, question, history)
+
+    async def _save(self, chat: Optional[ChatHandler], name: Optional[str], question: str, answer: str):
+        if chat is None:
+            return
+        chat.add_message("user", question)
+        chat.add_message("assistant", answer)
+        await self._run(chat.save_session, name)
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI(title="RAG-GPT API", lifespan=self.lifespan)
+
+        @app.get("/health")
+        async def health():
+            from . import vector_index
+
+            handler = self.rag.rag_handler
+            vectorstore = handler.vectorstore
+            return {
+                "status": "draining" if self.gate and self.gate.closed else "ok",
+                "documents": len(handler.get_loaded_pdfs()),
+                "chunks": vector_index.live_count(vectorstore) if vectorstore is not None else 0,
+                "active": self.gate.active if self.gate else 0,
+                "waiting": self.gate.waiting if self.gate else 0,
+            }
+
+        @app.get("/metrics", response_class=PlainTextResponse)
+        async def prometheus_metrics():
+            return metrics.to_prometheus()
+
+        @app.get("/documents")
+        async def documents():
+            return {"documents": self.rag.get_loaded_pdfs()}
+
+        @app.post("/ingest")
+        async def ingest(request: IngestRequest):
+            paths = self._ingest_paths(request.paths)
+            missing = [str(path) for path in paths if not path.is_file()]
+            if missing:
+                raise HTTPException(400, f"파일을 찾을 수 없습니다: {', '.join(missing)}")
+            if request.background:
+                # 작업 ID 를 바로 반환하고, 끝난 문서부터 검색 대상에 추가
+                return self.rag.jobs.submit(paths).snapshot()
+            async with self.gate.slot():
+                return await self._run(self.rag.rag_handler.process_multiple_pdfs, paths)
+
+        @app.get("/jobs")
+        async def jobs():
+            return {"jobs": [job.snapshot() for job in self.rag.jobs.list()]}
+
+        @app.get("/jobs/{job_id}")
+        async def job(job_id: str):
+            found = self.rag.jobs.get(job_id)
+            if found is None:
+                raise HTTPException(404, f"작업이 없습니다: {job_id}")
+            return found.snapshot()
+
+        @app.delete("/documents/{name}")
+        async def remove_document(name: str):
+            async with self.gate.slot():
+                try:
+                    removed = await self._run(self.rag.rag_handler.remove_document, name)
+                except (KeyError, ValueError) as e:
+                    raise HTTPException(404, str(e))
+            return {"document": name, "removed_chunks": removed}
+
+        @app.post("/query")
+        async def query(request: QueryRequest):
+            self._check_ready()
+            async with self.gate.slot():
+                start = time.perf_counter()
+                async with self._session(request.session) as chat:
+                    prepared = await self._prepare(request.question, chat)
+                    answer = await self.rag.rag_handler.aanswer(prepared)
+                    await self._save(chat, request.session, request.question, answer)
+                metrics.observe("query_total", time.perf_counter() - start)
+            return {
+                "answer": answer,
+                "sources": prepared["sources"],
+                "context_tokens": prepared["context_stats"]["context_tokens"],
+            }
+
+        @app.post("/query/stream")
+        async def query_stream(request: QueryRequest):
+            self._check_ready()
+            # 대기열 초과는 스트림을 시작하기 전에 503 으로 응답
+            self.gate.check()
+
+            async def events():
+                start = time.perf_counter()
+                try:
+                    # 슬롯은 스트림이 끝나거나 연결이 끊길 때까지 유지
+                    async with self.gate.slot(), self._session(request.session) as chat:
+                        prepared = await self._prepare(request.question, chat)
+                        tokens = []
+                        async for token in self.rag.rag_handler.astream_answer(prepared):
+                            tokens.append(token)
+                            yield _sse("token", {"token": token})
+                        await self._save(chat, request.session, request.question, "".join(tokens))
+                    metrics.observe("query_total", time.perf_counter() - start)
+                    yield _sse("done", {"sources": prepared["sources"]})
+                except HTTPException as e:
+                    yield _sse("error", {"error": e.detail})
+                except Exception as e:
+                    yield _sse("error", {"error": str(e)})
+
+            return StreamingResponse(
+                events(), media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @app.get("/sessions")
+        async def sessions():
+            return {"sessions": await self._run(ChatHandler(self.config).session_infos)}
+
+        @app.get("/sessions/{name}")
+        async def session(name: str):
+            async with self._session(name, keep=False) as chat:
+                if not chat.get_history():
+                    raise HTTPException(404, f"세션이 없습니다: {name}")
+                return {
+                    "name": name,
+                    "summary": chat.summary,
+                    "messages": [chat._message_record(msg) for msg in chat.get_history()],
+                }
+
+        return app
+
+    def run(self, host: str = "127.0.0.1", port: int = 8000):
+        """uvicorn 으로 실행 - SIGINT/SIGTERM 시 처리 중인 요청을 마친 뒤 종료"""
+        import uvicorn
+
+        uvicorn.run(
+            self.create_app(), host=host, port=port,
+            timeout_graceful_shutdown=self.config.get("serve_shutdown_timeout", 30),
+        )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
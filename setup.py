@@ -12,6 +12,7 @@ setup(
         "langchain-groq",
         "langchain-huggingface",
         "faiss-cpu",
+        "numpy",
         "pypdf",
         "python-dotenv",
     ],
@@ -0,0 +1,140 @@
+"""
+BM25 희소 인덱스 (한글 대응 토크나이저) 및 순위 융합
+"""
+import math
+import re
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 영문/숫자 토큰 (유전자 이름, NGS 같은 코드 포함) 과 한글 음절 연속 구간
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """검색용 토큰 분리
+
+    한글은 조사가 붙어 형태가 바뀌므로 어절 전체와 함께 음절 바이그램을 추가합니다.
+    예: "유전자가" -> ["유전자가", "유전", "전자", "자가"]
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if "가" <= token[0] <= "힣" and len(token) > 2:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+def term_counts(text: str) -> Dict[str, int]:
+    """토큰별 출현 횟수"""
+    return dict(Counter(tokenize(text)))
+
+
+class BM25Index:
+    """청크 id 기반 BM25 역색인
+
+    청크별 토큰 빈도는 postings 에만 두고, 청크마다는 삭제에 필요한 토큰 번호 배열과 길이만 보관합니다.
+    청크 하나의 토큰 빈도가 필요하면 counts() 로 postings 에서 다시 모읍니다.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # 토큰 -> {청크 id: 출현 횟수}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        # 토큰 <-> 번호 (한 번 나온 토큰은 번호를 유지)
+        self._term_ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        # 청크 id -> 토큰 번호 배열 (삭제용)
+        self._doc_terms: Dict[str, array] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def add(self, ids: List[str], counts: Iterable[Dict[str, int]]):
+        """청크 추가 (counts 는 term_counts 결과)"""
+        for chunk_id, doc_counts in zip(ids, counts):
+            if chunk_id in self._doc_terms:
+                self.remove([chunk_id])
+            self._doc_terms[chunk_id] = array("I", map(self._term_id, doc_counts))
+            length = sum(doc_counts.values())
+            self.doc_lengths[chunk_id] = length
+            self.total_length += length
+            for term, tf in doc_counts.items():
+                self.postings.setdefault(self._terms[self._term_ids[term]], {})[chunk_id] = tf
+
+    def remove(self, ids: Iterable[str]):
+        """청크 삭제"""
+        for chunk_id in ids:
+            term_ids = self._doc_terms.pop(chunk_id, None)
+            if term_ids is None:
+                continue
+            self.total_length -= self.doc_lengths.pop(chunk_id)
+            for term_id in term_ids:
+                term = self._terms[term_id]
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(chunk_id, None)
+                    if not posting:
+                        del self.postings[term]
+
+    def counts(self, chunk_id: str) -> Optional[Dict[str, int]]:
+        """청크의 토큰별 출현 횟수 (없는 청크면 None)"""
+        term_ids = self._doc_terms.get(chunk_id)
+        if term_ids is None:
+            return None
+        terms = self._terms
+        return {terms[term_id]: self.postings[terms[term_id]][chunk_id] for term_id in term_ids}
+
+    def memory_usage(self) -> Dict[str, int]:
+        """구성 요소별 메모리 사용량 (바이트, 청크 id 문자열은 청크 저장소와 공유하므로 제외)"""
+        usage = {
+            "postings": sys.getsizeof(self.postings) + sum(
+                sys.getsizeof(posting) for posting in self.postings.values()
+            ),
+            "terms": (sys.getsizeof(self._term_ids) + sys.getsizeof(self._terms)
+                      + sum(sys.getsizeof(term) for term in self._terms)),
+            "chunks": (sys.getsizeof(self._doc_terms) + sys.getsizeof(self.doc_lengths)
+                       + sum(sys.getsizeof(term_ids) for term_ids in self._doc_terms.values())),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 k개 (청크 id, 점수)"""
+        n_docs = len(self._doc_terms)
+        if not n_docs:
+            return []
+
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for chunk_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """여러 순위 목록을 RRF 점수(sum 1/(k + rank))로 합침"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,262 @@
+"""
+pickle 없는 온디스크 인덱스 형식
+
+디렉토리 구성:
+    index.faiss    FAISS 네이티브 인덱스 (IO_FLAG_MMAP_IFC 로 메모리 맵 열기)
+    chunks.sqlite  청크 저장소 (pos, id, text, metadata JSON)
+    meta.json      형식 버전, 청크 수, 차원
+    exact.f32      (양자화 인덱스 재점수용) 인덱스 순서의 원본 float32 벡터
+
+열 때는 인덱스 파일을 메모리 맵으로 열고 청크는 필요할 때만 SQLite 에서 읽으므로
+크기와 무관하게 거의 즉시 열리고, 여러 프로세스가 같은 페이지를 공유합니다.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+from .chunk_store import ChunkStore
+from .quantization import ExactVectors
+
+FORMAT_VERSION = 1
+
+
+def exists(path: Path) -> bool:
+    """저장소가 완전히 기록되어 있는지 확인"""
+    return (Path(path) / "meta.json").exists()
+
+
+def read_meta(path: Path) -> dict:
+    """meta.json 내용"""
+    with open(Path(path) / "meta.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _ordered_ids(vectorstore) -> List[str]:
+    """인덱스 위치 순서의 청크 id (열린 저장소도 한 번의 조회로 읽음)"""
+    return [chunk_id for _, chunk_id in sorted(vectorstore.index_to_docstore_id.items())]
+
+
+def _rows(vectorstore, ids: List[str]) -> Iterator[tuple]:
+    """chunks 테이블에 넣을 (pos, id, source_file, text, metadata JSON) 을 인덱스 순서로 생성
+
+    청크 저장소는 인덱스와 같은 순서로 청크를 보관하므로 iter_chunks 로 차례대로 읽고,
+    청크마다 Document 를 만들거나 따로 조회하지 않습니다.
+    """
+    docstore = vectorstore.docstore
+    if hasattr(docstore, "iter_chunks"):
+        chunks = docstore.iter_chunks()
+    else:
+        chunks = ((chunk_id, doc.page_content, doc.metadata)
+                  for chunk_id in ids for doc in (docstore.search(chunk_id),))
+    pos = -1
+    for pos, (chunk_id, text, metadata) in enumerate(chunks):
+        if pos >= len(ids) or ids[pos] != chunk_id:
+            raise ValueError(f"청크 저장소와 인덱스의 순서가 다릅니다 (위치 {pos})")
+        yield pos, chunk_id, metadata.get("source_file"), text, json.dumps(metadata, ensure_ascii=False)
+    if pos + 1 != len(ids):
+        raise ValueError(f"청크 저장소({pos + 1})와 인덱스({len(ids)})의 청크 수가 다릅니다")
+
+
+def save_store(path: Path, vectorstore, extra: Optional[dict] = None):
+    """벡터스토어를 네이티브 형식으로 저장 (임시 디렉토리에 쓴 뒤 교체)
+
+    extra 는 meta.json 에 함께 기록됩니다.
+    """
+    import faiss
+    from . import vector_index
+
+    # 삭제 표시만 한 벡터가 있으면 인덱스 위치와 청크 저장소 순서를 맞춘 뒤 저장
+    vector_index.compact(vectorstore)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=path.parent, prefix=".tmp_"))
+    try:
+        faiss.write_index(vectorstore.index, str(tmp_dir / "index.faiss"))
+
+        conn = sqlite3.connect(str(tmp_dir / "chunks.sqlite"))
+        with conn:
+            conn.execute(
+                "CREATE TABLE chunks (pos INTEGER PRIMARY KEY, id TEXT UNIQUE, "
+                "source_file TEXT, text TEXT, metadata TEXT)"
+            )
+            ids = _ordered_ids(vectorstore)
+            conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?)", _rows(vectorstore, ids))
+            conn.execute("CREATE INDEX chunks_source ON chunks (source_file)")
+        conn.close()
+
+        exact = getattr(vectorstore, "exact_vectors", None)
+        if exact is not None:
+            exact.save(tmp_dir / "exact.f32", ids)
+
+        with open(tmp_dir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": FORMAT_VERSION,
+                "count": vectorstore.index.ntotal,
+                "dim": vectorstore.index.d,
+                **(extra or {}),
+            }, f, ensure_ascii=False)
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp_dir, path)
+    finally:
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_index(index_file: Path):
+    """인덱스를 메모리 맵으로 읽기 (지원하지 않는 FAISS 버전은 일반 읽기)"""
+    import faiss
+
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if flag is not None:
+        try:
+            return faiss.read_index(str(index_file), flag), True
+        except RuntimeError:
+            pass
+    return faiss.read_index(str(index_file)), False
+
+
+def open_store(path: Path, embedding):
+    """저장소를 읽기 전용 메모리 맵 벡터스토어로 열기
+
+    반환된 벡터스토어의 read_only 속성이 True 면 인덱스가 파일을 직접 참조하므로,
+    변경 전에 vector_index.ensure_writable 로 메모리 사본을 만들어야 합니다.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    path = Path(path)
+    index, mapped = _read_index(path / "index.faiss")
+    docstore = SQLiteDocstore(path / "chunks.sqlite")
+    vectorstore = FAISS(
+        embedding_function=embedding,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=SQLiteIdMap(docstore),
+    )
+    vectorstore.read_only = mapped
+    if (path / "exact.f32").exists():
+        vectorstore.exact_vectors = ExactVectors.open(
+            path / "exact.f32", [chunk_id for _, chunk_id in docstore.positions()], index.d
+        )
+    return vectorstore
+
+
+class SQLiteIdMap(Mapping):
+    """인덱스 위치 -> 청크 id 매핑 (SQLite 에서 필요할 때 조회)"""
+
+    def __init__(self, docstore: "SQLiteDocstore"):
+        self.docstore = docstore
+        self._count = docstore.count()
+
+    def __getitem__(self, pos: int) -> str:
+        chunk_id = self.docstore.id_at(int(pos))
+        if chunk_id is None:
+            raise KeyError(pos)
+        return chunk_id
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._count))
+
+    def items(self) -> List[Tuple[int, str]]:
+        """전체 (위치, id) 를 한 번의 조회로 반환"""
+        return self.docstore.positions()
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """SQLite 기반 청크 저장소
+
+    langchain Docstore 의 search/add/delete 인터페이스를 구현합니다.
+    원본 파일은 읽기 전용으로 열고, 이후 추가/삭제는 메모리 오버레이(ChunkStore)에 기록합니다.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._added = ChunkStore()
+        self._deleted: set = set()
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM chunks")[0][0]
+
+    def id_at(self, pos: int) -> Optional[str]:
+        rows = self._query("SELECT id FROM chunks WHERE pos = ?", (pos,))
+        return rows[0][0] if rows else None
+
+    def positions(self) -> List[Tuple[int, str]]:
+        return self._query("SELECT pos, id FROM chunks ORDER BY pos")
+
+    def search(self, search: str) -> Union[str, object]:
+        """청크 id 로 Document 반환 (없으면 안내 문자열, InMemoryDocstore 와 동일)"""
+        from langchain_core.documents import Document
+
+        if search in self._added:
+            return self._added.search(search)
+        if search in self._deleted:
+            return f"ID {search} not found."
+        rows = self._query("SELECT text, metadata FROM chunks WHERE id = ?", (search,))
+        if not rows:
+            return f"ID {search} not found."
+        text, metadata = rows[0]
+        return Document(id=search, page_content=text, metadata=json.loads(metadata))
+
+    def add(self, texts: Dict[str, object]):
+        """청크 추가 (메모리 오버레이)"""
+        self._added.add(texts)
+
+    def delete(self, ids: List[str]):
+        """청크 삭제 (메모리 오버레이)"""
+        for chunk_id in ids:
+            if chunk_id in self._added:
+                self._added.delete([chunk_id])
+            else:
+                self._deleted.add(chunk_id)
+
+    def iter_chunks(self) -> Iterator[Tuple[str, str, dict]]:
+        """(id, text, metadata) 를 원본 파일의 인덱스 순서, 추가 순서대로 반환
+
+        전체 행을 한꺼번에 읽지 않도록 커서로 나눠 읽습니다. 열 때의 연결을 사용하므로
+        저장소 디렉토리가 새로 저장되어 교체된 뒤에도 처음 연 파일을 읽습니다.
+        """
+        with self._lock:
+            cursor = self._conn.execute("SELECT id, text, metadata FROM chunks ORDER BY pos")
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(1024)
+                if not rows:
+                    break
+                for chunk_id, text, metadata in rows:
+                    if chunk_id not in self._deleted:
+                        yield chunk_id, text, json.loads(metadata)
+        finally:
+            cursor.close()
+        yield from self._added.iter_chunks()
+
+    def ids_by_source(self) -> Dict[str, List[str]]:
+        """source_file 별 청크 id (인덱스 순서)"""
+        result: Dict[str, List[str]] = {}
+        for chunk_id, source in self._query("SELECT id, source_file FROM chunks ORDER BY pos"):
+            if chunk_id not in self._deleted:
+                result.setdefault(source or "Unknown", []).append(chunk_id)
+        for source, chunk_ids in self._added.ids_by_source().items():
+            result.setdefault(source, []).extend(chunk_ids)
+        return result
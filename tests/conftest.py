@@ -0,0 +1,61 @@
+"""
+테스트 공통 설정
+
+저장소 루트가 곧 rag_gpt 패키지이므로 설치 없이 rag_gpt 로 import 할 수 있게 등록합니다.
+모델은 bench.fakes 의 가짜 임베딩/LLM 을 사용해 네트워크 없이 실행합니다.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+if "rag_gpt" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "rag_gpt", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules["rag_gpt"] = _module
+    _spec.loader.exec_module(_module)
+
+from rag_gpt.bench.corpus import generate_pages, write_pdfs  # noqa: E402
+from rag_gpt.bench.fakes import HashEmbeddings, StubChatModel  # noqa: E402
+from rag_gpt.bench.runner import BenchConfig, _new_handler  # noqa: E402
+
+EMBED_DIM = 64
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """~/.rag_gpt 아래 캐시/세션/감시 상태를 테스트마다 임시 폴더에 기록"""
+    path = tmp_path / "home"
+    path.mkdir()
+    monkeypatch.setenv("HOME", str(path))
+    return path
+
+
+@pytest.fixture
+def make_config():
+    def make(**overrides):
+        return BenchConfig({"answer_cache": False, "ingest_workers": 1, **overrides})
+    return make
+
+
+@pytest.fixture
+def make_handler(make_config):
+    """가짜 모델을 사용하는 RAGHandler (캐시 없음)"""
+    def make(**overrides):
+        return _new_handler(make_config(**overrides), HashEmbeddings(EMBED_DIM), StubChatModel())
+    return make
+
+
+@pytest.fixture
+def make_pdfs(tmp_path):
+    """합성 PDF 작성 - write(n_docs, pages, words, directory=None) -> 경로 목록"""
+    def write(n_docs: int = 2, pages_per_doc: int = 3, words_per_page: int = 200,
+              directory=None, seed: int = 0):
+        directory = Path(directory) if directory else tmp_path / "pdfs"
+        return write_pdfs(directory, generate_pages(n_docs, pages_per_doc, words_per_page, seed=seed))
+    return write
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from langchain_core.messages import HumanMessage
+
+from rag_gpt import cache as cache_module
+from rag_gpt.cache import AnswerCache
+
+QUESTION = "What is the reference code for study d0p1?"
+
+
+def _key(*chunk_ids, history=()):
+    return AnswerCache.make_context_key(list(chunk_ids), "model", 0.3, "English", list(history))
+
+
+def test_lookup_needs_same_context_and_similar_question():
+    cache = AnswerCache(threshold=0.95)
+    cache.put([1.0, 0.0], _key("a", "b"), "answer", "q")
+
+    assert cache.lookup([0.99, 0.05], _key("b", "a")) == "answer"
+    assert cache.lookup([0.5, 0.5], _key("a", "b")) is None
+    assert cache.lookup([1.0, 0.0], _key("a")) is None
+    assert cache.lookup([1.0, 0.0], _key("a", "b", history=[HumanMessage(content="hi")])) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+def test_entries_expire_and_are_bounded(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    cache = AnswerCache(ttl=60, max_entries=2)
+    for i in range(3):
+        cache.put([1.0, float(i)], _key(str(i)), f"a{i}")
+    assert cache.lookup([1.0, 0.0], _key("0")) is None
+    assert cache.lookup([1.0, 1.0], _key("1")) == "a1"
+
+    clock[0] += 61
+    assert cache.lookup([1.0, 2.0], _key("2")) is None
+    assert not cache.entries
+
+
+def test_persisted_entries_survive_restart(tmp_path):
+    path = tmp_path / "answers.json"
+    AnswerCache(persist=True, cache_file=path).put(np.array([0.0, 1.0]), _key("a"), "saved", "q")
+    assert AnswerCache(persist=True, cache_file=path).lookup([0.0, 1.0], _key("a")) == "saved"
+
+
+@pytest.fixture
+def handler(make_handler, make_pdfs):
+    handler = make_handler(answer_cache=True)
+    handler.answer_cache = AnswerCache()
+    handler.process_multiple_pdfs(make_pdfs(2, 3))
+    calls = []
+    render = handler._render_prompt
+
+    def counted(prepared):
+        calls.append(prepared["question"])
+        return render(prepared)
+
+    handler._render_prompt = counted
+    handler.llm_calls = calls
+    return handler
+
+
+def test_repeated_question_skips_the_llm(handler):
+    first = handler.query(QUESTION)
+    assert handler.query(QUESTION) == first
+    assert "".join(handler.stream_query(QUESTION)) == first
+    assert handler.llm_calls == [QUESTION]
+
+    # 대화 기록이 다르면 다시 생성
+    handler.query(QUESTION, [HumanMessage(content="earlier")])
+    assert len(handler.llm_calls) == 2
+
+
+def test_reindexing_invalidates_cached_answers(handler):
+    handler.query(QUESTION)
+    name = handler.get_loaded_pdfs()[0]
+    handler.reload_document(name)
+    handler.query(QUESTION)
+    assert len(handler.llm_calls) == 2
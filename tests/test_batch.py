@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from rag_gpt import batch
+
+
+@pytest.fixture
+def handler(make_handler, make_pdfs):
+    handler = make_handler(top_k=2, context_token_budget=0, batch_concurrency=2)
+    handler.process_multiple_pdfs(make_pdfs(2, 4))
+    return handler
+
+
+def _write_questions(path, questions):
+    path.write_text("".join(json.dumps(q) + "\n" for q in questions), encoding="utf-8")
+    return path
+
+
+def test_sources_are_the_packed_chunks(handler):
+    question = "What is the reference code for study d1p2?"
+    prepared = handler.prepare(question, [])
+    candidates, _ = handler._retrieve(question, handler._fetch_k())
+    assert len(candidates) > handler.config.get("top_k")
+
+    in_context = {(doc.metadata["source_file"], doc.metadata["page"])
+                  for doc in candidates if doc.page_content in prepared["context"]}
+    pairs = [(source["file"], source["page"]) for source in prepared["sources"]]
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == in_context
+    assert 0 < len(pairs) <= handler.config.get("top_k")
+    for file, _ in pairs:
+        assert f"[출처: {file}]" in prepared["context"]
+
+
+def test_run_batch_writes_answers_and_resumes(handler, tmp_path):
+    questions = _write_questions(tmp_path / "q.jsonl", [
+        {"id": "a", "question": "What is the reference code for study d0p1?"},
+        {"question": "What is the reference code for study d1p3?"},
+        {"id": "a", "question": "duplicate id is answered once"},
+    ])
+    out = tmp_path / "out" / "answers.jsonl"
+    stats = batch.run_batch(handler, questions, out, handler.config)
+    assert (stats["answered"], stats["failed"], stats["skipped"]) == (2, 0, 1)
+
+    records = {record["id"]: record for record in map(json.loads, out.read_text().splitlines())}
+    assert set(records) == {"a", "2"}
+    for record in records.values():
+        assert record["answer"].startswith("stub(")
+        assert record["attempts"] == 1
+        assert 0 < len(record["sources"]) <= 2
+
+    stats = batch.run_batch(handler, questions, out, handler.config)
+    assert stats["skipped"] == 3 and stats["answered"] == 0
+    assert len(out.read_text().splitlines()) == 2
+
+
+def test_failed_questions_are_retried_on_the_next_run(handler, tmp_path, monkeypatch):
+    questions = _write_questions(tmp_path / "q.jsonl", [{"id": "x", "question": "d0p0?"}])
+    out = tmp_path / "answers.jsonl"
+    answer = handler.answer
+
+    def broken(prepared):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(handler, "answer", broken)
+    assert batch.run_batch(handler, questions, out, handler.config)["failed"] == 1
+    assert batch.completed_ids(out) == set()
+
+    monkeypatch.setattr(handler, "answer", answer)
+    assert batch.run_batch(handler, questions, out, handler.config)["answered"] == 1
+    assert batch.completed_ids(out) == {"x"}
+
+
+def test_call_with_retry_backs_off_on_rate_limits(monkeypatch):
+    class RateLimitError(Exception):
+        status_code = 429
+
+    sleeps = []
+    monkeypatch.setattr(batch.time, "sleep", sleeps.append)
+    calls = iter([RateLimitError(), RateLimitError(), "ok"])
+
+    def flaky():
+        value = next(calls)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    assert batch.call_with_retry(flaky, max_retries=5, backoff=1.0) == ("ok", 3)
+    assert len(sleeps) == 2 and 0.5 <= sleeps[0] <= 1.0 and 1.0 <= sleeps[1] <= 2.0
+
+    with pytest.raises(ValueError):
+        batch.call_with_retry(lambda: (_ for _ in ()).throw(ValueError("bad")), max_retries=5)
+
+
+def test_read_questions_reports_line_numbers(tmp_path):
+    path = tmp_path / "q.jsonl"
+    path.write_text('{"question": "ok"}\n{"id": 2}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        batch.read_questions(path)
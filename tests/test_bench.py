@@ -0,0 +1,24 @@
+import pytest
+
+from rag_gpt.bench.runner import compare, flatten, latency_summary, run_benchmark
+
+
+@pytest.mark.parametrize("corpus_format", ["pdf", "text"])
+def test_small_benchmark_runs_offline(corpus_format):
+    results = run_benchmark(n_docs=2, pages_per_doc=2, words_per_page=80, corpus_format=corpus_format,
+                            n_queries=6, concurrency=2, embed_dim=32,
+                            overrides={"ingest_workers": 1})
+    assert results["meta"]["params"]["format"] == corpus_format
+    assert results["query"]["concurrent"]["count"] == 6
+    flat = flatten(results)
+    assert flat and not any(name.startswith("meta.") for name in flat)
+
+    rows = compare(results, results)
+    assert rows and all(change == 0.0 for _, _, _, change in rows)
+
+
+def test_latency_summary():
+    summary = latency_summary([0.001, 0.002, 0.003, 0.004])
+    assert summary["count"] == 4 and summary["max_ms"] == pytest.approx(4.0)
+    assert summary["p50_ms"] == pytest.approx(2.5)
+    assert latency_summary([]) == {"count": 0}
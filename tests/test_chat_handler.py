@@ -0,0 +1,170 @@
+import json
+
+import pytest
+
+from rag_gpt.handlers.chat_handler import ChatHandler, check_session_name
+
+
+def _chat(make_config, *turns):
+    chat = ChatHandler(make_config())
+    for question, answer in turns:
+        chat.add_message("user", question)
+        chat.add_message("assistant", answer)
+    return chat
+
+
+def _contents(chat):
+    return [msg.content for msg in chat.get_history()]
+
+
+def test_save_appends_only_new_messages(make_config):
+    chat = _chat(make_config, ("q1", "a1"))
+    chat.save_session("work")
+    session_file = chat.sessions_dir / "work.jsonl"
+    first = session_file.read_bytes()
+
+    chat.add_message("user", "q2")
+    chat.add_message("assistant", "a2")
+    chat.summary, chat.summarized_count = "q1 에 대한 요약", 2
+    chat.save_session("work")
+    data = session_file.read_bytes()
+    assert data.startswith(first)
+    assert [json.loads(line) for line in data[len(first):].splitlines()] == [
+        {"role": "human", "content": "q2"},
+        {"role": "ai", "content": "a2"},
+        {"summary": "q1 에 대한 요약", "messages": 2},
+    ]
+
+    loaded = ChatHandler(make_config())
+    loaded.load_session("work")
+    assert _contents(loaded) == ["q1", "a1", "q2", "a2"]
+    assert (loaded.summary, loaded.summarized_count) == ("q1 에 대한 요약", 2)
+    assert loaded.session_infos() == [
+        {"name": "work", "timestamp": loaded.session_infos()[0]["timestamp"], "messages": 4}
+    ]
+
+
+def test_truncated_last_line_is_ignored(make_config):
+    chat = _chat(make_config, ("q1", "a1"))
+    chat.save_session("work")
+    with open(chat.sessions_dir / "work.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"role": "human", "cont')
+
+    loaded = ChatHandler(make_config())
+    loaded.load_session("work")
+    assert _contents(loaded) == ["q1", "a1"]
+
+
+def test_rewrites_after_clear(make_config):
+    chat = _chat(make_config, ("q1", "a1"))
+    chat.save_session("work")
+    chat.clear_history()
+    chat.add_message("user", "new")
+    chat.save_session("work")
+
+    loaded = ChatHandler(make_config())
+    loaded.load_session("work")
+    assert _contents(loaded) == ["new"]
+
+
+def test_migrates_legacy_json_sessions(make_config):
+    chat = ChatHandler(make_config())
+    legacy = {
+        "timestamp": "2024-01-02T03:04:05",
+        "messages": [{"role": "human", "content": "old q"}, {"role": "ai", "content": "old a"}],
+        "summary": {"text": "earlier", "messages": 0},
+    }
+    (chat.sessions_dir / "old.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    infos = chat.session_infos()
+    assert infos == [{"name": "old", "timestamp": "2024-01-02T03:04:05", "messages": 2}]
+    assert (chat.sessions_dir / "old.json.bak").exists()
+    chat.load_session("old")
+    assert _contents(chat) == ["old q", "old a"]
+    assert chat.summary == "earlier"
+
+
+@pytest.mark.parametrize("name", ["manifest", "Manifest", "", ".hidden", "../escape", "a/b"])
+def test_rejects_reserved_and_unsafe_names(make_config, name):
+    with pytest.raises(ValueError):
+        check_session_name(name)
+    chat = _chat(make_config, ("q", "a"))
+    with pytest.raises(ValueError):
+        chat.save_session(name)
+    with pytest.raises(ValueError):
+        chat.load_session(name)
+
+
+def test_manifest_is_never_treated_as_a_session(make_config):
+    chat = _chat(make_config, ("q", "a"))
+    chat.save_session("work")
+    manifest = chat.manifest_file.read_text(encoding="utf-8")
+
+    # 이전 버전의 잘못된 변환이 남긴 항목도 목록에 나오지 않음
+    chat._update_manifest({"manifest": {"timestamp": "", "messages": 0}})
+    (chat.sessions_dir / "manifest.jsonl").write_text("", encoding="utf-8")
+    assert [info["name"] for info in ChatHandler(make_config()).session_infos()] == ["work"]
+    assert chat.manifest_file.exists()
+    assert not (chat.sessions_dir / "manifest.json.bak").exists()
+    assert json.loads(manifest).keys() == {"work"}
+
+
+def _long_chat(make_config, turns, **overrides):
+    chat = ChatHandler(make_config(history_keep_turns=2, **overrides))
+    for i in range(turns):
+        chat.add_message("user", f"q{i} " + "word " * 100)
+        chat.add_message("assistant", f"a{i} " + "word " * 100)
+    return chat
+
+
+def test_history_within_budget_is_unchanged(make_config):
+    chat = _long_chat(make_config, 2, history_token_budget=10000)
+    calls = []
+    assert chat.get_prompt_history(lambda summary, messages: calls.append(messages)) == chat.get_history()
+    assert calls == []
+
+
+def test_older_turns_are_folded_into_a_rolling_summary(make_config):
+    chat = _long_chat(make_config, 6, history_token_budget=600)
+    folded = []
+
+    def summarize(summary, messages):
+        folded.append([m.content.split()[0] for m in messages])
+        return (summary + " " if summary else "") + f"{len(messages)} messages"
+
+    history = chat.get_prompt_history(summarize)
+    assert folded == [["q0", "a0", "q1", "a1", "q2", "a2", "q3", "a3"]]
+    assert history[0].content.endswith("8 messages")
+    assert [m.content.split()[0] for m in history[1:]] == ["q4", "a4", "q5", "a5"]
+
+    # 이미 요약한 메시지는 다시 보내지 않고 새 메시지만 덧붙임
+    chat.add_message("user", "q6 " + "word " * 100)
+    chat.add_message("assistant", "a6 " + "word " * 100)
+    history = chat.get_prompt_history(summarize)
+    assert folded[1] == ["q4", "a4"]
+    assert history[0].content.endswith("8 messages 2 messages")
+    assert chat.summarized_count == 10
+
+
+def test_failed_summary_drops_oldest_turns(make_config):
+    chat = _long_chat(make_config, 6, history_token_budget=300)
+
+    def broken(summary, messages):
+        raise RuntimeError("llm down")
+
+    history = chat.get_prompt_history(broken)
+    assert [m.content.split()[0] for m in history] == ["q5", "a5"]
+    assert chat.summary == "" and chat.summarized_count == 0
+
+
+def test_summary_is_saved_with_the_session(make_config):
+    chat = _long_chat(make_config, 6, history_token_budget=600)
+    chat.get_prompt_history(lambda summary, messages: "folded")
+    chat.save_session("work")
+
+    loaded = ChatHandler(make_config(history_keep_turns=2, history_token_budget=600))
+    loaded.load_session("work")
+    assert (loaded.summary, loaded.summarized_count) == ("folded", 8)
+    calls = []
+    history = loaded.get_prompt_history(lambda summary, messages: calls.append(messages))
+    assert calls == [] and history[0].content.endswith("folded")
@@ -0,0 +1,60 @@
+from langchain_core.documents import Document
+
+from rag_gpt.chunk_store import ChunkStore
+
+
+def _doc(text: str, **metadata) -> Document:
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_round_trips_text_and_metadata():
+    store = ChunkStore()
+    docs = {
+        "a": _doc("첫 번째 청크", source_file="a.pdf", page=0, start_index=0, page_label="i"),
+        "b": _doc("second", source_file="a.pdf", page=1, start_index=480, total_pages=2),
+        "c": _doc("no page", source_file="b.pdf", page="x", start_index=None),
+        "d": _doc("bare"),
+    }
+    store.add(docs)
+    for chunk_id, doc in docs.items():
+        restored = store.search(chunk_id)
+        assert restored.page_content == doc.page_content
+        assert restored.metadata == {"source_file": "Unknown", **doc.metadata}
+    assert store.search("missing") == "ID missing not found."
+    assert store.ids_by_source() == {"a.pdf": ["a", "b"], "b.pdf": ["c"], "Unknown": ["d"]}
+
+
+def test_per_chunk_positions_do_not_defeat_interning():
+    """page, start_index 는 열에 저장하므로 같은 문서의 나머지 메타데이터는 한 번만 intern"""
+    store = ChunkStore()
+    store.add({
+        f"{page}-{start}": _doc("text", source_file="a.pdf", source="/tmp/a.pdf", total_pages=50,
+                                page=page, start_index=start)
+        for page in range(50) for start in (0, 450, 900)
+    })
+    assert len(store._meta_values.values) == 1
+    assert store.search("7-450").metadata["start_index"] == 450
+
+
+def test_delete_and_compact_keep_order():
+    store = ChunkStore()
+    store.add({str(i): _doc(f"chunk {i}", source_file=f"{i % 2}.pdf", page=i, start_index=i * 10)
+               for i in range(10)})
+    store.delete([str(i) for i in range(0, 10, 2)] + ["1"])
+    assert [chunk_id for chunk_id, _, _ in store.iter_chunks()] == ["3", "5", "7", "9"]
+    assert store.search("7").metadata == {"source_file": "1.pdf", "page": 7, "start_index": 70}
+    assert len(store) == 4
+
+
+def test_memory_report_includes_the_bm25_index(make_config, make_handler, make_pdfs, capsys):
+    from rag_gpt.app import RagGPT
+
+    rag = RagGPT(make_config(api_key="test"), use_cache=False)
+    rag.rag_handler = make_handler()
+    rag.rag_handler.process_multiple_pdfs(make_pdfs(2, 3))
+    report = rag.rag_handler.memory_report()
+    assert report["sparse_bytes"] == rag.rag_handler.sparse_index.memory_usage()["total"] > 0
+    assert report["total_bytes"] == report["columnar_bytes"] + report["sparse_bytes"]
+    assert report["document_total_bytes"] == report["document_bytes"] + report["sparse_bytes"]
+    rag.show_memory()
+    assert "BM25" in capsys.readouterr().out
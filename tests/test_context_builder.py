@@ -0,0 +1,77 @@
+from langchain_core.documents import Document
+
+from rag_gpt.context_builder import build_context, merge_adjacent, mmr_order, pack
+from rag_gpt.sparse_index import term_counts
+
+TEXT = "".join(f"sentence {i} about the trial outcome. " for i in range(40))
+
+
+def _doc(chunk_id, text, page=0, start=None, source="a.pdf"):
+    metadata = {"source_file": source, "page": page}
+    if start is not None:
+        metadata["start_index"] = start
+    return Document(id=chunk_id, page_content=text, metadata=metadata)
+
+
+def _unit(chunk_id, text, relevance, start=None, page=0):
+    return {"ids": [chunk_id], "source": "a.pdf", "page": page, "start": start, "text": text,
+            "relevance": relevance, "terms": term_counts(text)}
+
+
+def test_overlapping_chunks_are_merged_by_position():
+    left, right = TEXT[:400], TEXT[350:800]
+    merged = merge_adjacent([_unit("b", right, 0.9, start=350), _unit("a", left, 0.5, start=0)], 100)
+    assert len(merged) == 1
+    assert merged[0]["text"] == TEXT[:800]
+    assert merged[0]["ids"] == ["a", "b"] and merged[0]["relevance"] == 0.9
+
+    # 위치가 떨어져 있거나 다른 페이지면 합치지 않음
+    apart = [_unit("a", TEXT[:100], 1.0, start=0), _unit("b", TEXT[500:600], 0.5, start=500),
+             _unit("c", TEXT[50:150], 0.4, start=50, page=1)]
+    assert len(merge_adjacent(apart, 100)) == 3
+
+
+def test_overlap_is_found_by_text_without_start_index():
+    merged = merge_adjacent([_unit("a", TEXT[:400], 1.0), _unit("b", TEXT[350:800], 0.5)], 100)
+    assert [unit["text"] for unit in merged] == [TEXT[:800]]
+
+
+def test_mmr_prefers_a_different_unit_over_a_near_duplicate():
+    units = [_unit("a", "alpha beta gamma delta", 1.0),
+             _unit("b", "alpha beta gamma delta epsilon", 0.95),
+             _unit("c", "zeta eta theta iota", 0.9)]
+    assert [unit["ids"][0] for unit in mmr_order(units, 0.5)] == ["a", "c", "b"]
+    assert [unit["ids"][0] for unit in mmr_order(units, 1.0)] == ["a", "b", "c"]
+
+
+def test_pack_respects_the_token_budget():
+    units = [_unit(str(i), TEXT[:400], 1.0 - i / 10) for i in range(3)]
+    assert len(pack(units, 3, 0)) == 3
+    packed = pack(units, 3, 150)
+    assert len(packed) == 1
+    # 첫 단위가 예산보다 크면 잘라서라도 담음
+    truncated = pack([_unit("big", TEXT, 1.0)], 3, 50)
+    assert len(truncated) == 1 and len(truncated[0]["text"]) < len(TEXT)
+
+
+def test_build_context_reports_sources_and_savings(make_config):
+    config = make_config(top_k=3, context_token_budget=0, chunk_overlap=50)
+    docs = [_doc("a", TEXT[:400], start=0), _doc("b", TEXT[350:800], start=350),
+            _doc("c", "unrelated page text", page=2)]
+    context, chunk_ids, sources, stats = build_context(docs, config, lambda _, text: term_counts(text))
+
+    assert context.count("[출처: a.pdf]") == 2
+    assert TEXT[:800] in context
+    assert sorted(chunk_ids) == ["a", "b", "c"]
+    assert sources == [{"file": "a.pdf", "page": 0}, {"file": "a.pdf", "page": 2}]
+    assert stats["merged"] == 1 and stats["selected_chunks"] == 3
+    assert stats["tokens_saved"] > 0
+
+
+def test_split_chunks_carry_start_index(make_handler, make_pdfs):
+    handler = make_handler()
+    handler.process_multiple_pdfs(make_pdfs(1, 2))
+    docstore = handler.vectorstore.docstore
+    name = handler.get_loaded_pdfs()[0]
+    for chunk_id in handler.doc_ids[name]:
+        assert isinstance(docstore.search(chunk_id).metadata["start_index"], int)
@@ -0,0 +1,55 @@
+import pytest
+
+
+def _sources(handler, question, k=20):
+    docs, _ = handler._retrieve(question, k)
+    return {doc.metadata["source_file"] for doc in docs}
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_remove_one_document_keeps_the_others(make_handler, make_pdfs, index_type):
+    paths = make_pdfs(3, 3)
+    handler = make_handler(index_type=index_type)
+    handler.process_multiple_pdfs(paths)
+    total = handler.vectorstore.index.ntotal
+    kept = {name: list(ids) for name, ids in handler.doc_ids.items() if name != paths[1].name}
+
+    removed = handler.remove_document(paths[1].name)
+    assert handler.vectorstore.index.ntotal == total - removed
+    assert handler.get_loaded_pdfs() == [paths[0].name, paths[2].name]
+    assert {name: ids for name, ids in handler.doc_ids.items()} == kept
+    assert paths[1].name not in _sources(handler, "What is the reference code for study d1p1?")
+    # 남은 청크의 id 와 인덱스 위치가 일치
+    for chunk_id in handler.vectorstore.index_to_docstore_id.values():
+        assert handler.vectorstore.docstore.search(chunk_id).id == chunk_id
+
+    with pytest.raises(KeyError):
+        handler.remove_document(paths[1].name)
+
+
+def test_reload_replaces_only_that_document(make_handler, make_pdfs, tmp_path):
+    paths = make_pdfs(2, 3)
+    handler = make_handler()
+    handler.process_multiple_pdfs(paths)
+    other_ids = list(handler.doc_ids[paths[0].name])
+
+    replacement, = make_pdfs(1, 5, directory=tmp_path / "new", seed=9)
+    paths[1].write_bytes(replacement.read_bytes())
+    chunks = handler.reload_document(paths[1].name)
+
+    assert handler.doc_ids[paths[0].name] == other_ids
+    assert len(handler.doc_ids[paths[1].name]) == chunks
+    assert handler.vectorstore.index.ntotal == len(other_ids) + chunks
+    assert len(handler.sparse_index) == handler.vectorstore.index.ntotal
+    assert handler.get_loaded_pdfs() == [p.name for p in paths]
+
+
+def test_removing_the_last_document_clears_the_index(make_handler, make_pdfs):
+    path, = make_pdfs(1)
+    handler = make_handler()
+    handler.process_pdf(path)
+    handler.remove_document(path.name)
+    assert handler.vectorstore is None and handler.retriever is None
+    assert handler.get_loaded_pdfs() == [] and len(handler.sparse_index) == 0
+    with pytest.raises(KeyError):
+        handler.reload_document(path.name)
@@ -0,0 +1,74 @@
+import numpy as np
+
+from rag_gpt.cache import EmbeddingCache
+
+
+def test_vectors_survive_reopening(tmp_path):
+    cache = EmbeddingCache(cache_dir=tmp_path)
+    cache.put_many("m", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    cache.flush()
+
+    reopened = EmbeddingCache(cache_dir=tmp_path)
+    assert reopened.get_many("m", ["b", "c", "a"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+    assert reopened.get_many("other", ["a"]) == [None]
+    assert reopened.stats()["hits"] == 2 and reopened.stats()["misses"] == 2
+
+
+def test_index_is_written_on_flush_only(tmp_path):
+    cache = EmbeddingCache(cache_dir=tmp_path)
+    cache.put_many("m", ["a"], [[1.0, 2.0]])
+    cache.put_many("m", ["b"], [[3.0, 4.0]])
+    assert not (tmp_path / "index.json").exists()
+
+    cache.flush()
+    mtime = (tmp_path / "index.json").stat().st_mtime_ns
+    cache.flush()
+    assert (tmp_path / "index.json").stat().st_mtime_ns == mtime
+    assert len(EmbeddingCache(cache_dir=tmp_path).entries) == 2
+
+
+def test_evicted_slots_are_dropped_from_disk_before_reuse(tmp_path):
+    cache = EmbeddingCache(max_entries=2, cache_dir=tmp_path)
+    cache.put_many("m", ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    cache.flush()
+    cache.put_many("m", ["c"], [[5.0, 5.0]])
+
+    # flush 전에 종료돼도 재사용된 슬롯을 옛 키로 읽지 않음
+    reopened = EmbeddingCache(max_entries=2, cache_dir=tmp_path)
+    assert reopened.get_many("m", ["a", "b", "c"]) == [None, [0.0, 1.0], None]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(max_entries=3, cache_dir=tmp_path)
+    cache.put_many("m", ["a", "b", "c"], np.eye(3))
+    cache.get_many("m", ["a"])
+    cache.put_many("m", ["d"], [[0.0, 0.0, 5.0]])
+
+    assert cache.get_many("m", ["b"]) == [None]
+    assert cache.get_many("m", ["a", "c", "d"]) == [[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 5.0]]
+    assert len(cache.entries) == 3
+    assert (tmp_path / "vectors.f32").stat().st_size == 3 * 3 * 4
+
+
+def test_only_new_chunks_are_embedded(make_handler, make_pdfs, tmp_path):
+    paths = make_pdfs(2, 3)
+
+    def counting_handler():
+        handler = make_handler()
+        handler.embedding_cache = EmbeddingCache(cache_dir=tmp_path / "embeddings")
+        embed = handler.embedding.embed_documents
+        handler.embedded = []
+        handler.embedding.embed_documents = lambda texts: handler.embedded.extend(texts) or embed(texts)
+        return handler
+
+    first = counting_handler()
+    total = first.process_multiple_pdfs(paths[:1])["total_chunks"]
+    assert len(first.embedded) == total
+
+    # 같은 텍스트의 청크는 캐시에서, 새 문서의 청크만 모델로
+    second = counting_handler()
+    results = second.process_multiple_pdfs(paths)
+    assert len(EmbeddingCache(cache_dir=tmp_path / "embeddings").entries) == len(second.vectorstore.docstore)
+    assert len(second.embedded) == len(second.doc_ids[paths[1].name])
+    assert results["total_chunks"] == second.vectorstore.index.ntotal
+    assert second.embedding_cache.stats()["hits"] == total
@@ -0,0 +1,57 @@
+import sys
+import threading
+import types
+
+import pytest
+
+from rag_gpt import embeddings
+
+
+@pytest.fixture
+def constructed(monkeypatch):
+    """가짜 langchain_huggingface 로 생성 횟수를 셈"""
+    created = []
+
+    class FakeEmbeddings:
+        def __init__(self, model_name, model_kwargs):
+            created.append((model_name, model_kwargs))
+
+        def embed_query(self, text):
+            return [0.0]
+
+    module = types.ModuleType("langchain_huggingface")
+    module.HuggingFaceEmbeddings = FakeEmbeddings
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", module)
+    monkeypatch.setattr(embeddings, "_models", {})
+    return created
+
+
+def test_each_model_is_loaded_once(constructed):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(embeddings.get_embedding("m")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(result) for result in results}) == 1
+    assert embeddings.get_embedding("m", "cpu") is not results[0]
+    assert constructed == [("m", {}), ("m", {"device": "cpu"})]
+    assert embeddings.loaded_models() == [("m", None), ("m", "cpu")]
+
+
+def test_background_warmup_shares_the_instance(constructed):
+    embeddings.warmup_in_background("m").join()
+    embeddings.get_embedding("m")
+    assert constructed == [("m", {})]
+
+
+def test_handlers_share_the_model_lazily(constructed, make_config):
+    from rag_gpt.handlers.rag_handler import RAGHandler
+
+    first = RAGHandler(make_config(embedding_model="m"))
+    second = RAGHandler(make_config(embedding_model="m"))
+    assert constructed == []
+    assert first.embedding is second.embedding
+    assert constructed == [("m", {})]
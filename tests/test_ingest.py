@@ -0,0 +1,59 @@
+import pytest
+
+
+def _indexed_texts(handler):
+    vectorstore = handler.vectorstore
+    return [vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]).page_content
+            for i in range(vectorstore.index.ntotal)]
+
+
+@pytest.fixture
+def pdfs(make_pdfs, tmp_path):
+    paths = make_pdfs(4, 3)
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4\nnot really a pdf")
+    return paths[:2] + [broken] + paths[2:]
+
+
+def test_parallel_ingest_matches_sequential(make_handler, pdfs):
+    sequential = make_handler(ingest_workers=1)
+    expected = sequential.process_multiple_pdfs(pdfs)
+
+    parallel = make_handler(ingest_workers=3)
+    results = parallel.process_multiple_pdfs(pdfs)
+    assert results["success"] == expected["success"]
+    assert [row["file"] for row in results["success"]] == [p.name for p in pdfs if p.name != "broken.pdf"]
+    assert [row["file"] for row in results["failed"]] == ["broken.pdf"]
+    assert parallel.get_loaded_pdfs() == sequential.get_loaded_pdfs()
+    assert _indexed_texts(parallel) == _indexed_texts(sequential)
+
+
+def test_all_files_share_one_embedding_pass_and_index_build(make_handler, make_pdfs):
+    paths = make_pdfs(3, 3)
+    handler = make_handler(embed_batch_size=10000)
+    batches, builds = [], []
+    embed, add = handler.embedding.embed_documents, handler._add_embeddings
+    handler.embedding.embed_documents = lambda texts: batches.append(len(texts)) or embed(texts)
+    handler._add_embeddings = lambda *args: builds.append(len(args[0])) or add(*args)
+
+    results = handler.process_multiple_pdfs(paths)
+    assert batches == builds == [results["total_chunks"]]
+    assert handler.vectorstore.index.ntotal == results["total_chunks"]
+
+    # 배치 크기를 넘으면 같은 패스 안에서 고정 크기로 나눔
+    handler = make_handler(embed_batch_size=7)
+    batches = []
+    embed = handler.embedding.embed_documents
+    handler.embedding.embed_documents = lambda texts: batches.append(len(texts)) or embed(texts)
+    handler.process_multiple_pdfs(paths)
+    assert sum(batches) == results["total_chunks"] and max(batches) == 7
+
+
+def test_duplicate_names_index_the_last_file(make_handler, make_pdfs, tmp_path):
+    first, = make_pdfs(1, 2)
+    second, = make_pdfs(1, 4, directory=tmp_path / "other", seed=3)
+    handler = make_handler()
+    handler.process_multiple_pdfs([first, second])
+    assert handler.get_loaded_pdfs() == [first.name]
+    assert handler.doc_paths[first.name] == second
+    assert handler.vectorstore.index.ntotal == len(handler.doc_ids[first.name])
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from rag_gpt.jobs import JobManager
+
+
+@pytest.fixture
+def handler(make_handler):
+    return make_handler(ingest_job_workers=1)
+
+
+def test_job_publishes_each_document_and_counts_progress(handler, make_pdfs):
+    paths = make_pdfs(3, 4)
+    published = []
+    publish = handler._publish
+
+    def record(entries):
+        count = publish(entries)
+        published.append(handler.get_loaded_pdfs())
+        return count
+
+    handler._publish = record
+    jobs = JobManager(handler, handler.config)
+    job = jobs.submit(paths)
+    assert job.wait(30)
+    jobs.shutdown()
+
+    assert published == [[p.name for p in paths[:i + 1]] for i in range(len(paths))]
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "done" and snapshot["progress"] == 1.0
+    assert snapshot["files_done"] == snapshot["files_total"] == 3
+    assert snapshot["pages"] == snapshot["pages_total"] == 12
+    assert snapshot["chunks"] == snapshot["embedded"] == snapshot["results"]["total_chunks"]
+    assert snapshot["chunks"] == handler.vectorstore.index.ntotal
+
+
+def test_loaded_documents_stay_queryable_while_indexing(handler, make_pdfs):
+    first, second = make_pdfs(2, 4)
+    handler.process_pdf(first)
+    release, blocked = threading.Event(), threading.Event()
+    publish = handler._publish
+
+    def slow(entries):
+        blocked.set()
+        release.wait(30)
+        return publish(entries)
+
+    handler._publish = slow
+    jobs = JobManager(handler, handler.config)
+    job = jobs.submit([second])
+    try:
+        assert blocked.wait(30)
+        assert jobs.active() == [job] and job.snapshot()["status"] == "running"
+        docs, _ = handler._retrieve("What is the reference code for study d0p1?", 3)
+        assert docs and {doc.metadata["source_file"] for doc in docs} == {first.name}
+    finally:
+        release.set()
+        assert job.wait(30)
+        jobs.shutdown()
+    assert handler.get_loaded_pdfs() == [first.name, second.name]
+
+
+def test_missing_file_is_reported_without_failing_the_job(handler, make_pdfs, tmp_path):
+    path, = make_pdfs(1)
+    jobs = JobManager(handler, handler.config)
+    job = jobs.submit([tmp_path / "missing.pdf", path])
+    assert job.wait(30)
+    jobs.shutdown()
+
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "done"
+    assert snapshot["files_done"] == 2
+    assert [failed["file"] for failed in snapshot["results"]["failed"]] == ["missing.pdf"]
+    assert handler.get_loaded_pdfs() == [path.name]
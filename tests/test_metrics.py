@@ -0,0 +1,59 @@
+import pytest
+
+from rag_gpt.metrics import Histogram, Metrics, metrics
+
+
+@pytest.fixture
+def recorded():
+    enabled = metrics.enabled
+    metrics.enabled = True
+    metrics.reset()
+    yield metrics
+    metrics.enabled = enabled
+    metrics.reset()
+
+
+def test_histogram_quantiles_stay_within_bucket_bounds():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 5:
+        histogram.observe(value)
+    assert histogram.count == 100 and histogram.max == 0.5
+    assert 0.0 < histogram.quantile(0.5) <= 0.01
+    assert 0.01 < histogram.quantile(0.95) <= 0.1
+    assert histogram.quantile(1.0) == 0.5
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_disabled_metrics_record_nothing():
+    registry = Metrics(enabled=False)
+    with registry.span("search"):
+        pass
+    registry.observe("embed", 1.0)
+    assert registry.snapshot() == []
+
+
+def test_prometheus_buckets_are_cumulative():
+    registry = Metrics()
+    for seconds in (0.0001, 0.003, 20.0):
+        registry.observe("search", seconds)
+    text = registry.to_prometheus()
+    assert 'rag_gpt_stage_duration_seconds_bucket{stage="search",le="0.0005"} 1' in text
+    assert 'rag_gpt_stage_duration_seconds_bucket{stage="search",le="0.005"} 2' in text
+    assert 'rag_gpt_stage_duration_seconds_bucket{stage="search",le="+Inf"} 3' in text
+    assert 'rag_gpt_stage_duration_seconds_count{stage="search"} 3' in text
+
+
+def test_pipeline_stages_are_recorded(recorded, make_handler, make_pdfs):
+    handler = make_handler()
+    handler.process_multiple_pdfs(make_pdfs(2, 3))
+    handler.query("What is the reference code for study d0p1?")
+    assert "".join(handler.stream_query("What is the reference code for study d1p2?")).startswith("stub(")
+
+    counts = {row["stage"]: row["count"] for row in recorded.snapshot()}
+    for stage in ("pdf_load", "split", "embed", "index_add", "search", "context", "prompt_render"):
+        assert counts.get(stage, 0) >= 1, stage
+    assert counts["query_total"] == counts["llm_total"] == 2
+    assert counts["llm_first_token"] == 1
+    # 표시 순서는 파이프라인 순서
+    stages = [row["stage"] for row in recorded.snapshot()]
+    assert stages.index("pdf_load") < stages.index("search") < stages.index("query_total")
@@ -0,0 +1,91 @@
+import pytest
+
+from rag_gpt.pdf_pages import iter_chunk_windows, page_count
+
+
+@pytest.fixture
+def large_pdf(make_pdfs):
+    path, = make_pdfs(1, 12, 150)
+    return path
+
+
+def _chunks(handler, name):
+    docstore = handler.vectorstore.docstore
+    return [(doc.page_content, doc.metadata) for doc in
+            (docstore.search(chunk_id) for chunk_id in handler.doc_ids[name])]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"pdf_page_window": 3, "pdf_stream_min_pages": 4, "embed_batch_size": 7},
+    {"pdf_page_window": 3, "pdf_stream_min_pages": 4, "pdf_parallel_min_pages": 4, "ingest_workers": 2},
+])
+def test_streamed_extraction_matches_whole_file(make_handler, large_pdf, overrides):
+    whole = make_handler(pdf_page_window=1000)
+    whole.process_pdf(large_pdf)
+
+    progress = {}
+    streamed = make_handler(**overrides)
+    results = streamed.process_multiple_pdfs(
+        [large_pdf], progress=lambda kind, n: progress.update({kind: progress.get(kind, 0) + n})
+    )
+    assert _chunks(streamed, large_pdf.name) == _chunks(whole, large_pdf.name)
+    assert progress["pages"] == 12
+    assert progress["chunks"] == progress["embedded"] == results["total_chunks"]
+    assert results["embedded_chunks"] == results["total_chunks"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_windows_come_back_in_page_order(large_pdf, workers):
+    assert page_count(large_pdf) == 12
+    windows = list(iter_chunk_windows(large_pdf, 500, 50, window=5, workers=workers))
+    assert [pages for _, _, _, pages in windows] == [5, 5, 2]
+    pages = [chunk.metadata["page"] for chunks, _, _, _ in windows for chunk in chunks]
+    assert pages == sorted(pages) and set(pages) == set(range(12))
+
+
+def test_unreadable_pdf_is_reported_as_failed(make_handler, large_pdf, tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4\nnot really a pdf")
+    handler = make_handler(pdf_page_window=3, pdf_stream_min_pages=4)
+    results = handler.process_multiple_pdfs([broken, large_pdf])
+    assert [failed["file"] for failed in results["failed"]] == ["broken.pdf"]
+    assert handler.get_loaded_pdfs() == [large_pdf.name]
+
+
+def test_only_very_large_pdfs_are_streamed(make_handler, make_pdfs, tmp_path, monkeypatch):
+    paths = make_pdfs(3, 6, 40)
+    large, = make_pdfs(1, 12, 40, directory=tmp_path / "large", seed=5)
+    large = large.rename(large.with_name("large.pdf"))
+    handler = make_handler(pdf_page_window=3, pdf_stream_min_pages=10, ingest_workers=2)
+    routes = {"pool": [], "stream": []}
+    split_pending, stream_entry = handler._split_pending, handler._stream_entry
+
+    def pooled(pending):
+        routes["pool"].extend(path.name for path, _ in pending)
+        return split_pending(pending)
+
+    def streamed(pdf_path, *args):
+        routes["stream"].append(pdf_path.name)
+        return stream_entry(pdf_path, *args)
+
+    monkeypatch.setattr(handler, "_split_pending", pooled)
+    monkeypatch.setattr(handler, "_stream_entry", streamed)
+    results = handler.process_multiple_pdfs(paths + [large])
+    assert routes == {"pool": [path.name for path in paths], "stream": [large.name]}
+    assert results["total_chunks"] == handler.vectorstore.index.ntotal
+
+
+def test_streamed_chunks_are_staged_and_cached(make_handler, large_pdf, tmp_path):
+    from rag_gpt.cache import VectorCache
+
+    handler = make_handler(pdf_page_window=3, pdf_stream_min_pages=4, embed_batch_size=5)
+    handler.cache = VectorCache()
+    entry = handler._stream_entry(large_pdf, handler._cache_key(large_pdf), 12)
+    # 문서 전체의 텍스트/벡터 목록 대신 스테이징 저장소만 보관
+    assert "texts" not in entry and "vectors" not in entry
+    assert entry["staging"].index.ntotal == len(entry["ids"]) == len(entry["sparse"])
+
+    reloaded = make_handler()
+    reloaded.cache = VectorCache()
+    results = reloaded.process_multiple_pdfs([large_pdf])
+    assert results["embedded_chunks"] == 0 and results["total_chunks"] == len(entry["ids"])
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from rag_gpt import vector_index
+from rag_gpt.quantization import ExactVectors, rescore
+
+QUESTIONS = [f"What is the reference code for study d{d}p{p}?" for d in range(4) for p in range(0, 20, 3)]
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    from rag_gpt.bench.corpus import generate_pages, write_pdfs
+
+    return write_pdfs(tmp_path_factory.mktemp("pdfs"), generate_pages(4, 20, 200))
+
+
+def _top_texts(handler, k=5):
+    vectors = [handler.embedding.embed_query(question) for question in QUESTIONS]
+    docstore = handler.vectorstore.docstore
+    return [[docstore.search(chunk_id).page_content for chunk_id in ids]
+            for ids in handler._dense_search(vectors, k)]
+
+
+def _recall(found, truth):
+    return sum(len(set(a) & set(b)) for a, b in zip(found, truth)) / sum(map(len, truth))
+
+
+def test_int8_storage_with_rescoring_matches_flat(make_handler, corpus):
+    flat = make_handler(retrieval_mode="dense")
+    flat.process_multiple_pdfs(corpus)
+    truth = _top_texts(flat)
+
+    int8 = make_handler(retrieval_mode="dense", vector_quantization="int8")
+    int8.process_multiple_pdfs(corpus)
+    assert vector_index.quantization_of(int8.vectorstore.index) == "int8"
+    assert getattr(int8.vectorstore, "exact_vectors", None) is None
+    assert vector_index.vector_bytes(int8.vectorstore.index) * 3 < vector_index.vector_bytes(flat.vectorstore.index)
+
+    rescored = make_handler(retrieval_mode="dense", vector_quantization="int8", rescore_k=20)
+    rescored.process_multiple_pdfs(corpus)
+    assert len(rescored.vectorstore.exact_vectors) == rescored.vectorstore.index.ntotal
+    assert _recall(_top_texts(rescored), truth) == 1.0
+    assert _recall(_top_texts(int8), truth) >= 0.8
+
+
+def test_rescore_orders_candidates_by_exact_distance():
+    exact = ExactVectors(2)
+    try:
+        exact.add(["a", "b", "c"], [[0.0, 0.0], [3.0, 0.0], [1.0, 0.0]])
+        query = np.array([0.9, 0.0], dtype=np.float32)
+        assert rescore(exact, query, ["b", "a", "c"], 2) == ["c", "a"]
+        assert rescore(exact, query, [], 2) == []
+    finally:
+        exact.close()
+
+
+def test_quantization_report(make_handler, corpus):
+    handler = make_handler(pq_m=16)
+    assert handler.quantization_report() is None
+    handler.process_multiple_pdfs(corpus)
+
+    rows = {row["variant"]: row for row in handler.quantization_report(k=10, n_queries=50)}
+    assert set(rows) == {"float32 (flat)", "int8", "int8 + 재점수(50)", "pq", "pq + 재점수(50)"}
+    assert rows["float32 (flat)"]["recall"] == 1.0
+    assert rows["int8"]["memory_bytes"] * 3 < rows["float32 (flat)"]["memory_bytes"]
+    assert rows["pq"]["memory_bytes"] < rows["int8"]["memory_bytes"]
+    for name in ("int8", "pq"):
+        plain, rescored = rows[name], rows[f"{name} + 재점수(50)"]
+        assert rescored["recall"] >= plain["recall"]
+        assert rescored["disk_bytes"] > 0 == plain["disk_bytes"]
+
+
+def test_report_on_a_tiny_corpus_uses_the_corpus_size(make_config, make_handler, make_pdfs, capsys):
+    from rag_gpt.app import RagGPT
+
+    rag = RagGPT(make_config(api_key="test"), use_cache=False)
+    rag.rag_handler = make_handler()
+    rag.rag_handler.process_multiple_pdfs(make_pdfs(1, 1, 60))
+    n = rag.rag_handler.vectorstore.index.ntotal
+    assert n < 10
+    assert {row["k"] for row in rag.rag_handler.quantization_report(k=10)} == {n}
+    rag.show_quantization_report(k=10)
+    assert f"recall@{n}" in capsys.readouterr().out
@@ -0,0 +1,109 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from rag_gpt.server import APIServer
+
+
+class _App:
+    """APIServer 가 사용하는 RagGPT 속성만 가진 객체"""
+
+    def __init__(self, handler):
+        self.config = handler.config
+        self.rag_handler = handler
+
+    def get_loaded_pdfs(self):
+        return self.rag_handler.get_loaded_pdfs()
+
+
+@pytest.fixture
+def serve(make_handler):
+    def serve(**overrides):
+        server = APIServer(_App(make_handler(**overrides)))
+        return server, TestClient(server.create_app())
+    return serve
+
+
+def test_ingest_is_disabled_without_a_root(serve, make_pdfs):
+    path = make_pdfs(1)[0]
+    _, client = serve()
+    with client:
+        response = client.post("/ingest", json={"paths": [str(path)]})
+    assert response.status_code == 403
+
+
+def test_ingest_only_reads_inside_the_root(serve, make_pdfs, tmp_path):
+    root = tmp_path / "allowed"
+    inside = make_pdfs(1, directory=root)[0]
+    outside = make_pdfs(1, directory=tmp_path / "other")[0]
+    (root / "link.pdf").symlink_to(outside)
+
+    _, client = serve(serve_ingest_root=str(root))
+    with client:
+        for path in (str(outside), "../other/doc_0000.pdf", "link.pdf"):
+            assert client.post("/ingest", json={"paths": [path]}).status_code == 403
+        assert client.get("/documents").json() == {"documents": []}
+
+        response = client.post("/ingest", json={"paths": [inside.name]})
+        assert response.status_code == 200
+        assert response.json()["total_chunks"] > 0
+        assert client.get("/documents").json() == {"documents": [inside.name]}
+
+
+def test_session_cache_is_bounded(serve, make_pdfs):
+    server, client = serve(serve_max_sessions=2, serve_ingest_root=str(make_pdfs(1)[0].parent))
+    with client:
+        client.post("/ingest", json={"paths": ["doc_0000.pdf"]})
+        for name in ("s1", "s2", "s3"):
+            assert client.post("/query", json={"question": "d0p1?", "session": name}).status_code == 200
+        assert list(server._sessions) == ["s2", "s3"]
+
+        # 메모리에서 내린 세션도 세션 파일에서 다시 읽힘
+        messages = client.get("/sessions/s1").json()["messages"]
+        assert [m["role"] for m in messages] == ["human", "ai"]
+        assert list(server._sessions) == ["s2", "s3"]
+
+
+def test_session_lookup_does_not_cache(serve):
+    server, client = serve()
+    with client:
+        assert client.get("/sessions/unknown").status_code == 404
+        assert client.get("/sessions/manifest").status_code == 400
+    assert not server._sessions
+
+
+def test_idle_sessions_expire(serve, make_pdfs, monkeypatch):
+    server, client = serve(serve_session_ttl=60, serve_ingest_root=str(make_pdfs(1)[0].parent))
+    clock = [1000.0]
+    monkeypatch.setattr("rag_gpt.server.time.monotonic", lambda: clock[0])
+    with client:
+        client.post("/ingest", json={"paths": ["doc_0000.pdf"]})
+        client.post("/query", json={"question": "d0p1?", "session": "old"})
+        clock[0] += 120
+        client.post("/query", json={"question": "d0p2?", "session": "new"})
+        assert list(server._sessions) == ["new"]
+
+
+def test_session_names_follow_the_chat_handler_rules(serve):
+    server, client = serve()
+    with client:
+        assert client.get("/sessions/.hidden").status_code == 400
+        # CLI 와 같은 규칙 (공백이 있는 이름도 허용)
+        assert client.get("/sessions/회의 메모").status_code == 404
+
+
+@pytest.mark.parametrize("flag, expected", [("--web", "0.0.0.0"), ("--serve", "127.0.0.1")])
+def test_default_bind_address(monkeypatch, flag, expected):
+    from typer.testing import CliRunner
+
+    from rag_gpt import app as app_module, server as server_module, web_app
+    from rag_gpt.__main__ import app
+
+    bound = []
+    monkeypatch.setattr(app_module, "RagGPT", lambda config, use_cache: object())
+    monkeypatch.setattr(server_module, "APIServer", lambda rag: type(
+        "Stub", (), {"run": lambda self, host, port: bound.append(host)})())
+    monkeypatch.setattr(web_app, "WebInterface", lambda rag: type(
+        "Stub", (), {"launch": lambda self, **kwargs: bound.append(kwargs["server_name"])})())
+
+    assert CliRunner().invoke(app, [flag]).exit_code == 0
+    assert bound == [expected]
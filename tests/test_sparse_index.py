@@ -0,0 +1,64 @@
+import pytest
+
+from rag_gpt.sparse_index import BM25Index, reciprocal_rank_fusion, term_counts, tokenize
+
+
+def test_tokenize_adds_korean_bigrams():
+    assert tokenize("BRCA1 유전자가 NGS") == ["brca1", "유전자가", "유전", "전자", "자가", "ngs"]
+    # 두 글자 어절은 그대로
+    assert tokenize("검사 결과") == ["검사", "결과"]
+
+
+def test_bm25_matches_particles_and_rare_terms():
+    index = BM25Index()
+    index.add(["a", "b", "c"], [
+        term_counts("유전자 검사는 NGS 로 수행한다"),
+        term_counts("검사 결과는 다음 주에 나온다"),
+        term_counts("BRCA1 변이가 발견되었다"),
+    ])
+    assert index.search("유전자가 무엇인가", 1)[0][0] == "a"
+    assert index.search("brca1", 3) == [("c", pytest.approx(index.search("brca1", 1)[0][1]))]
+
+    index.remove(["a"])
+    assert len(index) == 2
+    assert index.search("NGS", 3) == []
+    assert "ngs" not in index.postings
+
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    fused = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])]
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_hybrid_retrieval_finds_exact_codes(make_handler, make_pdfs):
+    paths = make_pdfs(3, 5)
+    handler = make_handler(retrieval_mode="hybrid", top_k=3)
+    handler.process_multiple_pdfs(paths)
+    assert len(handler.sparse_index) == handler.vectorstore.index.ntotal
+
+    for doc, page in ((0, 1), (1, 3), (2, 4)):
+        code = f"RC{doc:03d}{page:03d}"
+        assert code in handler.vectorstore.docstore.search(
+            handler.sparse_index.search(f"Which study has code {code}?", 1)[0][0]).page_content
+        docs, _ = handler._retrieve(code)
+        assert any(code in doc.page_content for doc in docs)
+
+    # 문서를 제거하면 희소 인덱스에서도 빠짐
+    removed = handler.remove_document(paths[0].name)
+    assert len(handler.sparse_index) == handler.vectorstore.index.ntotal
+    assert removed and not handler.sparse_index.search("RC000001", 3)
+
+
+def test_chunk_counts_are_rebuilt_from_postings():
+    index = BM25Index()
+    counts = [term_counts("유전자 검사는 NGS 로 NGS 수행한다"), term_counts("검사 결과")]
+    index.add(["a", "b"], counts)
+    assert index.counts("a") == counts[0] and index.counts("b") == counts[1]
+    assert index.counts("missing") is None
+
+    # 같은 id 로 다시 추가하면 이전 토큰이 남지 않음
+    index.add(["a"], [term_counts("BRCA1")])
+    assert index.counts("a") == {"brca1": 1}
+    assert set(index.postings["검사"]) == {"b"}
+    assert index.memory_usage()["total"] > 0
@@ -0,0 +1,25 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY = ["langchain", "langchain_community", "langchain_openai", "faiss", "torch",
+         "sentence_transformers", "gradio", "fastapi"]
+
+SCRIPT = f"""
+import importlib.util, json, sys
+spec = importlib.util.spec_from_file_location(
+    "rag_gpt", {str(ROOT / "__init__.py")!r}, submodule_search_locations=[{str(ROOT)!r}])
+module = importlib.util.module_from_spec(spec)
+sys.modules["rag_gpt"] = module
+spec.loader.exec_module(module)
+import rag_gpt.__main__
+print(json.dumps(sorted(name for name in {HEAVY!r} if name in sys.modules)))
+"""
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    output = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True)
+    assert json.loads(output.stdout.strip().splitlines()[-1]) == []
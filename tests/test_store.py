@@ -0,0 +1,77 @@
+import pytest
+
+from rag_gpt import store
+
+
+def _chunks(handler):
+    """인덱스 순서의 (id, 텍스트, 메타데이터)"""
+    vectorstore = handler.vectorstore
+    return [
+        (chunk_id, doc.page_content, doc.metadata)
+        for _, chunk_id in sorted(vectorstore.index_to_docstore_id.items())
+        for doc in (vectorstore.docstore.search(chunk_id),)
+    ]
+
+
+def test_save_and_open_round_trip(make_handler, make_pdfs, tmp_path):
+    paths = make_pdfs(2)
+    handler = make_handler()
+    handler.process_multiple_pdfs(paths)
+    handler.save_index(tmp_path / "index")
+
+    reopened = make_handler()
+    assert reopened.open_index(tmp_path / "index") == handler.vectorstore.index.ntotal
+    assert reopened.vectorstore.read_only
+    assert _chunks(reopened) == _chunks(handler)
+    assert reopened.doc_ids == handler.doc_ids
+    assert reopened.doc_paths == handler.doc_paths
+    assert store.read_meta(tmp_path / "index")["count"] == handler.vectorstore.index.ntotal
+
+
+def test_save_streams_chunks_without_lookups(make_handler, make_pdfs, tmp_path, monkeypatch):
+    """열린 저장소(SQLite + 메모리 오버레이)를 다시 저장할 때 청크별 조회를 하지 않음"""
+    paths = make_pdfs(3)
+    handler = make_handler(vector_quantization="int8", rescore_k=10)
+    handler.process_multiple_pdfs(paths[:2])
+    handler.save_index(tmp_path / "first")
+
+    reopened = make_handler(vector_quantization="int8", rescore_k=10)
+    reopened.open_index(tmp_path / "first")
+    reopened.remove_document(paths[0].name)
+    reopened.process_pdf(paths[2])
+    expected = _chunks(reopened)
+
+    docstore = type(reopened.vectorstore.docstore)
+
+    def fail(self, search):
+        raise AssertionError("save_store 가 청크를 하나씩 조회함")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(docstore, "search", fail)
+        reopened.save_index(tmp_path / "second")
+
+    final = make_handler(vector_quantization="int8", rescore_k=10)
+    final.open_index(tmp_path / "second")
+    assert _chunks(final) == expected
+    assert sorted(final.get_loaded_pdfs()) == sorted(p.name for p in paths[1:])
+    # 재점수용 원본 벡터도 인덱스 순서의 id 로 저장됨
+    ids = [chunk_id for chunk_id, _, _ in expected]
+    assert final.vectorstore.exact_vectors.get(ids).shape == (len(ids), reopened.vectorstore.index.d)
+
+
+@pytest.mark.parametrize("name", ["..", "../..", "a/b", "..\\x", ".hidden", ""])
+def test_index_names_cannot_leave_the_index_folder(make_config, make_handler, make_pdfs, tmp_path, name):
+    from rag_gpt.app import RagGPT
+
+    rag = RagGPT(make_config(api_key="test"), use_cache=False)
+    rag.rag_handler = make_handler()
+    rag.rag_handler.process_multiple_pdfs(make_pdfs(1, 2))
+    # ../.. 이 그대로 쓰이면 tmp_path 를 지우게 되는 위치
+    rag.config.config_dir = tmp_path / "config"
+    sentinel = tmp_path / "keep.txt"
+    sentinel.write_text("keep")
+
+    assert rag.save_index(name) is False
+    assert rag.open_index(name) == 0
+    assert sentinel.exists()
+    assert rag.save_index("work") and rag.open_index("work") > 0
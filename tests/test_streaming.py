@@ -0,0 +1,43 @@
+import pytest
+
+from rag_gpt.app import RagGPT
+from rag_gpt.bench.fakes import StubChatModel
+from rag_gpt.web_app import WebInterface
+
+QUESTION = "What is the reference code for study d0p1?"
+
+
+@pytest.fixture
+def rag(make_config, make_handler, make_pdfs):
+    rag = RagGPT(make_config(api_key="test"), use_cache=False)
+    rag.rag_handler = make_handler()
+    rag.rag_handler.llm = StubChatModel(answer_tokens=5)
+    rag.rag_handler.process_multiple_pdfs(make_pdfs(2, 3))
+    return rag
+
+
+def test_tokens_arrive_one_by_one(rag):
+    tokens = [token for token in rag.rag_handler.stream_query(QUESTION) if token]
+    assert len(tokens) == 5 and tokens[0].startswith("stub(")
+    assert "".join(tokens) == rag.rag_handler.query(QUESTION)
+
+
+def test_history_is_saved_when_the_stream_ends(rag):
+    stream = rag.stream_query(QUESTION, session_name="work")
+    first = next(stream)
+    assert rag.chat_handler.get_history() == []
+
+    answer = first + "".join(stream)
+    assert [message.content for message in rag.chat_handler.get_history()] == [QUESTION, answer]
+    rag.chat_handler.clear_history()
+    rag.chat_handler.load_session("work")
+    assert [message.content for message in rag.chat_handler.get_history()] == [QUESTION, answer]
+
+
+def test_web_chat_updates_while_streaming(rag):
+    demo = WebInterface(rag).create_interface()
+    chat = {block.fn.__name__: block.fn for block in demo.fns.values()}["chat"]
+    answers = [history[-1]["content"] for history, _, _ in chat(QUESTION, [], None)
+               if history and history[-1]["role"] == "assistant"]
+    assert len(answers) >= 5
+    assert all(later.startswith(earlier) for earlier, later in zip(answers, answers[1:]))
@@ -0,0 +1,28 @@
+from rag_gpt.cache import VectorCache
+
+
+def test_process_pdf_reuses_cached_vectors(make_handler, make_pdfs):
+    path, = make_pdfs(1)
+    first = make_handler()
+    first.cache = VectorCache()
+    chunks = first.process_pdf(path)
+    assert chunks > 0
+
+    second = make_handler()
+    second.cache = VectorCache()
+    results = second.process_multiple_pdfs([path])
+    assert results["total_chunks"] == chunks
+    assert results["embedded_chunks"] == 0
+    assert second.get_loaded_pdfs() == [path.name]
+
+
+def test_cache_key_follows_content_not_path(make_pdfs, tmp_path):
+    path, = make_pdfs(1)
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(path.read_bytes())
+    cache = VectorCache()
+    assert cache.make_key(path, 500, 50, "m") == cache.make_key(copy, 500, 50, "m")
+    assert cache.make_key(path, 500, 50, "m") != cache.make_key(path, 400, 50, "m")
+
+    other, = make_pdfs(1, directory=tmp_path / "other", seed=1)
+    assert cache.make_key(path, 500, 50, "m") != cache.make_key(other, 500, 50, "m")
@@ -0,0 +1,122 @@
+import pytest
+
+from rag_gpt import vector_index
+
+# 생성한 문서 하나(15쪽)는 60개 청크
+THRESHOLDS = {"auto_hnsw_threshold": 100, "auto_ivf_threshold": 200}
+
+
+def _layout(handler):
+    index = handler.vectorstore.index
+    return vector_index.index_type_of(index), vector_index.quantization_of(index)
+
+
+def _finds_own_chunk(handler, name: str) -> bool:
+    """문서의 청크 텍스트로 검색하면 그 청크가 나와야 함 (인덱스 순서/id 매핑 확인)"""
+    chunk_id = handler.doc_ids[name][len(handler.doc_ids[name]) // 2]
+    chunk = handler.vectorstore.docstore.search(chunk_id)
+    docs, _ = handler._retrieve(chunk.page_content, 1)
+    return docs[0].page_content == chunk.page_content
+
+
+def test_auto_layout_follows_corpus_size(make_handler, make_pdfs):
+    paths = make_pdfs(4, 15)
+    handler = make_handler(**THRESHOLDS)
+    handler.process_pdf(paths[0])
+    assert _layout(handler) == ("flat", "none")
+    handler.process_multiple_pdfs(paths[1:])
+    assert handler.vectorstore.index.ntotal >= THRESHOLDS["auto_ivf_threshold"]
+    assert _layout(handler) == ("ivf_flat", "none")
+
+
+def test_reopen_after_layout_change(make_handler, make_pdfs, tmp_path):
+    """임계값 아래로 줄어든 IVF 인덱스를 저장 후 열면 HNSW 로 마이그레이션"""
+    paths = make_pdfs(4, 15)
+    handler = make_handler(**THRESHOLDS)
+    handler.process_multiple_pdfs(paths)
+    assert _layout(handler)[0] == "ivf_flat"
+
+    handler.remove_document(paths[0].name)
+    handler.remove_document(paths[1].name)
+    remaining = handler.vectorstore.index.ntotal
+    assert THRESHOLDS["auto_hnsw_threshold"] <= remaining < THRESHOLDS["auto_ivf_threshold"]
+    handler.save_index(tmp_path / "index")
+
+    reopened = make_handler(**THRESHOLDS)
+    assert reopened.open_index(tmp_path / "index") == remaining
+    assert _layout(reopened) == ("hnsw", "none")
+    assert sorted(reopened.get_loaded_pdfs()) == sorted(p.name for p in paths[2:])
+    assert _finds_own_chunk(reopened, paths[2].name)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"index_type": "hnsw"},
+    {"vector_quantization": "int8"},
+])
+def test_reopen_with_changed_settings(make_handler, make_pdfs, tmp_path, overrides):
+    paths = make_pdfs(2, 5)
+    handler = make_handler()
+    handler.process_multiple_pdfs(paths)
+    total = handler.vectorstore.index.ntotal
+    handler.save_index(tmp_path / "index")
+
+    reopened = make_handler(**overrides)
+    assert reopened.open_index(tmp_path / "index") == total
+    assert _layout(reopened) != ("flat", "none")
+    assert _finds_own_chunk(reopened, paths[1].name)
+
+    # 마이그레이션한 인덱스에도 계속 추가할 수 있어야 함
+    extra, = make_pdfs(1, 2, directory=tmp_path / "extra", seed=3)
+    extra = extra.rename(extra.with_name("extra.pdf"))
+    reopened.process_pdf(extra)
+    assert reopened.vectorstore.index.ntotal > total
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf_flat"])
+def test_deletes_are_tombstoned_until_compaction(make_handler, make_pdfs, tmp_path, index_type):
+    paths = make_pdfs(8, 15)
+    handler = make_handler(index_type=index_type, retrieval_mode="dense")
+    handler.process_multiple_pdfs(paths)
+    vectorstore = handler.vectorstore
+    total = vectorstore.index.ntotal
+    removed_text = vectorstore.docstore.search(handler.doc_ids[paths[0].name][5]).page_content
+
+    # 인덱스를 다시 채우지 않고 삭제 표시만 함
+    removed = handler.remove_document(paths[0].name)
+    assert vectorstore.index is handler.vectorstore.index and vectorstore.index.ntotal == total
+    assert len(vector_index.tombstones(vectorstore)) == removed
+    assert vector_index.live_count(vectorstore) == total - removed
+    docs, _ = handler._retrieve(removed_text, 5)
+    assert len(docs) == 5 and paths[0].name not in {doc.metadata["source_file"] for doc in docs}
+    assert _finds_own_chunk(handler, paths[1].name)
+
+    # 삭제 표시가 있어도 추가한 청크의 위치와 id 가 맞아야 함
+    extra, = make_pdfs(1, 2, directory=tmp_path / "extra", seed=3)
+    extra = extra.rename(extra.with_name("extra.pdf"))
+    handler.process_pdf(extra)
+    assert _finds_own_chunk(handler, extra.name)
+
+    # 저장하면 압축된 인덱스만 기록
+    handler.save_index(tmp_path / "index")
+    live = vector_index.live_count(handler.vectorstore)
+    assert handler.vectorstore.index.ntotal == live
+    assert make_handler(index_type=index_type).open_index(tmp_path / "index") == live
+
+    # 삭제 표시가 TOMBSTONE_RATIO 를 넘으면 한 번에 압축
+    handler.remove_documents([paths[1].name, paths[2].name])
+    assert not vector_index.tombstones(handler.vectorstore)
+    assert handler.vectorstore.index.ntotal == len(handler.sparse_index)
+    assert _finds_own_chunk(handler, paths[3].name)
+
+
+def test_removing_several_documents_deletes_once(make_handler, make_pdfs):
+    paths = make_pdfs(4, 2)
+    handler = make_handler()
+    handler.process_multiple_pdfs(paths)
+    calls = []
+    delete = handler._delete_ids
+    handler._delete_ids = lambda ids: calls.append(len(ids)) or delete(ids)
+
+    removed = handler.remove_documents([paths[0].name, "missing.pdf", paths[2].name])
+    assert calls == [removed]
+    assert handler.get_loaded_pdfs() == [paths[1].name, paths[3].name]
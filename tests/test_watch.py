@@ -0,0 +1,172 @@
+import os
+
+import pytest
+
+from rag_gpt import store
+from rag_gpt.bench.fakes import HashEmbeddings
+from rag_gpt.cache import VectorCache
+from rag_gpt.watch import DirectoryWatcher
+
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self, dim: int = 64):
+        super().__init__(dim)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def folder(make_pdfs, tmp_path):
+    directory = tmp_path / "watched"
+    make_pdfs(15, 2, 60, directory=directory)
+    return directory
+
+
+@pytest.fixture
+def start(make_handler, folder):
+    """(핸들러, 감시기) - 프로세스를 다시 시작한 것처럼 매번 새로 만듦 (벡터 캐시 공유)"""
+    def start(**overrides):
+        handler = make_handler(**overrides)
+        handler.embedding = CountingEmbeddings()
+        handler.cache = VectorCache()
+        watcher = DirectoryWatcher(handler, folder, handler.config)
+        watcher.open()
+        return handler, watcher
+    return start
+
+
+def _snapshot_docs(watcher):
+    return sorted(store.read_meta(watcher.index_dir)["watch_files"])
+
+
+def _texts(handler, name):
+    docstore = handler.vectorstore.docstore
+    return [docstore.search(chunk_id).page_content for chunk_id in handler.doc_ids[name]]
+
+
+def test_restart_opens_the_snapshot_without_embedding(start, folder):
+    handler, watcher = start()
+    changes = watcher.sync()
+    assert len(changes["added"]) == 15 and handler.embedding.embedded > 0
+    chunks = handler.vectorstore.index.ntotal
+
+    handler, watcher = start()
+    assert handler.vectorstore.read_only
+    changes = watcher.sync()
+    assert (changes["added"], changes["modified"], changes["restored"]) == ([], [], [])
+    assert changes["unchanged"] == 15
+    assert handler.vectorstore.index.ntotal == chunks
+    assert handler.embedding.embedded == 0
+
+
+def test_touch_modify_delete(start, folder, make_handler, make_pdfs, tmp_path):
+    handler, watcher = start()
+    watcher.sync()
+    embedded = handler.embedding.embedded
+
+    touched = folder / "doc_0001.pdf"
+    os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10 ** 9))
+    changes = watcher.sync()
+    assert (changes["added"], changes["modified"], changes["unchanged"]) == ([], [], 15)
+    assert handler.embedding.embedded == embedded
+    assert watcher.files["doc_0001.pdf"]["mtime_ns"] == touched.stat().st_mtime_ns
+
+    replacement, = make_pdfs(1, 2, 60, directory=tmp_path / "new", seed=7)
+    (folder / "doc_0002.pdf").write_bytes(replacement.read_bytes())
+    (folder / "doc_0003.pdf").unlink()
+    changes = watcher.sync()
+    assert changes["modified"] == ["doc_0002.pdf"] and changes["removed"] == ["doc_0003.pdf"]
+    assert handler.embedding.embedded > embedded
+    assert "doc_0003.pdf" not in handler.get_loaded_pdfs()
+    # 바뀐 문서가 적으면 스냅숏은 그대로 두고 매니페스트만 기록
+    assert "doc_0003.pdf" in _snapshot_docs(watcher)
+
+    handler, watcher = start()
+    assert "doc_0003.pdf" not in handler.get_loaded_pdfs()
+    changes = watcher.sync()
+    assert changes["restored"] == ["doc_0002.pdf"]
+    assert handler.embedding.embedded == 0
+    assert sorted(handler.get_loaded_pdfs()) == sorted(p.name for p in folder.iterdir())
+    # 복원된 문서는 스냅숏의 이전 내용이 아니라 바뀐 내용
+    expected = make_handler()
+    expected.process_pdf(replacement)
+    assert _texts(handler, "doc_0002.pdf") == _texts(expected, replacement.name)
+
+
+def test_snapshot_is_rewritten_after_many_changes(start, folder, make_pdfs, tmp_path):
+    handler, watcher = start()
+    watcher.sync()
+    for path in sorted(folder.iterdir())[:3]:
+        path.unlink()
+    watcher.sync()
+    assert _snapshot_docs(watcher) == sorted(p.name for p in folder.iterdir())
+
+    # 연 스냅숏을 두 번 이어서 교체해도 처음 연 파일 기준으로 저장
+    handler, watcher = start()
+    for seed in (1, 2):
+        for path in make_pdfs(5, 2, 60, directory=tmp_path / f"new{seed}", seed=seed):
+            path.rename(folder / f"new{seed}_{path.name}")
+        watcher.sync()
+        assert _snapshot_docs(watcher) == sorted(p.name for p in folder.iterdir())
+
+    handler, watcher = start()
+    assert sorted(handler.get_loaded_pdfs()) == sorted(p.name for p in folder.iterdir())
+    assert handler.vectorstore.index.ntotal == sum(map(len, handler.doc_ids.values()))
+
+
+def test_only_watched_documents_are_persisted(start, folder, make_pdfs, tmp_path):
+    handler, watcher = start()
+    outside, = make_pdfs(1, 2, 60, directory=tmp_path / "outside", seed=3)
+    outside = outside.rename(outside.with_name("outside.pdf"))
+    handler.process_pdf(outside)
+    watcher.sync()
+    assert "outside.pdf" not in _snapshot_docs(watcher)
+
+    # 감시 동기화와 스냅숏 저장 뒤에도 다른 경로로 추가한 문서가 남아 있음
+    for path in sorted(folder.iterdir())[:3]:
+        path.unlink()
+    watcher.sync()
+    assert "outside.pdf" in handler.get_loaded_pdfs()
+    assert "outside.pdf" not in _snapshot_docs(watcher)
+
+    handler, watcher = start()
+    assert "outside.pdf" not in handler.get_loaded_pdfs()
+    assert sorted(handler.get_loaded_pdfs()) == sorted(p.name for p in folder.iterdir())
+
+
+def test_scoped_snapshot_keeps_quantized_vectors(start, make_pdfs, tmp_path):
+    handler, watcher = start(vector_quantization="int8", rescore_k=10)
+    outside, = make_pdfs(1, 2, 60, directory=tmp_path / "outside", seed=3)
+    handler.process_pdf(outside.rename(outside.with_name("outside.pdf")))
+    watcher.sync()
+    saved = handler.vectorstore.index.ntotal - len(handler.doc_ids["outside.pdf"])
+    assert store.read_meta(watcher.index_dir)["count"] == saved
+
+    handler, watcher = start(vector_quantization="int8", rescore_k=10)
+    assert handler.vectorstore.index.ntotal == saved
+    assert len(handler.vectorstore.exact_vectors) == saved
+
+
+def test_index_and_watch_are_rejected_together(folder):
+    from typer.testing import CliRunner
+
+    from rag_gpt.__main__ import app
+
+    result = CliRunner().invoke(app, ["--index", "saved", "--watch", str(folder), "question"])
+    assert result.exit_code == 1
+    assert "--index" in result.output and "--watch" in result.output
+
+
+def test_each_new_file_is_hashed_once(start, folder, monkeypatch):
+    handler, watcher = start()
+    hashed = []
+    digest = VectorCache.file_digest
+    monkeypatch.setattr(VectorCache, "file_digest",
+                        staticmethod(lambda path: hashed.append(path.name) or digest(path)))
+
+    changes = watcher.sync()
+    assert len(changes["added"]) == 15
+    assert sorted(hashed) == sorted(set(hashed)) and len(hashed) == 15
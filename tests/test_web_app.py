@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from rag_gpt.app import RagGPT
+from rag_gpt.web_app import WebInterface
+
+
+@pytest.fixture
+def web(make_config, make_handler, make_pdfs):
+    rag = RagGPT(make_config(api_key="test"), use_cache=False)
+    rag.rag_handler = make_handler()
+    rag.rag_handler.process_multiple_pdfs(make_pdfs(2, 3))
+    demo = WebInterface(rag).create_interface()
+    fns = {block.fn.__name__: block.fn for block in demo.fns.values()}
+    return rag, fns
+
+
+def _ask(chat, message, history, state):
+    for history, _, state in chat(message, history, state):
+        pass
+    return history, state
+
+
+def test_connections_keep_separate_histories(web):
+    rag, fns = web
+    chat = fns["chat"]
+
+    first, first_state = _ask(chat, "What is the reference code for study d0p1?", [], None)
+    second, second_state = _ask(chat, "What is the reference code for study d1p2?", [], None)
+    first, first_state = _ask(chat, "And d0p2?", first, first_state)
+
+    assert first_state is not second_state
+    assert [m.content for m in first_state.get_history()][::2] == [
+        "What is the reference code for study d0p1?", "And d0p2?"]
+    assert [m.content for m in second_state.get_history()][::2] == [
+        "What is the reference code for study d1p2?"]
+    assert len(first) == 4 and len(second) == 2
+    # 공유 RagGPT 의 기본 대화 기록은 사용하지 않음
+    assert rag.chat_handler.get_history() == []
+
+    history, cleared = fns["clear_chat"](first_state)
+    assert history == [] and cleared.get_history() == []
+    assert len(second_state.get_history()) == 2
+
+
+def test_connections_query_concurrently(web):
+    rag, fns = web
+    handler = rag.rag_handler
+    barrier = threading.Barrier(4, timeout=10)
+    stream_query = handler.stream_query
+
+    def together(question, chat_history=None):
+        # 모든 연결이 동시에 질의 중이어야 통과 (직렬화되면 시간 초과)
+        barrier.wait()
+        yield from stream_query(question, chat_history=chat_history)
+
+    handler.stream_query = together
+    results, errors = {}, []
+
+    def connection(i):
+        try:
+            results[i] = _ask(fns["chat"], f"question from user {i} about d0p{i % 3}?", [], None)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=connection, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for i, (history, state) in results.items():
+        assert [m.content for m in state.get_history()][0] == f"question from user {i} about d0p{i % 3}?"
+        assert history[-1]["content"].startswith("stub(")
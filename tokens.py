@@ -0,0 +1,20 @@
+"""
+토큰 수 추정
+
+Groq 모델의 토크나이저를 내려받지 않고 예산 계산에 쓸 수 있도록 글자 수로 근사합니다.
+영문/숫자는 약 4글자당 1토큰, 한글 등 비ASCII 문자는 글자당 1토큰으로 보수적으로 셉니다.
+"""
+from typing import Iterable
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트의 대략적인 토큰 수"""
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def estimate_message_tokens(messages: Iterable) -> int:
+    """langchain 메시지 목록의 대략적인 토큰 수 (메시지당 역할 구분 토큰 4개 포함)"""
+    return sum(estimate_tokens(message.content) + 4 for message in messages)
@@ -0,0 +1,328 @@
+"""
+FAISS 인덱스 종류 선택 및 관리 (flat / HNSW / IVF-Flat / IVF-PQ)
+
+vector_quantization 이 int8 또는 pq 면 각 종류의 벡터 저장 부분을
+스칼라 양자화(차원당 1바이트) 또는 PQ 코드로 바꿉니다.
+"""
+import math
+from typing import List, Tuple
+
+import numpy as np
+import faiss
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+QUANTIZATIONS = ("none", "int8", "pq")
+
+# IVF 학습에 필요한 중심점당 최소 벡터 수 (FAISS 권장값)
+MIN_POINTS_PER_CENTROID = 39
+
+# HNSW/IVF 에서 삭제 표시만 한 벡터가 전체의 이 비율을 넘으면 남은 벡터로 인덱스를 다시 채움
+TOMBSTONE_RATIO = 0.2
+
+
+def index_type_of(index) -> str:
+    """FAISS 인덱스 객체의 종류 이름"""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def quantization_of(index) -> str:
+    """FAISS 인덱스의 벡터 저장 방식 (none, int8, pq)"""
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "int8"
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    return "none"
+
+
+def vector_bytes(index) -> int:
+    """인덱스가 벡터 보관에 쓰는 메모리 추정치 (코드 + HNSW 링크 / IVF id)"""
+    if isinstance(index, faiss.IndexHNSW):
+        # 저장 벡터 + 이웃 링크 (int32)
+        return vector_bytes(faiss.downcast_index(index.storage)) + index.hnsw.neighbors.size() * 4
+    if isinstance(index, faiss.IndexIVF):
+        return index.ntotal * (index.code_size + 8)
+    if isinstance(index, faiss.IndexFlatCodes):
+        return index.ntotal * index.code_size
+    return index.ntotal * index.d * 4
+
+
+def _nlist_for(config, n_vectors: int) -> int:
+    """IVF 리스트 수 (ivf_nlist: 0이면 4*sqrt(N))"""
+    nlist = config.get("ivf_nlist", 0) or int(4 * math.sqrt(n_vectors))
+    return max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def resolve_index_type(config, n_vectors: int) -> str:
+    """설정과 벡터 수로 사용할 인덱스 종류 결정
+
+    index_type 이 "auto" 면 벡터 수가 auto_hnsw_threshold 이상일 때 HNSW,
+    auto_ivf_threshold 이상일 때 IVF-Flat 을 사용합니다.
+    IVF 계열은 학습할 벡터가 충분하지 않으면 flat 으로 대체합니다.
+    """
+    index_type = config.get("index_type", "auto")
+    if index_type == "auto":
+        if n_vectors >= config.get("auto_ivf_threshold", 500000):
+            index_type = "ivf_flat"
+        elif n_vectors >= config.get("auto_hnsw_threshold", 20000):
+            index_type = "hnsw"
+        else:
+            index_type = "flat"
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"알 수 없는 index_type: {index_type}")
+
+    if index_type.startswith("ivf"):
+        min_points = MIN_POINTS_PER_CENTROID * 2
+        if index_type == "ivf_pq":
+            min_points = max(min_points, 2 ** config.get("pq_nbits", 8))
+        if n_vectors < min_points:
+            return "flat"
+    return index_type
+
+
+def resolve_quantization(config, index_type: str, n_vectors: int) -> str:
+    """설정(vector_quantization)과 인덱스 종류, 벡터 수로 벡터 저장 방식 결정
+
+    ivf_pq 는 항상 pq 이고, PQ 코드북 학습에 필요한 벡터(2^pq_nbits 개)가 모자라면 int8 로 대체합니다.
+    """
+    quantization = config.get("vector_quantization", "none")
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"알 수 없는 vector_quantization: {quantization}")
+    if index_type == "ivf_pq":
+        return "pq"
+    if quantization == "pq" and n_vectors < 2 ** config.get("pq_nbits", 8):
+        return "int8"
+    return quantization
+
+
+def resolve_layout(config, n_vectors: int) -> Tuple[str, str]:
+    """(인덱스 종류, 벡터 저장 방식) - IVF 에 PQ 를 쓰면 ivf_pq 로 통일"""
+    index_type = resolve_index_type(config, n_vectors)
+    quantization = resolve_quantization(config, index_type, n_vectors)
+    if index_type == "ivf_flat" and quantization == "pq":
+        index_type = "ivf_pq"
+    return index_type, quantization
+
+
+def _pq_m(config, dim: int) -> int:
+    pq_m = config.get("pq_m", 16)
+    if dim % pq_m:
+        raise ValueError(f"pq_m({pq_m})은 벡터 차원({dim})의 약수여야 합니다")
+    return pq_m
+
+
+def build_index(index_type: str, dim: int, training_vectors: np.ndarray, config,
+                quantization: str = "none"):
+    """빈 인덱스 생성 (IVF 계열과 양자화 인덱스는 training_vectors 로 학습)"""
+    sq8 = faiss.ScalarQuantizer.QT_8bit
+    if index_type == "flat":
+        if quantization == "none":
+            return faiss.IndexFlatL2(dim)
+        if quantization == "int8":
+            index = faiss.IndexScalarQuantizer(dim, sq8, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexPQ(dim, _pq_m(config, dim), config.get("pq_nbits", 8))
+    elif index_type == "hnsw":
+        hnsw_m = config.get("hnsw_m", 32)
+        if quantization == "none":
+            index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        elif quantization == "int8":
+            index = faiss.IndexHNSWSQ(dim, sq8, hnsw_m)
+        else:
+            index = faiss.IndexHNSWPQ(dim, _pq_m(config, dim), hnsw_m)
+        index.hnsw.efConstruction = config.get("ef_construction", 80)
+        if quantization == "none":
+            return index
+    else:
+        nlist = _nlist_for(config, len(training_vectors))
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_pq":
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_m(config, dim), config.get("pq_nbits", 8))
+        elif quantization == "int8":
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, sq8)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+    return index
+
+
+def apply_search_params(index, config):
+    """검색 파라미터(nprobe, efSearch) 적용"""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.get("ef_search", 64)
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(config.get("nprobe", 8), index.nlist)
+
+
+def reconstruct_all(index) -> np.ndarray:
+    """인덱스의 모든 벡터 복원 (IVF-PQ 는 근사값)"""
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def ensure_writable(vectorstore):
+    """메모리 맵으로 연 인덱스를 변경 가능한 메모리 사본으로 교체
+
+    파일을 참조하는 인덱스에 add/remove 를 호출하면 FAISS 가 프로세스를 중단시키므로
+    변경 전에 반드시 호출해야 합니다. (clone_index 는 여전히 파일을 참조함)
+    """
+    if not getattr(vectorstore, "read_only", False):
+        return
+    vectorstore.index = faiss.deserialize_index(faiss.serialize_index(vectorstore.index))
+    vectorstore.index_to_docstore_id = dict(vectorstore.index_to_docstore_id.items())
+    vectorstore.read_only = False
+
+
+def ordered_ids(vectorstore) -> List[str]:
+    """인덱스 위치 순서의 청크 id"""
+    id_map = vectorstore.index_to_docstore_id
+    return [id_map[i] for i in range(vectorstore.index.ntotal)]
+
+
+def tombstones(vectorstore) -> set:
+    """삭제 표시된 인덱스 위치 (HNSW/IVF 에서 삭제한 뒤 아직 압축하지 않은 벡터)"""
+    return getattr(vectorstore, "tombstones", None) or set()
+
+
+def live_count(vectorstore) -> int:
+    """삭제 표시를 제외한 벡터 수"""
+    return vectorstore.index.ntotal - len(tombstones(vectorstore))
+
+
+def search(vectorstore, queries: np.ndarray, k: int) -> np.ndarray:
+    """질문별 상위 k개 인덱스 위치 (빈 자리는 -1)
+
+    삭제 표시된 위치는 FAISS ID 선택자로 검색 중에 제외하므로 결과 수가 줄지 않습니다.
+    """
+    index = vectorstore.index
+    dead = tombstones(vectorstore)
+    if not dead:
+        return index.search(queries, k)[1]
+
+    batch = faiss.IDSelectorBatch(np.fromiter(dead, dtype=np.int64, count=len(dead)))
+    selector = faiss.IDSelectorNot(batch)
+    if isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    else:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    return index.search(queries, k, params=params)[1]
+
+
+def existing_vectors(vectorstore) -> np.ndarray:
+    """인덱스 순서의 남은 벡터 (삭제 표시 제외)
+
+    원본 벡터 파일이 있으면 양자화 오차 없이 원본을 사용합니다.
+    """
+    dead = tombstones(vectorstore)
+    exact = getattr(vectorstore, "exact_vectors", None)
+    if exact is not None and vectorstore.index.ntotal:
+        return exact.get([chunk_id for pos, chunk_id in enumerate(ordered_ids(vectorstore))
+                          if pos not in dead])
+    vectors = reconstruct_all(vectorstore.index)
+    if dead:
+        vectors = vectors[[pos for pos in range(len(vectors)) if pos not in dead]]
+    return vectors
+
+
+def _drop_tombstones(vectorstore):
+    """삭제 표시된 위치를 index_to_docstore_id 와 원본 벡터 파일에서 빼고 남은 위치를 앞으로 당김
+
+    인덱스는 호출자가 existing_vectors 로 미리 읽어 둔 벡터로 다시 채워야 합니다.
+    """
+    dead = tombstones(vectorstore)
+    if not dead:
+        return
+    id_map = vectorstore.index_to_docstore_id
+    keep = [pos for pos in range(vectorstore.index.ntotal) if pos not in dead]
+    exact = getattr(vectorstore, "exact_vectors", None)
+    if exact is not None:
+        exact.delete([id_map[pos] for pos in dead])
+    vectorstore.index_to_docstore_id = {new_pos: id_map[old_pos] for new_pos, old_pos in enumerate(keep)}
+    vectorstore.tombstones = set()
+
+
+def compact(vectorstore):
+    """삭제 표시된 벡터를 빼고 남은 벡터로 인덱스를 다시 채움 (삭제 표시가 없으면 아무것도 안 함)"""
+    if not tombstones(vectorstore):
+        return
+    vectors = existing_vectors(vectorstore)
+    _drop_tombstones(vectorstore)
+    index = vectorstore.index
+    index.reset()
+    if len(vectors):
+        index.add(vectors)
+
+
+def _needs_rebuild(index, target: Tuple[str, str], n_vectors: int, config) -> bool:
+    """종류/저장 방식이 바뀌었거나, 학습된 인덱스가 데이터에 비해 너무 작게 학습되었으면 재구축"""
+    if (index_type_of(index), quantization_of(index)) != target:
+        return True
+    if target[1] != "none" and not isinstance(index, faiss.IndexIVF):
+        # 양자화 파라미터가 전체의 절반 이상으로 학습된 상태를 유지 (벡터 수가 두 배가 되면 재학습)
+        return index.ntotal > 0 and n_vectors >= 2 * index.ntotal
+    if isinstance(index, faiss.IndexIVF) and not config.get("ivf_nlist", 0):
+        return _nlist_for(config, n_vectors) > 2 * index.nlist
+    return False
+
+
+def prepare_for_add(vectorstore, new_vectors: List, config):
+    """새 벡터를 추가하기 전에 인덱스 종류 확인 및 필요 시 마이그레이션
+
+    기존 벡터 순서를 그대로 유지하므로 index_to_docstore_id 는 바뀌지 않습니다.
+    추가할 벡터가 없고 재구축도 필요 없으면 메모리 맵 인덱스를 그대로 둡니다.
+    """
+    # 빈 목록도 (0, d) 모양으로 맞춰 기존 벡터와 이어 붙일 수 있게 함
+    new_vectors = np.asarray(new_vectors, dtype=np.float32).reshape(-1, vectorstore.index.d)
+    n_total = live_count(vectorstore) + len(new_vectors)
+    target = resolve_layout(config, n_total)
+    rebuild = _needs_rebuild(vectorstore.index, target, n_total, config)
+    if rebuild or len(new_vectors):
+        ensure_writable(vectorstore)
+
+    index = vectorstore.index
+    if rebuild:
+        existing = existing_vectors(vectorstore)
+        _drop_tombstones(vectorstore)
+        training = np.vstack([existing, new_vectors]) if len(existing) else new_vectors
+        new_index = build_index(target[0], index.d, training, config, quantization=target[1])
+        if len(existing):
+            new_index.add(existing)
+        vectorstore.index = new_index
+
+    apply_search_params(vectorstore.index, config)
+
+
+def remove_vectors(vectorstore, ids: List[str]):
+    """청크 id 로 벡터/문서 삭제
+
+    flat 인덱스는 FAISS remove_ids 를 사용합니다. HNSW 는 remove_ids 를 지원하지 않고
+    IVF 는 삭제 후 라벨이 당겨지지 않으므로, 위치에 삭제 표시만 하고 검색에서 제외한 뒤
+    삭제 표시가 TOMBSTONE_RATIO 를 넘을 때 한 번에 압축합니다.
+    """
+    ensure_writable(vectorstore)
+    index = vectorstore.index
+    if isinstance(index, faiss.IndexFlatCodes):
+        exact = getattr(vectorstore, "exact_vectors", None)
+        vectorstore.delete(ids)
+        if exact is not None:
+            exact.delete(ids)
+        return
+
+    wanted = set(ids)
+    dead = tombstones(vectorstore)
+    dead.update(pos for pos, chunk_id in vectorstore.index_to_docstore_id.items() if chunk_id in wanted)
+    vectorstore.tombstones = dead
+    vectorstore.docstore.delete(ids)
+    if len(dead) > TOMBSTONE_RATIO * index.ntotal:
+        compact(vectorstore)
@@ -0,0 +1,330 @@
+"""
+감시 폴더 말뭉치 - 변경된 파일만 다시 인덱싱
+
+    rag-gpt --repl --watch ~/shared/pdfs
+
+폴더 아래의 PDF 를 모두 인덱싱하고, 파일별 (경로, 크기, 수정 시각, 내용 해시) 매니페스트와
+인덱스를 ~/.rag_gpt/watch/<폴더 이름>-<경로 해시>/ 에 저장합니다.
+
+    manifest.json  {"settings": {...}, "files": {상대 경로: {size, mtime_ns, sha256, name}}}
+    index/         감시 문서만 담은 RAGHandler.save_index 형식의 스냅숏
+                   (meta.json 의 watch_files 에 {문서 이름: sha256} 기록)
+
+검사할 때마다 매니페스트만 새로 쓰고, 스냅숏은 마지막 스냅숏 이후 바뀐 문서가
+감시 문서의 SNAPSHOT_RATIO 를 넘을 때만 다시 저장합니다. 스냅숏에는 감시 폴더의 문서만 들어가며
+(업로드나 !pdf 로 추가한 문서 제외), 저장 후 인덱스를 다시 열지 않으므로 그 사이 다른 작업이
+추가한 문서도 그대로 남습니다.
+
+다시 시작하면 스냅숏을 메모리 맵으로 열고, 스냅숏 이후 바뀐 문서는 벡터 캐시에서 다시 추가하며
+(임베딩 없음) 매니페스트에 없는 문서는 제거합니다. 이어서 폴더를 stat 만으로 훑어
+크기나 수정 시각이 바뀐 파일만 해시를 계산하고, 내용이 바뀐 파일과 새 파일만 임베딩하며,
+사라진 파일은 인덱스에서 제거합니다. 이후에는 watch_interval 초마다 같은 검사를 반복합니다.
+
+문서는 파일 이름으로 구분하므로, 하위 폴더에 같은 이름의 파일이 여러 개 있으면
+상대 경로 순서로 첫 번째 파일만 인덱싱합니다.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .cache import VectorCache
+from .embeddings import DEFAULT_EMBEDDING_MODEL
+
+MANIFEST_VERSION = 1
+
+# 한 번에 임베딩할 파일 수와 매니페스트 중간 저장 간격 (초기 인덱싱이 중단돼도 이어서 진행)
+GROUP_FILES = 32
+CHECKPOINT_SECONDS = 60.0
+# 스냅숏 이후 바뀐 문서가 감시 문서의 이 비율을 넘으면 스냅숏을 다시 저장
+SNAPSHOT_RATIO = 0.2
+
+
+def scan(directory: Path) -> Dict[str, Tuple[int, int]]:
+    """폴더 아래 PDF 의 {상대 경로: (크기, 수정 시각 ns)} (숨김 파일/폴더 제외)"""
+    found = {}
+    stack = [Path(directory)]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                    stat = entry.stat()
+                    rel = Path(entry.path).relative_to(directory).as_posix()
+                    found[rel] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                # 검사 중에 지워진 파일
+                continue
+    return found
+
+
+class DirectoryWatcher:
+    """폴더와 RAGHandler 인덱스를 매니페스트 기준으로 동기화"""
+
+    def __init__(self, rag_handler, directory: Path, config,
+                 report: Optional[Callable[[dict], None]] = None):
+        self.rag_handler = rag_handler
+        self.directory = Path(directory).expanduser().resolve()
+        self.config = config
+        self.report = report
+        digest = hashlib.sha256(str(self.directory).encode()).hexdigest()[:12]
+        self.state_dir = Path.home() / ".rag_gpt" / "watch" / f"{self.directory.name}-{digest}"
+        self.manifest_file = self.state_dir / "manifest.json"
+        self.index_dir = self.state_dir / "index"
+        self.files: Dict[str, dict] = {}
+        # 스냅숏에 들어 있는 {문서 이름: sha256}
+        self.snapshot: Dict[str, str] = {}
+        # 매니페스트에는 있지만 아직 인덱스에 없는 파일 (다시 시작 후 벡터 캐시에서 복원)
+        self._unindexed: Set[str] = set()
+        self.last_scan: Optional[float] = None
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _settings(self) -> dict:
+        """이 값이 바뀌면 저장된 인덱스를 버리고 처음부터 다시 인덱싱"""
+        return {
+            "chunk_size": self.config.get("chunk_size", 500),
+            "chunk_overlap": self.config.get("chunk_overlap", 50),
+            "embedding_model": self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+        }
+
+    def open(self) -> int:
+        """저장된 매니페스트와 스냅숏 열기 - 연 청크 수 반환 (없거나 설정이 다르면 0)
+
+        시작할 때 한 번 호출하며 핸들러의 현재 인덱스를 스냅숏으로 교체합니다.
+        스냅숏에 없거나 내용이 다른 매니페스트 파일은 다음 sync() 에서 다시 추가합니다.
+        """
+        from . import store
+
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("settings") != self._settings():
+            shutil.rmtree(self.state_dir, ignore_errors=True)
+            return 0
+
+        self.files = manifest.get("files", {})
+        current = {info["name"]: rel for rel, info in self.files.items() if "error" not in info}
+        self.snapshot = {}
+        if store.exists(self.index_dir):
+            self.rag_handler.open_index(self.index_dir)
+            self.snapshot = store.read_meta(self.index_dir).get("watch_files", {})
+            # 스냅숏 저장 후 매니페스트 기록 전에 중단되었거나 이전 형식이라 감시 문서가 아닌 것
+            self.rag_handler.remove_documents(
+                [name for name in self.rag_handler.get_loaded_pdfs() if name not in current]
+            )
+        self._unindexed = {
+            rel for name, rel in current.items()
+            if self.snapshot.get(name) != self.files[rel].get("sha256")
+        }
+        return sum(len(self.rag_handler.doc_ids.get(name, [])) for name in current)
+
+    def _write_manifest(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_file.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "directory": str(self.directory),
+                "settings": self._settings(),
+                "files": self.files,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.manifest_file)
+
+    def _indexed(self) -> Dict[str, str]:
+        """지금 인덱스에 있는 감시 문서 {이름: sha256}"""
+        loaded = set(self.rag_handler.get_loaded_pdfs())
+        return {
+            info["name"]: info["sha256"] for rel, info in self.files.items()
+            if "error" not in info and rel not in self._unindexed and info["name"] in loaded
+        }
+
+    def _checkpoint(self, snapshot: bool = True):
+        """매니페스트를 기록하고, 필요하면 감시 문서만 스냅숏으로 저장
+
+        스냅숏 이후 바뀐 문서가 SNAPSHOT_RATIO 이하이면 매니페스트만 씁니다
+        (그 문서는 다음 시작 때 벡터 캐시에서 다시 추가). 벡터 캐시를 쓰지 않으면 매번 저장합니다.
+        스냅숏 저장 후 매니페스트 기록 전에 중단되면 다음 시작 때 해당 파일만 다시 처리합니다.
+        """
+        indexed = self._indexed()
+        stale = {name for name in set(indexed) | set(self.snapshot)
+                 if indexed.get(name) != self.snapshot.get(name)}
+        if snapshot and stale:
+            if not indexed:
+                shutil.rmtree(self.index_dir, ignore_errors=True)
+                self.snapshot = {}
+            elif self.rag_handler.cache is None or len(stale) > SNAPSHOT_RATIO * len(indexed):
+                self.rag_handler.save_index(self.index_dir, names=list(indexed),
+                                            extra={"watch_files": indexed})
+                self.snapshot = indexed
+        self._write_manifest()
+
+    def _owners(self, found: Dict[str, Tuple[int, int]]) -> Tuple[Dict[str, str], List[str]]:
+        """파일 이름별로 인덱싱할 상대 경로 하나 - ({이름: 상대 경로}, 건너뛴 중복 경로)"""
+        owners, duplicates = {}, []
+        for rel in sorted(found):
+            name = Path(rel).name
+            if name in owners:
+                duplicates.append(rel)
+            else:
+                owners[name] = rel
+        return owners, duplicates
+
+    def diff(self, found: Dict[str, Tuple[int, int]]) -> dict:
+        """매니페스트와 비교 - 추가/변경/삭제 목록 (크기나 수정 시각이 바뀐 파일만 해시 계산)"""
+        owners, duplicates = self._owners(found)
+        tracked = set(owners.values())
+        added, modified, restored, touched, digests = [], [], [], {}, {}
+        for rel in sorted(tracked):
+            size, mtime_ns = found[rel]
+            info = self.files.get(rel)
+            if info is None:
+                added.append(rel)
+            elif info["size"] != size or info["mtime_ns"] != mtime_ns:
+                try:
+                    digest = VectorCache.file_digest(self.directory / rel)
+                except OSError:
+                    continue
+                digests[rel] = digest
+                if digest == info.get("sha256") and "error" not in info:
+                    # 내용은 같고 수정 시각만 바뀐 파일
+                    touched[rel] = {**info, "size": size, "mtime_ns": mtime_ns}
+                    if rel in self._unindexed:
+                        restored.append(rel)
+                else:
+                    modified.append(rel)
+            elif rel in self._unindexed:
+                restored.append(rel)
+        removed = sorted(rel for rel in self.files if rel not in tracked)
+        return {
+            "added": added,
+            "modified": modified,
+            "removed": removed,
+            "restored": restored,
+            "touched": touched,
+            "digests": digests,
+            "duplicates": duplicates,
+            "unchanged": len(tracked) - len(added) - len(modified) - len(restored),
+        }
+
+    def sync(self, progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """폴더를 한 번 검사해 인덱스에 반영하고 요약 반환
+
+        progress(처리한 파일 수, 처리할 파일 수) 는 파일 묶음마다 호출됩니다.
+        """
+        with self._sync_lock:
+            start = time.perf_counter()
+            found = scan(self.directory)
+            changes = self.diff(found)
+            changed = bool(changes["added"] or changes["modified"] or changes["removed"])
+            touched = changes.pop("touched")
+            self.files.update(touched)
+            digests = changes.pop("digests")
+
+            # 새 경로가 같은 이름을 이어받은 경우는 재인덱싱이 기존 청크를 교체하므로 제거하지 않음
+            names = {Path(rel).name for rel in changes["added"] + changes["modified"]}
+            removed = []
+            for rel in changes["removed"]:
+                info = self.files.pop(rel)
+                self._unindexed.discard(rel)
+                if info["name"] not in names and "error" not in info:
+                    removed.append(info["name"])
+            # 사라진 파일은 한 번에 제거 (인덱스 변경도 한 번)
+            self.rag_handler.remove_documents(removed)
+
+            changes["failed"] = []
+            changes["chunks"] = 0
+            # 스냅숏에 없던 파일은 벡터 캐시에서 읽으므로 임베딩하지 않음
+            pending = changes["added"] + changes["modified"] + changes["restored"]
+            last_checkpoint = time.perf_counter()
+            for offset in range(0, len(pending), GROUP_FILES):
+                group = pending[offset:offset + GROUP_FILES]
+                self._index(group, found, digests, changes)
+                if progress:
+                    progress(offset + len(group), len(pending))
+                if time.perf_counter() - last_checkpoint >= CHECKPOINT_SECONDS:
+                    self._checkpoint(snapshot=False)
+                    last_checkpoint = time.perf_counter()
+
+            if changed or changes["restored"] or not self.manifest_file.exists():
+                self._checkpoint()
+            elif touched:
+                self._write_manifest()
+            self.last_scan = time.time()
+            changes["files"] = len(found)
+            changes["elapsed"] = time.perf_counter() - start
+            return changes
+
+    def _index(self, group: List[str], found: Dict[str, Tuple[int, int]],
+               digests: Dict[str, str], changes: dict):
+        """파일 묶음 임베딩 후 매니페스트 갱신 (실패한 파일은 수정될 때까지 다시 시도하지 않음)"""
+        paths = [self.directory / rel for rel in group]
+        for rel, path in zip(group, paths):
+            if rel not in digests:
+                try:
+                    digests[rel] = VectorCache.file_digest(path)
+                except OSError:
+                    digests[rel] = None
+        # 매니페스트용으로 계산한 해시를 벡터 캐시 키에도 그대로 사용
+        results = self.rag_handler.process_multiple_pdfs(
+            paths, digests={path: digests[rel] for rel, path in zip(group, paths) if digests[rel]}
+        )
+        errors = {failed["file"]: failed["error"] for failed in results["failed"]}
+        changes["chunks"] += results["total_chunks"]
+        for rel in group:
+            size, mtime_ns = found[rel]
+            name = Path(rel).name
+            info = {"size": size, "mtime_ns": mtime_ns, "sha256": digests[rel], "name": name}
+            if name in errors:
+                info["error"] = errors[name]
+                changes["failed"].append({"file": rel, "error": errors[name]})
+            self.files[rel] = info
+            self._unindexed.discard(rel)
+
+    def start(self, interval: Optional[float] = None, sync_now: bool = False):
+        """watch_interval 초마다 sync() 를 실행하는 백그라운드 스레드 시작
+
+        sync_now 가 True 면 첫 검사를 기다리지 않고 바로 실행합니다.
+        간격이 0 이하면 sync_now 검사만 하고 반복하지 않습니다.
+        """
+        interval = self.config.get("watch_interval", 10) if interval is None else interval
+        if self._thread is not None or (interval <= 0 and not sync_now):
+            return
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval, sync_now), name="rag-watch", daemon=True
+        )
+        self._thread.start()
+
+    def _loop(self, interval: float, sync_now: bool):
+        if not sync_now and self._stop.wait(interval):
+            return
+        while True:
+            try:
+                changes = self.sync()
+            except Exception as e:
+                changes = {"error": str(e)}
+            if self.report:
+                self.report(changes)
+            if interval <= 0 or self._stop.wait(interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -4,13 +4,25 @@
 import gradio as gr
 from pathlib import Path
 from typing import List, Optional
-import json
+
+from .handlers.chat_handler import ChatHandler
+from .metrics import metrics
 
 class WebInterface:
-    """Gradio 웹 인터페이스 - 다중 PDF 지원"""
+    """Gradio 웹 인터페이스 - 다중 PDF 지원
+
+    임베딩 모델과 벡터 인덱스는 모든 사용자가 공유하고,
+    대화 기록은 브라우저 연결마다 별도의 ChatHandler 로 관리합니다.
+    """
     
     def __init__(self, rag_gpt_instance):
         self.rag = rag_gpt_instance
+    
+    def _session_chat(self, chat_state: Optional[ChatHandler]) -> ChatHandler:
+        """연결별 대화 핸들러 (없으면 새로 생성)"""
+        if chat_state is None:
+            chat_state = ChatHandler(self.rag.config)
+        return chat_state
         
     def create_interface(self):
         """Gradio 인터페이스 생성"""
@@ -18,6 +30,9 @@ class WebInterface:
         with gr.Blocks() as demo:
             gr.Markdown("# 🤖 RAG-GPT: 문서 기반 AI 어시스턴트")
             
+            # 연결(브라우저 탭)별 대화 기록
+            chat_state = gr.State(None)
+            
             with gr.Tab("💬 대화"):
                 with gr.Row():
                     with gr.Column(scale=1):
@@ -45,6 +60,16 @@ class WebInterface:
                             lines=5
                         )
                         
+                        # 문서 단위 제거/다시 로드
+                        doc_select = gr.Dropdown(
+                            choices=[],
+                            label="문서 선택",
+                            interactive=True
+                        )
+                        with gr.Row():
+                            unload_btn = gr.Button("➖ 선택 문서 제거", variant="secondary")
+                            reload_btn = gr.Button("🔄 선택 문서 다시 로드", variant="secondary")
+                        
                         gr.Markdown("### ⚙️ 설정")
                         model_dropdown = gr.Dropdown(
                             choices=[
@@ -91,6 +116,18 @@ class WebInterface:
                 )
                 refresh_btn = gr.Button("🔄 새로고침")
             
+            with gr.Tab("📈 지표"):
+                metrics_table = gr.Dataframe(
+                    headers=["단계", "횟수", "평균(ms)", "p50(ms)", "p95(ms)", "최대(ms)"],
+                    interactive=False
+                )
+                metrics_prom = gr.Textbox(
+                    label="Prometheus 텍스트 형식",
+                    lines=10,
+                    interactive=False
+                )
+                metrics_btn = gr.Button("🔄 새로고침")
+            
             with gr.Tab("ℹ️ 정보"):
                 gr.Markdown("""
                 ## 사용법
@@ -107,68 +144,106 @@ class WebInterface:
                 """)
             
             # 이벤트 핸들러
-            def process_pdfs(files):
-                """여러 PDF 처리"""
+            def doc_choices():
+                """문서 선택 드롭다운 갱신"""
+                return gr.update(choices=self.rag.get_loaded_pdfs(), value=None)
+            
+            def process_pdfs(files, progress=gr.Progress()):
+                """여러 PDF 를 백그라운드 작업으로 처리하며 진행 상황 표시
+
+                처리 중에도 이미 로드된 문서로 질의할 수 있고, 끝난 문서는 바로 목록에 추가됩니다.
+                """
                 if not files:
-                    return "❌ 파일을 선택해주세요.", "없음"
+                    yield "❌ 파일을 선택해주세요.", get_loaded_pdfs_display(), doc_choices()
+                    return
                 
-                try:
-                    # 파일 경로 추출
-                    pdf_paths = []
-                    for file in files:
-                        file_path = file.name if hasattr(file, 'name') else file
-                        pdf_paths.append(Path(file_path))
-                    
-                    # 다중 PDF 로드
-                    results = self.rag.rag_handler.process_multiple_pdfs(pdf_paths)
-                    
-                    # 상태 메시지 생성
-                    status_msg = ""
-                    for success in results["success"]:
-                        status_msg += f"✅ {success['file']}: {success['chunks']}개 청크\n"
-                    
-                    for failed in results["failed"]:
-                        status_msg += f"❌ {failed['file']}: {failed['error']}\n"
-                    
-                    status_msg += f"\n총 {results['total_chunks']}개 청크 로드됨"
-                    
-                    # 로드된 PDF 목록
-                    loaded_list = "\n".join([f"📄 {pdf}" for pdf in self.rag.get_loaded_pdfs()])
-                    if not loaded_list:
-                        loaded_list = "없음"
-                    
-                    return status_msg, loaded_list
-                    
-                except Exception as e:
-                    return f"❌ 오류: {str(e)}", "없음"
+                # 파일 경로 추출
+                pdf_paths = []
+                for file in files:
+                    file_path = file.name if hasattr(file, 'name') else file
+                    pdf_paths.append(Path(file_path))
+                
+                job = self.rag.jobs.submit(pdf_paths)
+                loaded = None
+                while not job.wait(0.5):
+                    progress(job.fraction(), desc=f"작업 {job.id}: {job.describe()}")
+                    # 새 문서가 공개됐을 때만 목록 갱신 (드롭다운 선택 유지)
+                    if self.rag.get_loaded_pdfs() != loaded:
+                        loaded = self.rag.get_loaded_pdfs()
+                        yield f"⏳ 작업 {job.id}: {job.describe()}", get_loaded_pdfs_display(), doc_choices()
+                
+                if job.error:
+                    yield f"❌ 오류: {job.error}", get_loaded_pdfs_display(), doc_choices()
+                    return
+                
+                # 상태 메시지 생성
+                results = job.results
+                status_msg = ""
+                for success in results["success"]:
+                    status_msg += f"✅ {success['file']}: {success['chunks']}개 청크\n"
+                
+                for failed in results["failed"]:
+                    status_msg += f"❌ {failed['file']}: {failed['error']}\n"
+                
+                status_msg += f"\n총 {results['total_chunks']}개 청크 로드됨"
+                status_msg += f" ({results['chunks_per_sec']:.1f} 청크/초)"
+                
+                yield status_msg, get_loaded_pdfs_display(), doc_choices()
             
             def clear_documents():
                 """문서 초기화"""
                 self.rag.clear_documents()
-                return "문서가 초기화되었습니다.", "없음"
+                return "문서가 초기화되었습니다.", "없음", doc_choices()
+            
+            def unload_document(name):
+                """선택 문서만 제거"""
+                if not name:
+                    return "문서를 선택하세요.", get_loaded_pdfs_display(), doc_choices()
+                try:
+                    removed = self.rag.rag_handler.remove_document(name)
+                    status_msg = f"🗑️ {name}: {removed}개 청크 제거됨"
+                except Exception as e:
+                    status_msg = f"❌ 오류: {str(e)}"
+                return status_msg, get_loaded_pdfs_display(), doc_choices()
             
-            def chat(message, history):
-                """채팅 처리"""
+            def reload_document(name):
+                """선택 문서만 다시 로드"""
+                if not name:
+                    return "문서를 선택하세요.", get_loaded_pdfs_display(), doc_choices()
+                try:
+                    chunks_count = self.rag.rag_handler.reload_document(name)
+                    status_msg = f"🔄 {name}: {chunks_count}개 청크로 교체됨"
+                except Exception as e:
+                    status_msg = f"❌ 오류: {str(e)}"
+                return status_msg, get_loaded_pdfs_display(), doc_choices()
+            
+            def chat(message, history, chat_state):
+                """채팅 처리 (토큰 스트리밍, 연결별 대화 기록)"""
+                chat_state = self._session_chat(chat_state)
                 if history is None:
                     history = []
                 
                 if not message or not message.strip():
-                    return history, ""
+                    yield history, "", chat_state
+                    return
                 
                 loaded_pdfs = self.rag.get_loaded_pdfs()
                 if not loaded_pdfs:
                     history.append({"role": "user", "content": message})
                     history.append({"role": "assistant", "content": "먼저 PDF를 업로드해주세요."})
-                    return history, ""
+                    yield history, "", chat_state
+                    return
                 
+                history.append({"role": "user", "content": message})
+                history.append({"role": "assistant", "content": ""})
                 try:
-                    history.append({"role": "user", "content": message})
-                    response = self.rag.query(message)
-                    history.append({"role": "assistant", "content": response})
+                    for token in self.rag.stream_query(message, chat_handler=chat_state):
+                        history[-1]["content"] += token
+                        yield history, "", chat_state
                 except Exception as e:
-                    history.append({"role": "assistant", "content": f"오류: {str(e)}"})
+                    history[-1]["content"] = f"오류: {str(e)}"
                 
-                return history, ""
+                yield history, "", chat_state
             
             def change_model(model_name):
                 try:
@@ -186,21 +261,23 @@ class WebInterface:
                 except Exception as e:
                     return f"❌ 오류: {str(e)}"
             
-            def save_session(name):
+            def save_session(name, chat_state):
+                chat_state = self._session_chat(chat_state)
                 if name:
                     try:
-                        self.rag.chat_handler.save_session(name)
+                        chat_state.save_session(name)
                         return f"✅ 세션 '{name}' 저장됨"
                     except Exception as e:
                         return f"❌ 오류: {str(e)}"
                 return "세션 이름을 입력하세요"
             
-            def load_session(name):
+            def load_session(name, chat_state):
+                chat_state = self._session_chat(chat_state)
                 if name:
                     try:
-                        self.rag.chat_handler.load_session(name)
+                        chat_state.load_session(name)
                         history = []
-                        messages = self.rag.chat_handler.get_history()
+                        messages = chat_state.get_history()
                         
                         for msg in messages:
                             if hasattr(msg, 'content'):
@@ -209,33 +286,38 @@ class WebInterface:
                                 else:
                                     history.append({"role": "assistant", "content": msg.content})
                         
-                        return history, f"✅ 세션 '{name}' 로드됨"
+                        return history, f"✅ 세션 '{name}' 로드됨", chat_state
                     except Exception as e:
-                        return [], f"❌ 오류: {str(e)}"
-                return [], "세션 이름을 입력하세요"
+                        return [], f"❌ 오류: {str(e)}", chat_state
+                return [], "세션 이름을 입력하세요", chat_state
             
             def list_sessions():
-                sessions_dir = Path.home() / ".rag_gpt" / "sessions"
                 result = "세션 이름 | 날짜 | 메시지 수\n"
                 result += "-" * 40 + "\n"
                 
-                if sessions_dir.exists():
-                    for session_file in sessions_dir.glob("*.json"):
-                        try:
-                            with open(session_file, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                            result += f"{data.get('name', 'Unknown')} | "
-                            result += f"{data.get('timestamp', '')[:10]} | "
-                            result += f"{len(data.get('messages', []))}\n"
-                        except:
-                            continue
-                else:
+                # 매니페스트만 읽으므로 세션 파일 크기와 무관
+                sessions = ChatHandler(self.rag.config).session_infos()
+                if not sessions:
                     result += "저장된 세션이 없습니다.\n"
+                for info in sessions:
+                    result += f"{info['name']} | "
+                    result += f"{info.get('timestamp', '')[:10]} | "
+                    result += f"{info.get('messages', 0)}\n"
                 
                 return result
             
-            def clear_chat():
-                return []
+            def clear_chat(chat_state):
+                chat_state = self._session_chat(chat_state)
+                chat_state.clear_history()
+                return [], chat_state
+            
+            def show_metrics():
+                rows = [
+                    [row["label"], row["count"], round(row["mean_ms"], 1),
+                     round(row["p50_ms"], 1), round(row["p95_ms"], 1), round(row["max_ms"], 1)]
+                    for row in metrics.snapshot()
+                ]
+                return rows, metrics.to_prometheus()
             
             def get_loaded_pdfs_display():
                 loaded = self.rag.get_loaded_pdfs()
@@ -247,25 +329,36 @@ class WebInterface:
             upload_btn.click(
                 process_pdfs, 
                 inputs=[pdf_files], 
-                outputs=[status, loaded_pdfs]
+                outputs=[status, loaded_pdfs, doc_select]
             )
             clear_docs_btn.click(
                 clear_documents,
                 inputs=None,
-                outputs=[status, loaded_pdfs]
+                outputs=[status, loaded_pdfs, doc_select]
+            )
+            unload_btn.click(
+                unload_document,
+                inputs=[doc_select],
+                outputs=[status, loaded_pdfs, doc_select]
+            )
+            reload_btn.click(
+                reload_document,
+                inputs=[doc_select],
+                outputs=[status, loaded_pdfs, doc_select]
             )
             
-            submit.click(chat, inputs=[msg, chatbot], outputs=[chatbot, msg])
-            msg.submit(chat, inputs=[msg, chatbot], outputs=[chatbot, msg])
-            clear.click(clear_chat, inputs=None, outputs=[chatbot])
+            submit.click(chat, inputs=[msg, chatbot, chat_state], outputs=[chatbot, msg, chat_state])
+            msg.submit(chat, inputs=[msg, chatbot, chat_state], outputs=[chatbot, msg, chat_state])
+            clear.click(clear_chat, inputs=[chat_state], outputs=[chatbot, chat_state])
             
             model_dropdown.change(change_model, inputs=[model_dropdown], outputs=[status])
             temperature.change(change_temp, inputs=[temperature], outputs=[status])
             
-            save_btn.click(save_session, inputs=[session_name], outputs=[status])
-            load_btn.click(load_session, inputs=[session_name], outputs=[chatbot, status])
+            save_btn.click(save_session, inputs=[session_name, chat_state], outputs=[status])
+            load_btn.click(load_session, inputs=[session_name, chat_state], outputs=[chatbot, status, chat_state])
             refresh_btn.click(list_sessions, outputs=[sessions_display])
             demo.load(list_sessions, outputs=[sessions_display])
+            metrics_btn.click(show_metrics, outputs=[metrics_table, metrics_prom])
             
         return demo
     
@@ -273,6 +366,11 @@ class WebInterface:
         """웹 서버 실행"""
         try:
             demo = self.create_interface()
+            # 동시 처리 수와 대기열 크기 제한 (요청은 스레드 풀에서 병렬 실행)
+            demo.queue(
+                default_concurrency_limit=self.rag.config.get("web_concurrency", 16),
+                max_size=self.rag.config.get("web_queue_size", 64)
+            )
             print("웹 인터페이스를 시작합니다...")
             print(f"브라우저에서 http://localhost:{kwargs.get('server_port', 7860)} 으로 접속하세요.")
             demo.launch(**kwargs)